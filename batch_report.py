@@ -0,0 +1,243 @@
+"""Offline Report: the Report page rendered to static HTML or PDF files.
+
+Produces the content of views/_9_Report.py (summary tables, top-N bars, fine
+histogram, time-of-day chart, observations) without a browser, once for the
+whole dataset and once per state. Charts are drawn in parallel by a process
+pool whose workers each load the dataset once; the HTML files embed their
+images, so they can be mailed or archived as they are.
+
+Files go to <out>/<dataset tag>/, the tag naming the source file, its mtime
+and the append version (DataStore.tag); a report that already exists for that
+version is kept unless --force.
+
+    python batch_report.py                                  # whole dataset, HTML
+    python batch_report.py --states each --format pdf       # plus one PDF per state
+    python batch_report.py --states Delhi Kerala --workers 4 --data violations/
+"""
+import argparse
+import base64
+import html
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Per process: the dataset and the profiles of the reports drawn so far
+_store = None
+_profiles = {}
+
+
+def _report_module():
+    import importlib
+
+    return importlib.import_module("views._9_Report")
+
+
+def _state_column(data):
+    return _report_module()._location_column(data)
+
+
+def slug(state):
+    return "all" if state is None else re.sub(r"[^A-Za-z0-9]+", "_", state).strip("_").lower()
+
+
+# ==================================================
+# PROFILES AND CHARTS (charts run in the pool)
+# ==================================================
+def _open(path):
+    global _store
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from data_store import DataStore
+
+    _store = DataStore(path)
+    _profiles.clear()
+
+
+def report_profile(state):
+    """Profile of the whole dataset (state None) or of one state's rows, kept per process."""
+    import dataset_profile
+
+    if state not in _profiles:
+        if state is None:
+            # Saved beside the dataset, so usually read rather than computed
+            _profiles[state] = dataset_profile.get_profile(_store)
+        else:
+            df = _store.frame()
+            _profiles[state] = dataset_profile.profile_frame(df[df[_state_column(df)] == state])
+    return _profiles[state]
+
+
+def chart_png(state, name):
+    """PNG bytes of one Report chart for `state` (None: all), or None when the data lacks its column."""
+    import live
+
+    fig = _report_module().FIGURES[name][1](report_profile(state))
+    if fig is None:
+        return None
+    # Rendered like the page renders it (live.figure_png matches st.pyplot)
+    return live.figure_png(name, lambda: fig)
+
+
+def render_charts(path, states, workers):
+    """{(state, chart): png} for every state and chart, drawn by `workers` processes."""
+    # A state's report has no "top locations" chart: it would be a single bar
+    tasks = [(state, name) for state in states for name in _report_module().FIGURES
+             if state is None or name != "locations"]
+    if workers <= 1:
+        return {task: chart_png(*task) for task in tasks}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open, initargs=(path,)) as pool:
+        futures = {task: pool.submit(chart_png, *task) for task in tasks}
+        return {task: future.result() for task, future in futures.items()}
+
+
+# ==================================================
+# DOCUMENTS
+# ==================================================
+CSS = """
+body { font-family: Arial, Helvetica, sans-serif; margin: 32px auto; max-width: 1100px; color: #1f2937; }
+h1 { color: #4338ca; }
+h2 { border-bottom: 2px solid #e5e7eb; padding-bottom: 4px; margin-top: 32px; }
+table { border-collapse: collapse; font-size: 13px; margin: 8px 0; }
+th, td { border: 1px solid #e5e7eb; padding: 4px 10px; text-align: left; }
+th { background: #f3f4f6; }
+.row { display: flex; gap: 24px; align-items: flex-start; }
+.row img { width: 48%; }
+.meta { color: #6b7280; font-size: 13px; }
+"""
+
+
+def _title(state):
+    title = "Indian Traffic Violations – Analytical Report"
+    return title if state is None else f"{title}: {state}"
+
+
+def _sections(report, charts, state):
+    """Chart section -> [(chart, png)] in page order, for the charts this report shows."""
+    sections = {}
+    for name, (section, _) in report.FIGURES.items():
+        png = charts.get((state, name))
+        if png is not None:
+            sections.setdefault(section, []).append((name, png))
+    return sections
+
+
+def write_html(profile, charts, state, path, tag):
+    report = _report_module()
+    img = lambda png: f'<img src="data:image/png;base64,{base64.b64encode(png).decode("ascii")}">'
+    parts = [
+        f"<h1>{html.escape(_title(state))}</h1>",
+        f'<p class="meta">Dataset {html.escape(tag)} · generated {time.strftime("%Y-%m-%d %H:%M")}</p>',
+        "<h2>Dataset Summary</h2>", report.summary_table(profile).to_html(index=False),
+        "<h2>Column Information</h2>", report.column_info(profile).to_html(index=False),
+        "<h2>Sample Records</h2>", profile.sample.to_html(index=False),
+    ]
+    for section, shown in _sections(report, charts, state).items():
+        parts.append(f"<h2>{html.escape(section)}</h2>")
+        row = "".join(img(png) for _, png in shown)
+        if any(name == "time_of_day" for name, _ in shown):
+            row += report.TIME_OF_DAY_NOTES
+        parts.append(f'<div class="row">{row}</div>')
+    parts += [
+        "<h2>Key Observations</h2>",
+        "<ul>" + "".join(f"<li>{html.escape(line)}</li>" for line in report.OBSERVATIONS) + "</ul>",
+        "<h2>Conclusion</h2>", f"<p>{html.escape(report.CONCLUSION)}</p>",
+    ]
+    document = (
+        f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(_title(state))}</title>'
+        f"<style>{CSS}</style></head><body>\n" + "\n".join(parts) + "\n</body></html>\n"
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(document)
+
+
+def write_pdf(profile, charts, state, path, tag):
+    """A text page (summary, observations, conclusion) followed by one page per chart."""
+    import matplotlib.image as mpimg
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    report = _report_module()
+    summary = report.summary_table(profile)
+    with PdfPages(path) as pdf:
+        fig = plt.figure(figsize=(8.27, 11.69))
+        lines = [f"Dataset {tag}", ""]
+        lines += [f"{metric}: {value:,}" for metric, value in zip(summary["Metric"], summary["Value"])]
+        lines += ["", "Key Observations"] + [f"  • {line}" for line in report.OBSERVATIONS]
+        lines += ["", "Conclusion", f"  {report.CONCLUSION}"]
+        fig.text(0.08, 0.94, _title(state), fontsize=15, fontweight="bold", va="top")
+        fig.text(0.08, 0.89, "\n".join(lines), fontsize=10, va="top", wrap=True)
+        pdf.savefig(fig)
+        plt.close(fig)
+
+        for section, shown in _sections(report, charts, state).items():
+            for _, png in shown:
+                fig, ax = plt.subplots(figsize=(8.27, 5.8))
+                ax.imshow(mpimg.imread(io.BytesIO(png), format="png"))
+                ax.axis("off")
+                ax.set_title(section, fontsize=12, fontweight="bold")
+                pdf.savefig(fig)
+                plt.close(fig)
+
+
+WRITERS = {"html": write_html, "pdf": write_pdf}
+
+
+# ==================================================
+# CLI
+# ==================================================
+def generate(path, states=("all",), fmt="html", out="reports", workers=None, force=False):
+    """Write the reports; returns the paths written (existing ones are skipped unless `force`)."""
+    _open(path)
+    directory = os.path.join(out, _store.tag)
+
+    wanted = []
+    for spec in states:
+        if spec == "all":
+            wanted.append(None)
+        elif spec == "each":
+            profile = report_profile(None)
+            wanted += sorted(profile.counts(_state_column(profile)).index)
+        else:
+            wanted.append(spec)
+    targets = {state: os.path.join(directory, f"report_{slug(state)}.{fmt}") for state in dict.fromkeys(wanted)}
+    if not force:
+        targets = {state: target for state, target in targets.items() if not os.path.exists(target)}
+    if not targets:
+        return []
+
+    charts = render_charts(path, list(targets), workers or os.cpu_count() or 1)
+    os.makedirs(directory, exist_ok=True)
+    for state, target in targets.items():
+        tmp = f"{target}.{os.getpid()}.tmp"
+        WRITERS[fmt](report_profile(state), charts, state, tmp, _store.tag)
+        os.replace(tmp, target)
+    return list(targets.values())
+
+
+def main(argv=None):
+    from data_store import DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Render the Report page to static HTML or PDF files")
+    parser.add_argument("--data", default=DATA_PATH, help="dataset CSV or partitioned directory")
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument("--states", nargs="+", default=["all"],
+                        help="'all' (whole dataset), 'each' (every state) and/or state names")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="html")
+    parser.add_argument("--workers", type=int, help="chart processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="rewrite reports that already exist")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    written = generate(args.data, args.states, args.format, args.out, args.workers, args.force)
+    for target in written:
+        print(f"✓ {target}")
+    print(f"{len(written)} report(s) in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
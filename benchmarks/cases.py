@@ -0,0 +1,586 @@
+"""Benchmark cases for load, preprocess, filter, aggregate, geo and render.
+
+A case is a function that takes a Context and returns a zero-argument
+callable; only the callable is timed, so any setup done in the case body is
+excluded. Aggregation cases mirror the main expressions of each page (the
+source is named in the docstring) and should be kept in step with them.
+"""
+import io
+import os
+from functools import cached_property
+
+CASES = []
+
+
+class Case:
+    def __init__(self, name, group, func):
+        self.name = name
+        self.group = group
+        self.func = func
+
+    @property
+    def id(self):
+        return f"{self.group}.{self.name}"
+
+
+def case(group, name=None):
+    def register(func):
+        CASES.append(Case(name or func.__name__, group, func))
+        return func
+    return register
+
+
+# ==================================================
+# CONTEXT (ONE DATASET SIZE)
+# ==================================================
+class Context:
+    """Synthetic data of one size, generated once and reused across runs."""
+
+    def __init__(self, rows, seed, data_dir):
+        self.rows = rows
+        self.seed = seed
+        self.data_dir = data_dir
+
+    def _path(self, stage):
+        return os.path.join(self.data_dir, f"{stage}_{self.rows}_{self.seed}")
+
+    def _ensure(self, stage, formats):
+        from synthetic_data import write_dataset
+
+        base = self._path(stage)
+        if not all(os.path.exists(f"{base}.{fmt}") for fmt in formats):
+            write_dataset(base, self.rows, self.seed, stage=stage, formats=formats)
+        return base
+
+    @cached_property
+    def csv_path(self):
+        return self._ensure("cleaned", ("csv", "parquet")) + ".csv"
+
+    @cached_property
+    def partitioned_path(self):
+        from partitions import MANIFEST, partition_csv
+
+        root = self._path("partitioned")
+        if not os.path.exists(os.path.join(root, MANIFEST)):
+            partition_csv(self.csv_path, root)
+        return root
+
+    @cached_property
+    def raw(self):
+        import pandas as pd
+        return pd.read_csv(self._ensure("raw", ("csv",)) + ".csv")
+
+    @cached_property
+    def df(self):
+        """Cleaned data as the pages see it (Date parsed)."""
+        from utils import load_data
+        return load_data(self.csv_path)
+
+    @cached_property
+    def store(self):
+        from data_store import DataStore
+        return DataStore(self.csv_path)
+
+    def page_frame(self, view):
+        """What main.py would pass to `view`, taken from this size's store."""
+        columns = getattr(view, "REQUIRED_COLUMNS", None)
+        derived = getattr(view, "DERIVED_COLUMNS", ())
+        if columns == [] and not derived:
+            return None
+        return self.store.frame(columns, derived=derived)
+
+
+def _png(fig):
+    """Render a matplotlib figure the way st.pyplot does."""
+    import matplotlib.pyplot as plt
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100, bbox_inches="tight")
+    plt.close(fig)
+    return buf.getbuffer().nbytes
+
+
+# ==================================================
+# LOAD
+# ==================================================
+@case("load")
+def load_data_csv(ctx):
+    """utils.load_data on the full CSV."""
+    from utils import load_data
+
+    path = ctx.csv_path
+    return lambda: load_data(path)
+
+
+@case("load")
+def store_all_columns(ctx):
+    """Cold DataStore read of every column from the Parquet copy."""
+    from data_store import DataStore
+
+    path = ctx.csv_path
+    ctx.store.frame()  # builds the Parquet copy outside the timing
+    return lambda: DataStore(path).frame()
+
+
+@case("load")
+def store_dashboard_columns(ctx):
+    """Cold DataStore read of the Dashboard's declared columns plus overlays."""
+    from data_store import DataStore
+    from views import _2_Dashboard as view
+
+    path = ctx.csv_path
+    ctx.store.frame()
+    return lambda: DataStore(path).frame(view.REQUIRED_COLUMNS, derived=view.DERIVED_COLUMNS)
+
+
+@case("load")
+def store_append_batch(ctx):
+    """streaming.py: DataStore.append of a 10-row batch onto a store holding every column."""
+    from data_store import DataStore
+
+    store = DataStore(ctx.csv_path)
+    batch = store.frame().iloc[:10]
+    return lambda: store.append(batch)
+
+
+# ==================================================
+# PREPROCESS
+# ==================================================
+@case("preprocess")
+def preprocess_data(ctx):
+    from generate_cleaned_data import preprocess_data as run
+
+    raw = ctx.raw
+    return lambda: run(raw)
+
+
+def _risk_frame(ctx):
+    from risk_scoring import CATEGORY_COLUMN, SCORE_COLUMN, RiskModel
+
+    return ctx.store.frame(RiskModel().columns + [SCORE_COLUMN, CATEGORY_COLUMN])
+
+
+@case("preprocess")
+def risk_score_full(ctx):
+    """risk_scoring.apply: Risk_Score/Risk_Category of every row (python -m benchmarks.run --sizes 1e8 -k risk_)."""
+    from risk_scoring import RiskModel, apply
+
+    df, model = _risk_frame(ctx), RiskModel()
+    return lambda: apply(df, model)
+
+
+@case("preprocess")
+def risk_rescore_weights(ctx):
+    """risk_scoring.rescore after one weight change: one rule evaluated, moved rows re-categorised."""
+    from risk_scoring import RiskModel, rescore
+
+    df, old = _risk_frame(ctx), RiskModel()
+    new = old.with_weights({"drunk_driving": 5})
+    return lambda: rescore(df, old, new)
+
+
+# ==================================================
+# FILTER
+# ==================================================
+@case("filter")
+def apply_filters_all(ctx):
+    """Sidebar defaults: full date range, every category, ages 18-100."""
+    from utils import apply_filters
+
+    df = ctx.df
+    dates = (df["Date"].min().date(), df["Date"].max().date())
+    return lambda: apply_filters(df, dates, ["All"], ["All"], ["All"], ["All"], (18, 100))
+
+
+@case("filter")
+def apply_filters_selective(ctx):
+    """One year, two states, three violation types, one gender."""
+    from utils import apply_filters
+
+    df = ctx.df
+    start = df["Date"].min().date()
+    dates = (start, start.replace(year=start.year + 1))
+    return lambda: apply_filters(
+        df, dates, ["Delhi", "Punjab"], ["Drunk Driving", "Over-speeding", "No Helmet"],
+        ["All"], ["Male"], (18, 60),
+    )
+
+
+@case("filter")
+def partitioned_scan_selective(ctx):
+    """apply_filters_selective's filters as a cold read of the Year/Month partitions."""
+    from data_store import DataStore
+    from partitions import Predicate
+
+    df = ctx.df
+    start = df["Date"].min().date()
+    predicate = Predicate.from_filters(
+        (start, start.replace(year=start.year + 1)), ["Delhi", "Punjab"],
+        ["Drunk Driving", "Over-speeding", "No Helmet"], ["All"], ["Male"], (18, 60),
+    )
+    path = ctx.partitioned_path
+    return lambda: DataStore(path).scan(["Violation_ID", "Fine_Amount", "Location"], predicate)
+
+
+# ==================================================
+# AGGREGATE (mirrors the pages)
+# ==================================================
+@case("aggregate")
+def dashboard_kpis(ctx):
+    """_2_Dashboard: KPI matrix in one pass."""
+    from views._2_Dashboard import DASHBOARD_KPIS
+
+    df = ctx.df
+    return lambda: DASHBOARD_KPIS.evaluate(df)
+
+
+@case("aggregate")
+def dashboard_crosstabs(ctx):
+    """_2_Dashboard: risk by age group and violation x vehicle for one year."""
+    import pandas as pd
+
+    df = ctx.df
+    year = int(df["Date"].dt.year.max())
+
+    def run():
+        pd.crosstab(df["Age_Group"], df["Risk_Category"])
+        year_df = df[df["Date"].dt.year == year]
+        return pd.crosstab(year_df["Violation_Type"], year_df["Vehicle_Type"])
+    return run
+
+
+@case("aggregate")
+def time_trend_groupbys(ctx):
+    """_3_Time_Trend_Analysis: monthly counts, yearly counts and yearly fines."""
+    df = ctx.df
+
+    def run():
+        df.groupby(df["Date"].dt.month).size().reindex(range(1, 13), fill_value=0)
+        df.groupby("Year").size()
+        return df.groupby("Year")["Fine_Amount"].sum()
+    return run
+
+
+@case("aggregate")
+def time_series_build(ctx):
+    """time_series: hourly and monthly buckets per violation type, as for _3_Time_Trend_Analysis."""
+    from views._3_Time_Trend_Analysis import TRENDS
+
+    df = ctx.store.frame(TRENDS.columns)
+    return lambda: TRENDS.accumulate(df)
+
+
+@case("aggregate")
+def time_series_queries(ctx):
+    """_3_Time_Trend_Analysis: the page's trends folded from the built buckets."""
+    from views._3_Time_Trend_Analysis import TIME_OF_DAY, TRENDS
+
+    trends = TRENDS.accumulate(ctx.store.frame(TRENDS.columns))
+    hourly, monthly = trends["hour"], trends["month"]
+
+    def run():
+        hours = hourly.part("hour")
+        in_hours = (hours >= 6) & (hours <= 20)
+        by_hour = hourly.by("hour", mask=in_hours)
+        return (
+            monthly.by("month", mask=monthly.part("year") == monthly.part("year")[-1], total=True),
+            monthly.by("year", total=True),
+            monthly.by("year", "avg_fine", total=True),
+            hourly.by("weekday", mask=in_hours),
+            by_hour.groupby(TIME_OF_DAY[by_hour.index]).sum(),
+            monthly.rolling(3, total=True),
+            monthly.year_over_year(),
+        )
+    return run
+
+
+@case("aggregate")
+def environment_pivot(ctx):
+    """_4_Environment_Analysis: mean risk by weather x road."""
+    import pandas as pd
+
+    df = ctx.df
+    return lambda: pd.pivot_table(df, values="Risk_Score", index="Weather_Condition",
+                                  columns="Road_Condition", aggfunc="mean")
+
+
+@case("aggregate")
+def vehicle_crosstabs(ctx):
+    """_5_Vehicle_Analysis: speed violations and safety counts by vehicle."""
+    import pandas as pd
+
+    df = ctx.df
+
+    def run():
+        pd.crosstab(df["Vehicle_Type"], df["Speed_Violation"])
+        return df.groupby("Vehicle_Type")[["Helmet_Compliance", "Seatbelt_Compliance"]].count()
+    return run
+
+
+@case("aggregate")
+def driver_profiles(ctx):
+    """_6_Driver_Behaviour_Analysis: profile overlay plus the summary table."""
+    from views._6_Driver_Behaviour_Analysis import driver_profiles as overlay
+
+    df = ctx.df
+
+    def run():
+        profiled = df.assign(**overlay(df))
+        return profiled.groupby("Driver_Profile").agg(
+            Total_Violations=("Violation_ID", "count"),
+            Avg_Penalty_Points=("Penalty_Points", "mean"),
+            Avg_Penalty_Violations=("Previous_Violations", "mean"),
+        )
+    return run
+
+
+@case("aggregate")
+def driver_distinct_ids_exact(ctx):
+    """_6_Driver_Behaviour_Analysis before sketches: two Violation_ID nunique() per rerun."""
+    df = ctx.df
+
+    def run():
+        return df["Violation_ID"].nunique(), df[df["Previous_Violations"] >= 3]["Violation_ID"].nunique()
+    return run
+
+
+@case("aggregate")
+def driver_distinct_ids_sketch(ctx):
+    """_6_Driver_Behaviour_Analysis: the same counts from the store's HyperLogLog state."""
+    from views._6_Driver_Behaviour_Analysis import VIOLATION_IDS
+
+    state = ctx.store.aggregate(VIOLATION_IDS)
+
+    def run():
+        return state.estimate(), state.estimate(lambda previous: previous is not None and previous >= 3)
+    return run
+
+
+@case("aggregate")
+def offender_index_build(ctx):
+    """offender_index: link every row to a driver and count violations per driver."""
+    import offender_index
+
+    engine = offender_index.engine_for(ctx.store)
+    df = ctx.store.frame(engine.columns)
+    return lambda: engine.accumulate(df)
+
+
+@case("aggregate")
+def offender_index_lookups(ctx):
+    """_6_Driver_Behaviour_Analysis: the linked-offender section's queries on the built index."""
+    import offender_index
+
+    engine = offender_index.engine_for(ctx.store)
+    index = ctx.store.aggregate(engine)
+    n = len(ctx.store.frame(engine.columns[:1]))
+
+    def run():
+        linked = index.violations(index.row_ids(n))
+        return (linked >= 2).mean(), index.repeat_offenders(), index.distribution(), index.top(10), index.driver(0)
+    return run
+
+
+@case("aggregate")
+def enforcement_build(ctx):
+    """enforcement: per-officer, per-agency and per-pair tallies of every row."""
+    from enforcement import EnforcementEngine
+
+    engine = EnforcementEngine()
+    df = ctx.store.frame(engine.columns)
+    return lambda: engine.accumulate(df)
+
+
+@case("aggregate")
+def enforcement_queries(ctx):
+    """_11_Enforcement_Analysis: agency table, top officers by each measure, drill-down and lookup."""
+    from enforcement import MEASURES, EnforcementEngine
+
+    state = EnforcementEngine().accumulate(ctx.store.frame(EnforcementEngine.columns))
+    agency = state.agencies.keys[0]
+    officer = state.officers.keys[0]
+
+    def run():
+        # Drop cached rankings, as after an appended batch
+        state.add(([], state.pairs.values[:0]), ([], state.officers.values[:0]), ([], state.agencies.values[:0]))
+        tops = [state.top_officers(10, measure) for measure in MEASURES]
+        return state.agencies.frame(), tops, state.agency_officers(agency, 10), state.officers.get(officer)
+    return run
+
+
+@case("aggregate")
+def payment_tables(ctx):
+    """_7_Payment_Analysis: KPIs, method x time-of-day shares and counts."""
+    import pandas as pd
+    from views._7_Payment_Analysis import PAYMENT_KPIS
+
+    df = ctx.df
+
+    def run():
+        PAYMENT_KPIS.evaluate(df)
+        pd.crosstab(df["Payment_Method"], df["Time_of_Day"], normalize="index") * 100
+        return df.groupby(["Violation_Type", "Payment_Method"]).size().reset_index(name="Count")
+    return run
+
+
+@case("aggregate")
+def map_state_totals(ctx):
+    """_8_Map_Visualisation: state totals and state x vehicle counts."""
+    df = ctx.df
+
+    def run():
+        df.groupby("Location").size().reset_index(name="Violations")
+        stats = df.groupby(["Location", "Vehicle_Type"]).size().reset_index(name="Count")
+        return stats.pivot_table(index="Location", columns="Vehicle_Type", values="Count", fill_value=0)
+    return run
+
+
+def _state_vehicle_query():
+    import query_engine as q
+
+    return q.Query(["Location", "Vehicle_Type"], {"Count": q.count(), "Fines": q.total("Fine_Amount")})
+
+
+@case("aggregate")
+def query_state_vehicle_arrow(ctx):
+    """query_engine: Location x Vehicle_Type counts and fines, Arrow batches over the partitions."""
+    from data_store import DataStore
+    from query_engine import ArrowEngine
+
+    store, query = DataStore(ctx.partitioned_path), _state_vehicle_query()
+    # The engine itself, bypassing aggregate()'s result cache
+    return lambda: query.finalize(ArrowEngine().partial(query, store))
+
+
+@case("aggregate")
+def query_state_vehicle_pandas(ctx):
+    """query_engine: the same query on the in-memory store."""
+    from query_engine import PandasEngine
+
+    store, query = ctx.store, _state_vehicle_query()
+    store.frame(query.columns)
+    return lambda: query.finalize(PandasEngine().partial(query, store))
+
+
+# ==================================================
+# GEO
+# ==================================================
+@case("geo")
+def geojson_parse(ctx):
+    """Cold parse of both GeoJSON files plus the combined collection."""
+    import geo_data
+
+    def run():
+        geo_data._cache.clear()
+        geo_data.load_geojsons()
+        return geo_data.combined_geojson()
+    return run
+
+
+@case("geo")
+def choropleth_build(ctx):
+    """State choropleth over the India GeoJSON, built and serialised like st.plotly_chart."""
+    import plotly.express as px
+    from geo_data import load_geojsons
+
+    _, india = load_geojsons()
+    totals = ctx.df.groupby("Location").size().reset_index(name="Violations")
+
+    def run():
+        fig = px.choropleth_mapbox(
+            totals, geojson=india, locations="Location", color="Violations",
+            featureidkey="properties.st_nm", mapbox_style="carto-darkmatter",
+            center={"lat": 20.59, "lon": 78.96}, zoom=4,
+        )
+        return len(fig.to_json())
+    return run
+
+
+# ==================================================
+# RENDER
+# ==================================================
+@case("render")
+def stacked_bar_png(ctx):
+    """Stacked bar of risk by age group rendered to PNG (Dashboard)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    table = pd.crosstab(ctx.df["Age_Group"], ctx.df["Risk_Category"])
+
+    def run():
+        fig, ax = plt.subplots(figsize=(7.6, 7.7))
+        table.plot(kind="bar", stacked=True, ax=ax)
+        return _png(fig)
+    return run
+
+
+@case("render")
+def heatmap_png(ctx):
+    """Annotated seaborn heatmap of the environment pivot rendered to PNG."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    pivot = pd.pivot_table(ctx.df, values="Risk_Score", index="Weather_Condition",
+                           columns="Road_Condition", aggfunc="mean")
+
+    def run():
+        fig, ax = plt.subplots(figsize=(9, 4))
+        sns.heatmap(pivot, annot=True, cmap="magma", linewidths=0.4, ax=ax)
+        return _png(fig)
+    return run
+
+
+@case("render")
+def histogram_kde_png(ctx):
+    """Fine histogram with KDE rendered to PNG (Report)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fines = ctx.df["Fine_Amount"]
+
+    def run():
+        fig, ax = plt.subplots(figsize=(5, 3.4))
+        sns.histplot(fines, kde=True, ax=ax)
+        return _png(fig)
+    return run
+
+
+def _page_case(label, module):
+    def run_page(ctx):
+        """Whole page in its default state, outside a Streamlit server."""
+        import importlib
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from data_store import use_store
+        from warmup import bare_mode
+
+        view = importlib.import_module(module)
+        use_store(ctx.store)
+
+        def run():
+            with bare_mode():
+                before = set(plt.get_fignums())
+                view.app(ctx.page_frame(view))
+                for num in set(plt.get_fignums()) - before:
+                    plt.close(num)
+        return run
+
+    case("page", label.lower().replace(" ", "_"))(run_page)
+
+
+def _register_pages():
+    from startup import PAGES
+
+    for label, module in PAGES.items():
+        _page_case(label, module)
+
+
+_register_pages()
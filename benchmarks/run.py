@@ -0,0 +1,151 @@
+"""Run the benchmark suite headless and store the results as JSON.
+
+Run from the repository root:
+
+    python -m benchmarks.run                              # all cases, 1e4 and 1e5 rows
+    python -m benchmarks.run --sizes 1e4 1e6 --group aggregate render
+    python -m benchmarks.run --json results/HEAD.json
+    python -m benchmarks.run --json results/new.json --compare results/HEAD.json
+
+Synthetic datasets are generated on first use (synthetic_data.py) and kept
+in --data-dir, so later runs time the same data.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta():
+    import numpy
+    import pandas
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def time_callable(func, repeat, warmup=1):
+    """Wall-clock seconds of `repeat` calls of `func` after `warmup` untimed calls."""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_suite(sizes, groups=None, names=None, repeat=3, seed=2023, data_dir=None, log=print):
+    from benchmarks.cases import CASES, Context
+
+    data_dir = data_dir or os.path.join(ROOT, "synthetic", "bench")
+    selected = [
+        c for c in CASES
+        if (not groups or c.group in groups) and (not names or any(n in c.id for n in names))
+    ]
+    results = []
+    for rows in sizes:
+        ctx = Context(rows, seed, data_dir)
+        for bench in selected:
+            try:
+                func = bench.func(ctx)
+                times = time_callable(func, repeat)
+            except Exception as exc:
+                log(f"{bench.id:<36} {rows:>11,}  ERROR {exc!r}")
+                results.append({"case": bench.id, "rows": rows, "error": repr(exc)})
+                continue
+            row = {
+                "case": bench.id,
+                "rows": rows,
+                "min": min(times),
+                "median": statistics.median(times),
+                "mean": statistics.fmean(times),
+                "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+                "rounds": len(times),
+            }
+            results.append(row)
+            log(f"{bench.id:<36} {rows:>11,}  min {row['min']:9.4f}s  median {row['median']:9.4f}s")
+    return results
+
+
+def compare(current, baseline, threshold):
+    """(case, rows, before, after, ratio) for every case present in both runs."""
+    before = {(r["case"], r["rows"]): r["median"] for r in baseline if "median" in r}
+    rows = []
+    for r in current:
+        key = (r["case"], r["rows"])
+        if "median" in r and key in before and before[key] > 0:
+            rows.append((*key, before[key], r["median"], r["median"] / before[key]))
+    regressions = [row for row in rows if row[4] > 1 + threshold]
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Traffic dashboard benchmark suite")
+    parser.add_argument("--sizes", nargs="+", default=["1e4", "1e5"], help="dataset sizes in rows")
+    parser.add_argument("--group", nargs="+", help="only these groups (load, preprocess, filter, aggregate, geo, render, page)")
+    parser.add_argument("-k", "--case", nargs="+", help="only cases whose id contains one of these")
+    parser.add_argument("--repeat", type=int, default=3, help="timed rounds per case")
+    parser.add_argument("--seed", type=int, default=2023)
+    parser.add_argument("--data-dir", help="where synthetic datasets are kept")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging")
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    args = parser.parse_args(argv)
+
+    # Import project modules from the repository root, whatever the cwd
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+
+    if args.list:
+        from benchmarks.cases import CASES
+        for c in CASES:
+            print(c.id)
+        return 0
+
+    sizes = [int(float(s)) for s in args.sizes]
+    results = run_suite(sizes, args.group, args.case, args.repeat, args.seed, args.data_dir)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": _meta(), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        rows, regressions = compare(results, baseline, args.threshold)
+        print()
+        for case_id, n, old, new, ratio in rows:
+            flag = "  REGRESSION" if ratio > 1 + args.threshold else ""
+            print(f"{case_id:<36} {n:>11,}  {old:9.4f}s -> {new:9.4f}s  x{ratio:5.2f}{flag}")
+        return 1 if regressions else 0
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from instrumentation import timed
+
+# STV_DATA_PATH points the app at another file, e.g. one written by synthetic_data.py
+DATA_PATH = os.environ.get("STV_DATA_PATH", "Indian_Traffic_Violations_Dataset.csv")
+
+# Pages get frames that share memory with the store. Copy-on-Write makes any
+# write through such a frame copy the touched column first, so the shared data
+# is never modified (pandas 3 always behaves this way; pandas 2 needs opting in).
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+def _read_only(series, copy=True):
+    """Copy of `series` backed by a read-only array (`series` itself with copy=False).
+
+    Guards the shared data even if Copy-on-Write is switched off again: an
+    in-place write then raises instead of reaching other sessions. Extension
+    dtypes (categoricals etc.) rely on Copy-on-Write alone.
+    """
+    if not isinstance(series.dtype, np.dtype):
+        return series.copy() if copy else series
+    values = series.to_numpy(copy=copy)
+    values.flags.writeable = False
+    return pd.Series(values, index=series.index, name=series.name, copy=False)
+
+
+def _nbytes(series):
+    """Deep memory usage of a column, including read-only object columns."""
+    if series.dtype == object:
+        # pandas' deep count needs a writable buffer; this is the same sum
+        values = series.to_numpy()
+        return values.nbytes + sum(sys.getsizeof(v) for v in values)
+    return series.memory_usage(index=False, deep=True)
+
+
+class _Segments:
+    """One shared column as read-only Series segments: the rows read, then appended batches.
+
+    An append adds a segment instead of copying the column. Trailing segments
+    are merged while the last is at least as long as the one before it, so an
+    append costs O(batch) amortized and a column has O(log rows) segments.
+    series() concatenates them on the first read after an append and keeps
+    the result as the only segment. append() returns a new instance; a
+    published one only ever changes into the same rows.
+    """
+
+    def __init__(self, parts):
+        self.parts = tuple(parts)
+        self.rows = sum(len(part) for part in self.parts)
+
+    @staticmethod
+    def _concat(parts):
+        return parts[0] if len(parts) == 1 else _read_only(pd.concat(parts), copy=False)
+
+    def append(self, series):
+        parts = list(self.parts) + [series]
+        while len(parts) > 1 and len(parts[-1]) >= len(parts[-2]):
+            last = parts.pop()
+            parts[-1] = self._concat([parts[-1], last])
+        return _Segments(parts)
+
+    def series(self):
+        parts = self.parts
+        if len(parts) > 1:
+            parts = self.parts = (self._concat(parts),)
+        return parts[0]
+
+    def nbytes(self):
+        return sum(_nbytes(part) for part in self.parts)
+
+
+def derived_column(*requires):
+    """Declare `func(frame)` as a derived-column overlay computed from `requires`.
+
+    The function receives a frame holding the `requires` columns and returns a
+    Series (named after the column it produces) or a DataFrame of columns. The
+    result is computed once per process and shared read-only by every session.
+    """
+    def wrap(func):
+        func.requires = list(requires)
+        return func
+    return wrap
+
+
+# ==================================================
+# SHARED DERIVED COLUMNS
+# ==================================================
+@derived_column("Date")
+def date_parts(df):
+    """Date parsed to datetime plus numeric Year and Month."""
+    date = pd.to_datetime(df["Date"], errors="coerce")
+    return pd.DataFrame({"Date": date, "Year": date.dt.year, "Month": date.dt.month})
+
+
+class DataStore:
+    """Column-oriented, lazily loaded access to the violation dataset.
+
+    Columns are read from disk only when a page first asks for them and are
+    then kept in memory, one Series per column. Reads go to a Parquet copy of
+    the CSV (built on first use) so that loading a handful of columns does not
+    parse the whole file.
+
+    Loaded and derived columns are read-only and shared by all sessions; each
+    call to frame() returns a new DataFrame, so pages may add or replace
+    columns on it without affecting anyone else.
+
+    Rows can be appended while the app runs (streaming.py); `version` counts
+    the appends so that pages can tell when the data changed, and
+    aggregate_version() tells when an aggregate's state last did.
+
+    `path` may also be a directory written by partitions.py; columns are then
+    read from its partitions, and scan() reads only the partitions a filter
+    can match.
+    """
+
+    def __init__(self, path=DATA_PATH, columnar=True):
+        self.path = path
+        self.columnar = columnar
+        self._columns = {}
+        self._derived = {}
+        self._aggregates = {}
+        # Store version at which each aggregate's state last changed
+        self._aggregate_versions = {}
+        self._bytes = {"columns": 0, "derived": 0}
+        self._derived_funcs = {}
+        # Rows added by append(), kept for columns that are loaded later
+        self._appended = []
+        self.version = 0
+        self._schema = None
+        self._lock = threading.Lock()
+        self.partitioned = None
+        if os.path.isdir(path):
+            from partitions import PartitionedDataset
+
+            self.partitioned = PartitionedDataset(path)
+            self._schema = list(self.partitioned.columns)
+
+    # ---------------- SCHEMA ----------------
+    @property
+    def schema(self):
+        """All column names available in the dataset, in file order."""
+        if self._schema is None:
+            self._schema = list(pd.read_csv(self.path, nrows=0).columns)
+        return self._schema
+
+    @property
+    def columnar_path(self):
+        return os.path.splitext(self.path)[0] + ".parquet"
+
+    @property
+    def tag(self):
+        """Identifies the dataset's contents: source file, its mtime and the append version."""
+        source = self.path.rstrip("/\\")
+        stamp = int(os.path.getmtime(source)) if os.path.exists(source) else 0
+        return f"{os.path.basename(source).split('.')[0]}-{stamp}-v{self.version}"
+
+    def loaded_columns(self):
+        return list(self._columns)
+
+    def memory_usage(self):
+        """Bytes held by the loaded columns."""
+        return int(sum(column.nbytes() for column in self._columns.values()))
+
+    def _publish(self):
+        """Report size figures to the metrics exporter (called under the lock)."""
+        if _store is not self:
+            # Benchmarks and tools build private stores; only the served one counts
+            return
+        column = next(iter(self._columns.values()), None)
+        metrics.DATASET_ROWS.set(column.rows if column is not None else 0)
+        metrics.DATASET_VERSION.set(self.version)
+        metrics.LOADED_COLUMNS.set(len(self._columns))
+        for part, nbytes in self._bytes.items():
+            metrics.STORE_BYTES.set(nbytes, part=part)
+
+    # ---------------- LOADING ----------------
+    def _columnar_ready(self):
+        path = self.columnar_path
+        return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(self.path)
+
+    def build_columnar(self):
+        """Convert the CSV into the Parquet columnar copy. Returns the full frame."""
+        df = pd.read_csv(self.path)
+        try:
+            df.to_parquet(self.columnar_path, index=False)
+        except (OSError, ImportError):
+            # Read-only deployments (or no Parquet engine) fall back to CSV reads
+            self.columnar = False
+        return df
+
+    def _read(self, columns):
+        if self.partitioned is not None:
+            return self.partitioned.read(columns)
+        if self.columnar:
+            if self._columnar_ready():
+                return pd.read_parquet(self.columnar_path, columns=columns)
+            return self.build_columnar()[columns]
+        return pd.read_csv(self.path, usecols=columns)[columns]
+
+    def load(self, columns):
+        """Make sure `columns` are resident in memory."""
+        missing = [c for c in columns if c not in self._columns]
+        metrics.cache_lookup("columns", hit=not missing)
+        if not missing:
+            return
+        with self._lock:
+            missing = [c for c in missing if c not in self._columns]
+            if missing:
+                with timed("store.read", kind="data", columns=len(missing)):
+                    df = self._read(missing)
+                if self._appended:
+                    df = pd.concat([df] + [rows[missing] for rows in self._appended], ignore_index=True)
+                for col in missing:
+                    self._columns[col] = _Segments([_read_only(df[col])])
+                self._bytes["columns"] += sum(self._columns[c].nbytes() for c in missing)
+                self._publish()
+
+    @staticmethod
+    def _derived_key(func):
+        return f"{func.__module__}.{func.__qualname__}"
+
+    @staticmethod
+    def _overlay(func, source):
+        result = func(source)
+        if isinstance(result, pd.Series):
+            result = result.to_frame()
+        return result
+
+    def derived(self, func):
+        """Columns produced by a derived_column function, computed at most once."""
+        key = self._derived_key(func)
+        result = self._derived.get(key)
+        metrics.cache_lookup("derived", hit=result is not None)
+        while result is None:
+            version = self.version
+            source = self.frame(func.requires)
+            with self._lock:
+                result = self._derived.get(key)
+                # Rows appended meanwhile are missing from `source`: read it again
+                if result is None and self.version == version:
+                    with timed(f"derived: {func.__name__}", kind="aggregate"):
+                        overlay = self._overlay(func, source)
+                    result = {col: _Segments([_read_only(overlay[col])]) for col in overlay.columns}
+                    self._derived[key] = result
+                    self._derived_funcs[key] = func
+                    self._bytes["derived"] += sum(s.nbytes() for s in result.values())
+                    self._publish()
+        return {col: column.series() for col, column in result.items()}
+
+    def has_aggregate(self, engine):
+        return engine in self._aggregates
+
+    def aggregate_version(self, engine):
+        """Store version at which the engine's state last changed (O(1)).
+
+        An aggregate not computed yet would be computed from the current rows.
+        """
+        return self._aggregate_versions.get(engine, self.version)
+
+    def _saved_aggregate(self, engine):
+        """The engine's saved state of the dataset file (engine.load_saved) plus the appended rows."""
+        load = getattr(engine, "load_saved", None)
+        state = load(self) if load else None
+        if state is not None:
+            with self._lock:
+                appended = list(self._appended)
+            for rows in appended:
+                state = state.merge(engine.accumulate(rows[engine.columns]))
+        return state
+
+    def aggregate(self, engine):
+        """KPIState of a KPIEngine over the whole dataset, computed at most once.
+
+        Engines with a load_saved(store) method may restore the state of the
+        dataset file instead of reading its columns.
+        """
+        state = self._aggregates.get(engine)
+        metrics.cache_lookup("aggregates", hit=state is not None)
+        if state is None:
+            version = self.version
+            with timed(f"store.aggregate: {engine.name}", kind="aggregate"):
+                state = self._saved_aggregate(engine)
+                if state is None:
+                    state = engine.accumulate(self.frame(engine.columns))
+            with self._lock:
+                # A state computed before an append would miss its rows; use it
+                # for this call only
+                if self.version == version:
+                    state = self._aggregates.setdefault(engine, state)
+                    self._aggregate_versions.setdefault(engine, version)
+        return state
+
+    # ---------------- APPENDING ----------------
+    def append(self, rows):
+        """Add cleaned rows (in the dataset's schema) and return the new version.
+
+        Only the new rows are processed: loaded columns get the rows as a new
+        segment (see _Segments), derived overlays are computed on the new rows
+        (derived columns are row-wise)
+        and cached KPI states are merged with the new rows' partial state
+        (states the new rows add nothing to, such as a time series of rows
+        without a date, are kept along with their version).
+        Frames handed out earlier keep the rows they had.
+        """
+        if rows is None or rows.empty:
+            return self.version
+        rows = rows.reindex(columns=self.schema)
+        # The current row count is taken from a loaded column
+        self.load(self.schema[:1])
+        with self._lock:
+            start = next(iter(self._columns.values())).rows
+            rows.index = pd.RangeIndex(start, start + len(rows))
+
+            columns = {col: s.append(_read_only(rows[col])) for col, s in self._columns.items()}
+            derived = {}
+            for key, result in self._derived.items():
+                func = self._derived_funcs[key]
+                overlay = self._overlay(func, rows[func.requires])
+                derived[key] = {col: result[col].append(_read_only(overlay[col])) for col in result}
+                self._bytes["derived"] += sum(_nbytes(overlay[col]) for col in result)
+            aggregates, versions = {}, dict(self._aggregate_versions)
+            for engine, state in self._aggregates.items():
+                partial = engine.accumulate(rows[engine.columns])
+                if getattr(partial, "rows", None) == 0:
+                    aggregates[engine] = state
+                    continue
+                aggregates[engine] = state.merge(partial)
+                versions[engine] = self.version + 1
+
+            # Swap whole dicts so readers see either the old or the new rows
+            self._columns, self._derived, self._aggregates = columns, derived, aggregates
+            self._aggregate_versions = versions
+            self._appended.append(rows)
+            self._bytes["columns"] += sum(_nbytes(rows[col]) for col in columns)
+            self.version += 1
+            self._publish()
+        return self.version
+
+    # ---------------- ACCESS ----------------
+    @timed("store.frame", kind="data")
+    def frame(self, columns=None, derived=()):
+        """Return a DataFrame holding only `columns` (all columns when None).
+
+        Unknown column names are ignored so that pages can declare optional
+        columns they handle when present. Columns produced by the `derived`
+        functions are overlaid on top, replacing base columns of the same name
+        in the returned frame only.
+        """
+        if columns is None:
+            columns = self.schema
+        columns = [c for c in columns if c in self.schema]
+        self.load(columns)
+        for func in derived:
+            self.derived(func)
+        # Taken under the lock so that every column has the same rows
+        with self._lock:
+            data = {c: self._columns[c] for c in columns}
+            for func in derived:
+                data.update(self._derived[self._derived_key(func)])
+        if not data:
+            return pd.DataFrame()
+        return pd.DataFrame({col: column.series() for col, column in data.items()}, copy=False)
+
+    def scan(self, columns, predicate, derived=()):
+        """Rows matching a partitions.Predicate, with `columns` plus `derived` overlays.
+
+        When the columns involved are already resident the frame is filtered
+        in memory. Otherwise, on a partitioned dataset, only the partitions
+        whose statistics can match are read, and nothing is kept in memory;
+        other datasets load the columns and filter them.
+        """
+        columns = [c for c in columns if c in self.schema]
+        needed = list(dict.fromkeys(columns + [c for func in derived for c in func.requires]))
+        # Read for filtering only, dropped from the result
+        extra = [c for c in predicate.columns if c not in needed]
+
+        if self.partitioned is None or all(c in self._columns for c in needed + extra):
+            frame = self.frame(needed + extra, derived=derived)
+            return frame[predicate.mask(frame)].drop(columns=extra).reset_index(drop=True)
+
+        parts = self.partitioned.prune(predicate)
+        metrics.PARTITION_SCANS.inc(len(parts), result="read")
+        metrics.PARTITION_SCANS.inc(len(self.partitioned.partitions) - len(parts), result="pruned")
+        with timed("store.scan", kind="data", partitions=f"{len(parts)}/{len(self.partitioned.partitions)}"):
+            frame = self.partitioned.read(needed, predicate)
+            with self._lock:
+                appended = list(self._appended)
+            if appended:
+                rows = pd.concat([r[needed + extra] for r in appended], ignore_index=True)
+                frame = pd.concat([frame, rows.loc[predicate.mask(rows), needed]], ignore_index=True)
+            for func in derived:
+                overlay = self._overlay(func, frame[func.requires])
+                frame = frame.assign(**{col: overlay[col] for col in overlay.columns})
+        return frame
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide DataStore shared by every session."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DataStore()
+    return _store
+
+
+def use_store(store):
+    """Replace the process-wide DataStore (benchmarks, tools). Returns the previous one."""
+    global _store
+    with _store_lock:
+        previous, _store = _store, store
+    return previous
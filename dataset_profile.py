@@ -0,0 +1,370 @@
+"""Dataset profile: summary statistics computed once and kept current on append.
+
+The profile holds, per column, the dtype, non-null and null counts, the value
+counts of columns with at most MAX_TRACKED distinct values (hence distinct
+counts and top-k), min/max, a HIST_BINS-bin histogram and a t-digest
+(quantiles) of numeric columns, plus the first SAMPLE_ROWS records. Columns
+with more distinct values (IDs, times, amounts) keep sketches instead
+(sketches.py): approximate distinct count, top-k and per-value frequencies.
+The Report and Home pages read it instead of scanning the frame.
+
+It is a KPI-style aggregate of the shared store: computed on first use, then
+merged with the profile of each appended batch (DataStore.append). The profile
+of the dataset file is also saved beside it (<name>.profile.json, or
+_profile.json in a partitioned directory) so that later processes load it
+instead of reading every column, together with its small summary
+(profile_summary.py) for the Home page.
+
+    python dataset_profile.py build                     # profile STV_DATA_PATH, save the sidecar
+    python dataset_profile.py show --data violations    # print the profile
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import profile_summary
+from sketches import CountMinSketch, HyperLogLog, SpaceSaving, TDigest
+
+MAX_TRACKED = 512
+HIST_BINS = 30
+SAMPLE_ROWS = 8
+SIDECAR_VERSION = 3
+
+
+def _scalar(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+# ==================================================
+# PARTIAL STATE
+# ==================================================
+class ColumnProfile:
+    """Statistics of one column.
+
+    Exact value `counts` are kept up to MAX_TRACKED distinct values; past
+    that `counts` is None and `sketches` holds (HyperLogLog, SpaceSaving,
+    CountMinSketch) instead.
+    """
+
+    def __init__(self, dtype, count=0, nulls=0, counts=None, low=None, high=None, hist=None, edges=None,
+                 sketches=None, digest=None):
+        self.dtype = dtype
+        self.count = count
+        self.nulls = nulls
+        self.counts = counts
+        self.low = low
+        self.high = high
+        self.hist = hist
+        self.edges = edges
+        self.sketches = sketches
+        self.digest = digest
+
+    @classmethod
+    def of(cls, series):
+        values = series.dropna()
+        vc = values.value_counts()
+        profile = cls(str(series.dtype), int(values.size), int(series.size - values.size), vc)
+        if len(vc) > MAX_TRACKED:
+            profile.counts, profile.sketches = None, _sketch(vc)
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series) and values.size:
+            data = values.to_numpy(dtype="float64")
+            profile.low, profile.high = _scalar(values.min()), _scalar(values.max())
+            hist, edges = np.histogram(data, bins=HIST_BINS)
+            profile.hist, profile.edges = hist.astype("int64"), edges
+            profile.digest = TDigest.of(data)
+        return profile
+
+    @property
+    def exact(self):
+        """Whether counts (and distinct, top-k, frequencies) are exact."""
+        return self.counts is not None
+
+    @property
+    def distinct(self):
+        """Distinct non-null values (estimated past MAX_TRACKED)."""
+        if self.counts is None:
+            return int(round(self.sketches[0].estimate()))
+        return int((self.counts > 0).sum())
+
+    def _sketches(self):
+        return self.sketches if self.counts is None else _sketch(self.counts)
+
+    def merge(self, other):
+        counts, sketches = None, None
+        if self.counts is not None and other.counts is not None:
+            counts = self.counts.add(other.counts, fill_value=0).astype("int64")
+            if len(counts) > MAX_TRACKED:
+                counts, sketches = None, _sketch(counts)
+        else:
+            sketches = tuple(a.merge(b) for a, b in zip(self._sketches(), other._sketches()))
+        lows = [v for v in (self.low, other.low) if v is not None]
+        highs = [v for v in (self.high, other.high) if v is not None]
+        hist, edges = self.hist, self.edges
+        if hist is None:
+            hist, edges = other.hist, other.edges
+        elif other.hist is not None:
+            # Bins stay those of the first profile; other counts move to the
+            # bin holding their bin's centre (values past the ends go to the end bins)
+            centres = np.clip((other.edges[:-1] + other.edges[1:]) / 2, edges[0], edges[-1])
+            moved, _ = np.histogram(centres, bins=edges, weights=other.hist)
+            hist = hist + moved.astype("int64")
+        digest = self.digest
+        if digest is None or other.digest is None:
+            digest = digest or other.digest
+        else:
+            digest = digest.merge(other.digest)
+        return ColumnProfile(
+            self.dtype, self.count + other.count, self.nulls + other.nulls, counts,
+            min(lows) if lows else None, max(highs) if highs else None, hist, edges, sketches, digest,
+        )
+
+    def to_dict(self):
+        return {
+            "dtype": self.dtype, "count": self.count, "nulls": self.nulls,
+            "counts": None if self.counts is None else [[_scalar(k), int(v)] for k, v in self.counts.items()],
+            "low": self.low, "high": self.high,
+            "hist": None if self.hist is None else self.hist.tolist(),
+            "edges": None if self.edges is None else self.edges.tolist(),
+            "sketches": None if self.sketches is None else [sketch.to_dict() for sketch in self.sketches],
+            "digest": None if self.digest is None else self.digest.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        counts = data["counts"]
+        if counts is not None:
+            counts = pd.Series([v for _, v in counts], index=[k for k, _ in counts], dtype="int64")
+        return cls(
+            data["dtype"], data["count"], data["nulls"], counts, data["low"], data["high"],
+            None if data["hist"] is None else np.asarray(data["hist"], dtype="int64"),
+            None if data["edges"] is None else np.asarray(data["edges"], dtype="float64"),
+            None if data["sketches"] is None else tuple(
+                kind.from_dict(sketch) for kind, sketch in zip(SKETCHES, data["sketches"])
+            ),
+            None if data["digest"] is None else TDigest.from_dict(data["digest"]),
+        )
+
+
+SKETCHES = (HyperLogLog, SpaceSaving, CountMinSketch)
+
+
+def _sketch(counts):
+    """Sketches of a column from its exact value counts."""
+    hll = HyperLogLog()
+    hll.add(counts.index.to_series())
+    return hll, SpaceSaving.from_counts(counts), CountMinSketch().add_counts(counts)
+
+
+class DatasetProfile:
+    """Mergeable profile of a dataset (or of a slice of it)."""
+
+    def __init__(self, rows=0, columns=None, sample=None):
+        self.rows = rows
+        self.columns = columns or {}
+        self.sample = sample if sample is not None else pd.DataFrame(columns=list(self.columns))
+
+    def merge(self, other):
+        columns = dict(self.columns)
+        for name, col in other.columns.items():
+            columns[name] = columns[name].merge(col) if name in columns else col
+        # Appended rows come after the existing ones, so the first rows stay first
+        sample = self.sample
+        if len(sample) < SAMPLE_ROWS:
+            sample = pd.concat([sample, other.sample], ignore_index=True).head(SAMPLE_ROWS)
+        return DatasetProfile(self.rows + other.rows, columns, sample)
+
+    # ---------------- READING ----------------
+    @property
+    def column_names(self):
+        return list(self.columns)
+
+    @property
+    def dtypes(self):
+        return pd.Series({name: col.dtype for name, col in self.columns.items()})
+
+    @property
+    def nulls(self):
+        """Missing values across all columns."""
+        return sum(col.nulls for col in self.columns.values())
+
+    def counts(self, column):
+        """Same as df[column].value_counts(), or None when the column has too many values."""
+        col = self.columns.get(column)
+        if col is None or col.counts is None:
+            return None
+        return col.counts.sort_values(ascending=False, kind="stable").rename("count").rename_axis(column)
+
+    def top(self, column, n):
+        """Same as df[column].value_counts().head(n); approximate for sketched columns."""
+        col = self.columns.get(column)
+        if col is not None and col.counts is None:
+            return col.sketches[1].top(n).rename_axis(column)
+        counts = self.counts(column)
+        return None if counts is None else counts.head(n)
+
+    def frequency(self, column, value):
+        """Rows where `column` equals `value` (an upper bound for sketched columns)."""
+        col = self.columns[column]
+        if col.counts is None:
+            return col.sketches[2].estimate(value)
+        return int(col.counts.get(value, 0))
+
+    def quantile(self, column, q):
+        """Same as df[column].quantile(q) for a numeric column (exact up to 200 distinct values)."""
+        col = self.columns.get(column)
+        return None if col is None or col.digest is None else col.digest.quantile(q)
+
+    def histogram(self, column):
+        """(counts, bin edges) of a numeric column, or None."""
+        col = self.columns.get(column)
+        return None if col is None or col.hist is None else (col.hist, col.edges)
+
+    # ---------------- SAVING ----------------
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "columns": {name: col.to_dict() for name, col in self.columns.items()},
+            "sample": json.loads(self.sample.to_json(orient="records", date_format="iso")),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        columns = {name: ColumnProfile.from_dict(col) for name, col in data["columns"].items()}
+        return cls(data["rows"], columns, pd.DataFrame.from_records(data["sample"], columns=list(columns)))
+
+
+# ==================================================
+# ENGINE (DataStore.aggregate)
+# ==================================================
+class ProfileEngine:
+    """Computes the profile of `columns`; a store aggregate like a KPIEngine."""
+
+    name = "profile"
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+
+    def accumulate(self, df):
+        return DatasetProfile(
+            len(df),
+            {name: ColumnProfile.of(df[name]) for name in self.columns},
+            df[self.columns].head(SAMPLE_ROWS).reset_index(drop=True),
+        )
+
+    def load_saved(self, store):
+        """Profile of the dataset file from its sidecar, or None when missing or stale."""
+        if not sidecar_ready(store):
+            return None
+        try:
+            with open(sidecar_path(store), encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get("version") != SIDECAR_VERSION:
+            return None
+        if saved["profile"]["columns"].keys() != set(self.columns):
+            return None
+        return DatasetProfile.from_dict(saved["profile"])
+
+
+_engines = {}
+
+
+def engine_for(store):
+    """The store's profile engine (one per schema, so its aggregate is cached)."""
+    key = tuple(store.schema)
+    return _engines.setdefault(key, ProfileEngine(key))
+
+
+def profile_frame(df):
+    """Profile of a DataFrame (e.g. one state's rows), computed directly."""
+    return ProfileEngine(df.columns).accumulate(df)
+
+
+# ==================================================
+# SIDECAR
+# ==================================================
+def sidecar_path(store):
+    if store.partitioned is not None:
+        return os.path.join(store.path, "_profile.json")
+    return os.path.splitext(store.path)[0] + ".profile.json"
+
+
+def sidecar_ready(store):
+    """Whether a sidecar newer than the dataset exists."""
+    path = sidecar_path(store)
+    source = store.path.rstrip("/\\")
+    return os.path.exists(path) and os.path.exists(source) and os.path.getmtime(path) >= os.path.getmtime(source)
+
+
+def save(store, profile):
+    """Write the sidecar and the summary; skipped (False) on read-only deployments."""
+    path = sidecar_path(store)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": SIDECAR_VERSION, "profile": profile.to_dict()}, f)
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return profile_summary.write(store.path, profile_summary.summarize(profile))
+
+
+def get_profile(store=None, compute=True):
+    """Profile of the shared store, including appended rows.
+
+    With compute=False it returns None rather than reading the dataset when
+    the profile is neither cached nor saved.
+    """
+    from data_store import get_store
+
+    store = store or get_store()
+    engine = engine_for(store)
+    if store.has_aggregate(engine):
+        return store.aggregate(engine)
+    saved = sidecar_ready(store)
+    if not compute and not saved:
+        return None
+    profile = store.aggregate(engine)
+    if not saved and store.version == 0:
+        save(store, profile)
+    elif store.version == 0 and not profile_summary.ready(store.path):
+        # Sidecars written before the summary existed
+        profile_summary.write(store.path, profile_summary.summarize(profile))
+    return profile
+
+
+# ==================================================
+# CLI
+# ==================================================
+def main(argv=None):
+    from data_store import DATA_PATH, DataStore
+
+    parser = argparse.ArgumentParser(description="Build or show the dataset profile")
+    parser.add_argument("command", choices=["build", "show"])
+    parser.add_argument("--data", default=DATA_PATH, help="dataset CSV or partitioned directory")
+    args = parser.parse_args(argv)
+
+    store = DataStore(args.data)
+    if args.command == "build":
+        engine = engine_for(store)
+        profile = engine.accumulate(store.frame(engine.columns))
+        saved = save(store, profile)
+        print(f"{'✓' if saved else '✗ could not write'} {sidecar_path(store)}: {profile.rows:,} rows")
+        return 0 if saved else 1
+
+    profile = get_profile(store)
+    print(f"{profile.rows:,} rows, {len(profile.columns)} columns, {profile.nulls:,} missing values")
+    for name, col in profile.columns.items():
+        distinct = f"{col.distinct:,}" if col.exact else f"~{col.distinct:,}"
+        span = f"  {col.low} .. {col.high}, median {col.digest.quantile(0.5):g}" if col.digest else ""
+        print(f"  {name:<28} {col.dtype:<8} nulls {col.nulls:>8,}  distinct {distinct:>6}{span}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""Per-officer and per-agency enforcement aggregates, indexed for top-N and drill-down.
+
+EnforcementEngine is a DataStore aggregate. Its state keeps three Tallies,
+per officer, per agency and per (agency, officer) pair, each a row per key
+with the violations issued, fines issued, fines paid (count and amount) and
+the hour-of-day profile of the issue times. A Tally finds a key's row with
+one dict probe and keeps the ranking of its rows by each measure once asked
+for, so a top-N query is a slice and an officer lookup is O(1) even with
+hundreds of thousands of officers. An agency's officers are the pairs of that
+agency, ranked the same way.
+
+The state is built once per dataset and merged with each appended batch into
+a new state, which DataStore.append publishes in its final swap.
+
+    python enforcement.py --top 10 --by fines
+    python enforcement.py --agency "Highway Patrol" --top 5
+    python enforcement.py --officer OFF1042
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HOURS = list(range(24))
+COUNT_COLUMNS = ["Violations", "Fines", "Paid", "Paid_Amount"]
+# Columns of a Tally's value matrix
+FIELDS = COUNT_COLUMNS + HOURS
+VIOLATIONS, FINES, PAID, PAID_AMOUNT = range(4)
+# Measures rows can be ranked by
+MEASURES = {
+    "violations": "Violations",
+    "fines": "Fines",
+    "payment_rate": "Payment_Rate",
+    "collection_rate": "Collection_Rate",
+    "avg_fine": "Avg_Fine",
+}
+# Rates of officers with fewer violations than this are too noisy to rank
+MIN_RANKED_VIOLATIONS = 3
+
+
+def _measure(values, measure):
+    """`measure` of each row of a value matrix; NaN for rates of rows below MIN_RANKED_VIOLATIONS."""
+    violations = values[:, VIOLATIONS]
+    if measure == "violations":
+        return violations
+    if measure == "fines":
+        return values[:, FINES]
+    numerator, denominator = {
+        "payment_rate": (PAID, VIOLATIONS),
+        "collection_rate": (PAID_AMOUNT, FINES),
+        "avg_fine": (FINES, VIOLATIONS),
+    }[measure]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = values[:, numerator] / values[:, denominator]
+    return np.where((violations >= MIN_RANKED_VIOLATIONS) & (values[:, denominator] > 0), rate, np.nan)
+
+
+def _frame(index, values):
+    """Value-matrix rows as a DataFrame: counts, rates and the hourly profile."""
+    frame = pd.DataFrame(values, index=index, columns=FIELDS)
+    counts = {col: "int64" for col in FIELDS if col not in ("Fines", "Paid_Amount")}
+    frame = frame.astype(counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = pd.DataFrame({
+            "Payment_Rate": values[:, PAID] / values[:, VIOLATIONS],
+            "Collection_Rate": values[:, PAID_AMOUNT] / values[:, FINES],
+            "Avg_Fine": values[:, FINES] / values[:, VIOLATIONS],
+        }, index=index)
+    return pd.concat([frame[COUNT_COLUMNS], rates, frame[HOURS]], axis=1)
+
+
+class Tally:
+    """Rows of FIELDS keyed by an ID, grown and added to in place.
+
+    Rankings are cached per measure until the next add(). add() is only called
+    on tallies nothing else reads yet; EnforcementState.merge() adds to copies.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.keys = []
+        self._rows = {}
+        self._values = np.zeros((0, len(FIELDS)))
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def values(self):
+        return self._values[:len(self.keys)]
+
+    def rows_of(self, keys):
+        """Row of each of `keys`, adding rows for new keys."""
+        rows = np.empty(len(keys), dtype="int64")
+        lookup = self._rows
+        for i, key in enumerate(keys):
+            row = lookup.get(key)
+            if row is None:
+                row = lookup[key] = len(self.keys)
+                self.keys.append(key)
+            rows[i] = row
+        if len(self.keys) > len(self._values):
+            grown = np.zeros((max(2 * len(self._values), len(self.keys), 64), len(FIELDS)))
+            grown[:len(self._values)] = self._values
+            self._values = grown
+        return rows
+
+    def add(self, keys, values):
+        """Add `values` (one FIELDS row per key; keys may repeat) to the rows of `keys`."""
+        rows = self.rows_of(keys)
+        np.add.at(self._values, rows, values)
+        self._orders = {}
+        return rows
+
+    def row(self, key):
+        return self._rows.get(key)
+
+    def copy(self):
+        tally = Tally(self.name)
+        tally.keys, tally._rows, tally._values = list(self.keys), dict(self._rows), self.values.copy()
+        return tally
+
+    # ---------------- QUERIES ----------------
+    def order(self, measure="violations", rows=None):
+        """Rows by `measure`, highest first; rates only for rows with MIN_RANKED_VIOLATIONS or more.
+
+        `rows` restricts the ranking to those rows (not cached).
+        """
+        if rows is None and measure in self._orders:
+            return self._orders[measure]
+        every = rows is None
+        rows = np.arange(len(self.keys)) if every else np.asarray(rows, dtype="int64")
+        values = _measure(self.values[rows], measure)
+        # Stable, so ties keep first-seen order; unranked (NaN) rows are dropped
+        ranked = rows[np.argsort(-np.nan_to_num(values, nan=-np.inf), kind="stable")]
+        ranked = ranked[:np.count_nonzero(~np.isnan(values))]
+        if every:
+            self._orders[measure] = ranked
+        return ranked
+
+    def frame(self, rows=None):
+        """The rows (all when None) as a DataFrame indexed by key."""
+        rows = np.arange(len(self.keys)) if rows is None else np.asarray(rows, dtype="int64")
+        index = pd.Index([self.keys[r] for r in rows], name=self.name, tupleize_cols=False)
+        return _frame(index, self.values[rows])
+
+    def top(self, n=10, measure="violations", rows=None):
+        """DataFrame of the `n` highest rows by `measure` (among `rows` when given)."""
+        return self.frame(self.order(measure, rows)[:n])
+
+    def get(self, key):
+        """The row of `key` as a Series (the columns of frame()), or None."""
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        values = self._values[row]
+        violations, fines, paid, paid_amount = values[:len(COUNT_COLUMNS)]
+        rate = lambda a, b: a / b if b else np.nan
+        record = {
+            "Violations": int(violations), "Fines": fines, "Paid": int(paid), "Paid_Amount": paid_amount,
+            "Payment_Rate": rate(paid, violations), "Collection_Rate": rate(paid_amount, fines),
+            "Avg_Fine": rate(fines, violations),
+        }
+        record.update(zip(HOURS, values[len(COUNT_COLUMNS):].astype("int64").tolist()))
+        return pd.Series(record, name=key, dtype=object)
+
+
+class EnforcementState:
+    """Officer, agency and (agency, officer) tallies.
+
+    merge() returns a new state and leaves this one untouched.
+    """
+
+    def __init__(self):
+        self.officers = Tally("Officer_ID")
+        self.agencies = Tally("Issuing_Agency")
+        self.pairs = Tally("Agency_Officer")
+        # Pair rows of each agency, kept up to date as pairs are added, and
+        # their rankings until the next add()
+        self._agency_rows = {}
+        self._agency_orders = {}
+
+    def add(self, pairs, officers, agencies):
+        """Add (keys, values) to each tally; the three must count the same rows."""
+        known = len(self.pairs)
+        self.pairs.add(*pairs)
+        for row, (agency, _) in enumerate(self.pairs.keys[known:], start=known):
+            self._agency_rows.setdefault(agency, []).append(row)
+        self.officers.add(*officers)
+        self.agencies.add(*agencies)
+        self._agency_orders = {}
+        return self
+
+    def copy(self):
+        state = EnforcementState()
+        state.officers, state.agencies = self.officers.copy(), self.agencies.copy()
+        state.pairs = self.pairs.copy()
+        state._agency_rows = {agency: list(rows) for agency, rows in self._agency_rows.items()}
+        return state
+
+    def merge(self, other):
+        tallies = (other.pairs, other.officers, other.agencies)
+        return self.copy().add(*((tally.keys, tally.values) for tally in tallies))
+
+    @property
+    def rows(self):
+        return int(self.agencies.values[:, VIOLATIONS].sum())
+
+    def agency_officers(self, agency, n=10, measure="violations"):
+        """Top `n` officers by `measure` counting only the violations they issued for `agency`."""
+        order = self._agency_orders.get((agency, measure))
+        if order is None:
+            order = self.pairs.order(measure, rows=self._agency_rows.get(agency, []))
+            self._agency_orders[(agency, measure)] = order
+        top = self.pairs.frame(order[:n])
+        top.index = pd.Index([officer for _, officer in top.index], name="Officer_ID")
+        return top
+
+    def main_agency(self, officers):
+        """The agency each of `officers` issued most violations for."""
+        def issued(agency, officer):
+            row = self.pairs.row((agency, officer))
+            return 0 if row is None else self.pairs.values[row, VIOLATIONS]
+
+        agencies = self.agencies.keys
+        main = [max(agencies, key=lambda agency: issued(agency, officer)) for officer in officers]
+        return pd.Series(main, index=officers, name="Agency", dtype=object)
+
+    def top_officers(self, n=10, measure="violations"):
+        top = self.officers.top(n, measure)
+        return top.assign(Agency=self.main_agency(list(top.index)))
+
+
+class EnforcementEngine:
+    """Per-officer and per-agency enforcement tallies, as a DataStore aggregate."""
+
+    columns = ["Issuing_Agency", "Officer_ID", "Fine_Amount", "Fine_Paid", "Hour"]
+
+    def __init__(self, name="enforcement"):
+        self.name = name
+
+    def accumulate(self, df):
+        """State of `df`'s rows; rows without an agency or officer are not attributed."""
+        agency_codes, agencies = pd.factorize(df["Issuing_Agency"])
+        officer_codes, officers = pd.factorize(df["Officer_ID"])
+        keep = (agency_codes >= 0) & (officer_codes >= 0)
+        agency_codes, officer_codes = agency_codes[keep], officer_codes[keep]
+        pair_codes, pairs = pd.factorize(agency_codes * len(officers) + officer_codes)
+
+        fines = df["Fine_Amount"].to_numpy(dtype=float, na_value=0.0)[keep]
+        paid = (df["Fine_Paid"] == "Yes").to_numpy()[keep]
+        hour = pd.to_numeric(df["Hour"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)[keep]
+        timed = (hour >= 0) & (hour < 24)
+
+        def tally(codes, n):
+            values = np.zeros((n, len(FIELDS)))
+            values[:, VIOLATIONS] = np.bincount(codes, minlength=n)
+            values[:, FINES] = np.bincount(codes, weights=fines, minlength=n)
+            values[:, PAID] = np.bincount(codes, weights=paid, minlength=n)
+            values[:, PAID_AMOUNT] = np.bincount(codes, weights=np.where(paid, fines, 0.0), minlength=n)
+            cells = codes[timed] * 24 + hour[timed].astype("int64")
+            values[:, len(COUNT_COLUMNS):] = np.bincount(cells, minlength=n * 24).reshape(n, 24)
+            return values
+
+        pair_keys = list(zip(agencies[pairs // len(officers)], officers[pairs % len(officers)]))
+        return EnforcementState().add(
+            (pair_keys, tally(pair_codes, len(pairs))),
+            (list(officers), tally(officer_codes, len(officers))),
+            (list(agencies), tally(agency_codes, len(agencies))),
+        )
+
+
+# ==================================================
+# CLI
+# ==================================================
+def main(argv=None):
+    from data_store import DATA_PATH, DataStore
+
+    parser = argparse.ArgumentParser(description="Per-officer and per-agency enforcement figures")
+    parser.add_argument("--data", default=DATA_PATH, help="dataset CSV or partitioned directory")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--by", choices=sorted(MEASURES), default="violations")
+    parser.add_argument("--agency", help="list this agency's officers")
+    parser.add_argument("--officer", help="show one officer")
+    args = parser.parse_args(argv)
+
+    store = DataStore(args.data)
+    start = time.perf_counter()
+    state = store.aggregate(EnforcementEngine())
+    print(f"{state.rows:,} violations, {len(state.officers):,} officers, {len(state.agencies)} agencies "
+          f"({time.perf_counter() - start:.1f}s)\n")
+    shown = COUNT_COLUMNS + ["Payment_Rate", "Avg_Fine"]
+    if args.officer:
+        row = state.officers.get(args.officer)
+        if row is None:
+            print(f"unknown officer {args.officer}")
+            return 1
+        print(row.to_string())
+        return 0
+    if args.agency:
+        print(state.agency_officers(args.agency, args.top, args.by)[shown].to_string())
+        return 0
+    print(state.agencies.top(len(state.agencies), args.by)[shown].to_string())
+    print()
+    print(state.top_officers(args.top, args.by)[["Agency"] + shown].to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
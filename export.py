@@ -0,0 +1,440 @@
+"""Dataset downloads and filtered-subset exports, written to disk in chunks.
+
+Whole dataset (Report page): st.download_button gets a callable, so nothing
+is built until the user clicks. The file is then written chunk by chunk (at
+most CHUNK_ROWS rows of text in memory), optionally compressed, and kept
+under STV_EXPORT_DIR (default: <tmp>/stv-exports) for later clicks until the
+dataset changes.
+
+Filtered subsets (any page): export_button() takes the page's frame, a row
+selection (boolean mask or index labels) and the columns to keep. The rows
+are gathered and written by a background worker, never as a filtered copy
+in the script thread, while the page shows the job's progress:
+
+    export.export_button("payment", global_df, global_df["Payment_Method"].isin(methods),
+                         filters=methods)
+
+Formats:
+
+    csv        plain CSV, as the published dataset
+    csv.gz     gzip-compressed CSV
+    csv.zst    zstd-compressed CSV (needs the zstandard package)
+    parquet    Parquet, one row group per chunk
+    xlsx       Excel, subsets only (needs xlsxwriter or openpyxl); a new
+               sheet every 1,048,575 rows
+
+    python export.py parquet                 # write (or reuse) an export and print its path
+"""
+import argparse
+import glob
+import gzip
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+EXPORT_DIR_ENV = "STV_EXPORT_DIR"
+WORKERS_ENV = "STV_EXPORT_WORKERS"
+CHUNK_ROWS = 100_000
+BASE_NAME = "Indian_Traffic_Violations_Dataset"
+# Finished subset exports are deleted after this many seconds
+JOB_TTL = 3600
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def _importable(*modules):
+    import importlib.util
+
+    return any(importlib.util.find_spec(m) is not None for m in modules)
+
+
+# format -> (label, file extension, mime type)
+FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "csv.gz": ("CSV (gzip)", ".csv.gz", "application/gzip"),
+    "csv.zst": ("CSV (zstd)", ".csv.zst", "application/zstd"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def available_formats(subset=False):
+    """Formats that can be written here; Excel only for subsets."""
+    formats = [fmt for fmt in FORMATS if fmt != "xlsx" or subset]
+    if not _importable("zstandard"):
+        formats.remove("csv.zst")
+    if "xlsx" in formats and not _importable("xlsxwriter", "openpyxl"):
+        formats.remove("xlsx")
+    return formats
+
+
+def file_name(fmt):
+    return BASE_NAME + FORMATS[fmt][1]
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][2]
+
+
+# ==================================================
+# SOURCE CHUNKS
+# ==================================================
+def iter_chunks(store):
+    """The store's rows as DataFrames of at most CHUNK_ROWS rows, in dataset order.
+
+    A partitioned dataset whose columns are not resident is read file by
+    file; otherwise the shared columns are sliced without copying.
+    """
+    if store.partitioned is not None and not all(c in store._columns for c in store.schema):
+        import pandas as pd
+
+        for part in store.partitioned.partitions:
+            for name in part["files"]:
+                frame = pd.read_parquet(os.path.join(store.partitioned.root, part["path"], name))
+                for start in range(0, len(frame), CHUNK_ROWS):
+                    yield frame.iloc[start:start + CHUNK_ROWS]
+        with store._lock:
+            appended = list(store._appended)
+        for rows in appended:
+            yield rows.reset_index(drop=True)
+        return
+
+    frame = store.frame()
+    for start in range(0, len(frame), CHUNK_ROWS):
+        yield frame.iloc[start:start + CHUNK_ROWS]
+
+
+# ==================================================
+# WRITERS
+# ==================================================
+def _open_compressed(path, fmt):
+    if fmt == "csv.gz":
+        # A low level keeps gzip from dominating the export time
+        return gzip.open(path, "wb", compresslevel=5)
+    if fmt == "csv.zst":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=6).stream_writer(open(path, "wb"), closefd=True)
+    return open(path, "wb")
+
+
+def _write_csv(chunks, path, fmt):
+    with _open_compressed(path, fmt) as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(text, index=False, header=i == 0)
+        text.flush()
+        text.detach()
+
+
+def _write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = schema = None
+    try:
+        for chunk in chunks:
+            if schema is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_excel(chunks, path):
+    import pandas as pd
+
+    engine = "xlsxwriter" if _importable("xlsxwriter") else "openpyxl"
+    options = {"options": {"constant_memory": True}} if engine == "xlsxwriter" else {}
+    with pd.ExcelWriter(path, engine=engine, engine_kwargs=options) as writer:
+        sheet, row = 1, 0
+        for chunk in chunks:
+            start = 0
+            while start < len(chunk):
+                if row == EXCEL_MAX_ROWS:
+                    sheet, row = sheet + 1, 0
+                part = chunk.iloc[start:start + EXCEL_MAX_ROWS - row]
+                part.to_excel(writer, sheet_name=f"Data {sheet}", index=False,
+                              header=row == 0, startrow=row + (row > 0))
+                row += len(part)
+                start += len(part)
+
+
+def _write(chunks, path, fmt):
+    if fmt == "parquet":
+        _write_parquet(chunks, path)
+    elif fmt == "xlsx":
+        _write_excel(chunks, path)
+    else:
+        _write_csv(chunks, path, fmt)
+
+
+def write_export(store, fmt, path):
+    """Write the whole dataset held by `store` to `path` in `fmt`."""
+    _write(iter_chunks(store), path, fmt)
+
+
+# ==================================================
+# CACHED EXPORTS
+# ==================================================
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def export_dir():
+    return os.environ.get(EXPORT_DIR_ENV) or os.path.join(tempfile.gettempdir(), "stv-exports")
+
+
+def export_file(fmt, store=None):
+    """Path of the dataset exported as `fmt`, written on first request per dataset version."""
+    from data_store import get_store
+    from instrumentation import timed
+
+    store = store or get_store()
+    directory = export_dir()
+    tag = store.tag
+    path = os.path.join(directory, f"{tag}{FORMATS[fmt][1]}")
+    if os.path.exists(path):
+        return path
+
+    with _locks_lock:
+        lock = _locks.setdefault(path, threading.Lock())
+    # Sessions clicking at the same time wait for one writer
+    with lock:
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with timed(f"export: {fmt}", kind="data"):
+                write_export(store, fmt, tmp)
+            os.replace(tmp, path)
+            _remove_stale(directory, tag)
+    return path
+
+
+def _remove_stale(directory, tag):
+    """Drop exports of earlier dataset versions."""
+    prefix = tag.rsplit("-v", 1)[0]
+    for old in glob.glob(os.path.join(directory, f"{prefix}-v*")):
+        if not os.path.basename(old).startswith(f"{tag}.") and not old.endswith(".tmp"):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def read_file(path):
+    """Bytes of `path`, closing the file (st.download_button keeps no handle open)."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def export_bytes(fmt):
+    """Bytes of the export, for st.download_button's data callable."""
+    return read_file(export_file(fmt))
+
+
+# ==================================================
+# SUBSET EXPORT JOBS
+# ==================================================
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportJob:
+    """One subset export running (or finished) in the worker pool."""
+
+    def __init__(self, fmt, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.fmt = fmt
+        self.file_name = name + FORMATS[fmt][1]
+        self.path = os.path.join(export_dir(), "jobs", f"{self.id}{FORMATS[fmt][1]}")
+        self.status = "queued"
+        self.rows = None
+        self.done = 0
+        self.error = None
+        self.created = time.time()
+        self.seconds = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def progress(self):
+        if self.status == "done":
+            return 1.0
+        return self.done / self.rows if self.rows else 0.0
+
+    def cancel(self):
+        self._cancel.set()
+
+
+def _positions(source, rows):
+    """Row positions in `source` for a selection: None (all), a boolean mask or index labels."""
+    import numpy as np
+    import pandas as pd
+
+    if rows is None:
+        return np.arange(len(source))
+    if isinstance(rows, pd.Series) and rows.dtype == bool:
+        # A mask computed on the same frame aligns as is
+        mask = rows if rows.index.equals(source.index) else rows.reindex(source.index, fill_value=False)
+        return np.flatnonzero(mask.to_numpy())
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        return np.flatnonzero(rows)
+    positions = source.index.get_indexer(rows)
+    return positions[positions >= 0]
+
+
+def _selected_chunks(job, source, rows, columns):
+    positions = _positions(source, rows)
+    job.rows = len(positions)
+    cols = [source.columns.get_loc(c) for c in columns] if columns is not None else slice(None)
+    for start in range(0, len(positions), CHUNK_ROWS):
+        if job._cancel.is_set():
+            raise ExportCancelled()
+        chunk = source.iloc[positions[start:start + CHUNK_ROWS], cols]
+        yield chunk
+        job.done += len(chunk)
+    if not len(positions):
+        # Still write the header
+        yield source.iloc[:0, cols]
+
+
+def _run(job, source, rows, columns):
+    from instrumentation import timed
+
+    job.status = "running"
+    start = time.perf_counter()
+    tmp = f"{job.path}.tmp"
+    try:
+        with timed(f"export subset: {job.fmt}", kind="data"):
+            _write(_selected_chunks(job, source, rows, columns), tmp, job.fmt)
+        os.replace(tmp, job.path)
+        job.status = "done"
+    except ExportCancelled:
+        job.status = "cancelled"
+    except Exception as exc:
+        job.status, job.error = "failed", f"{type(exc).__name__}: {exc}"
+    finally:
+        job.seconds = time.perf_counter() - start
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_pool = None
+
+
+def _executor():
+    global _pool
+    with _jobs_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(int(os.environ.get(WORKERS_ENV, "2")), thread_name_prefix="export")
+    return _pool
+
+
+def _expire_jobs():
+    now = time.time()
+    with _jobs_lock:
+        expired = [job for job in _jobs.values() if job.finished and now - job.created > JOB_TTL]
+        for job in expired:
+            del _jobs[job.id]
+    for job in expired:
+        if os.path.exists(job.path):
+            os.remove(job.path)
+
+
+def submit(source, rows=None, columns=None, fmt="csv", name="traffic_violations_export"):
+    """Queue an export of `source`'s selected rows and columns. Returns the ExportJob.
+
+    `source` is not copied: pages' frames are copy-on-write, so later edits
+    on the page do not reach the rows being written.
+    """
+    _expire_jobs()
+    job = ExportJob(fmt, name)
+    os.makedirs(os.path.dirname(job.path), exist_ok=True)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    _executor().submit(_run, job, source, rows, list(columns) if columns is not None else None)
+    return job
+
+
+def get_job(job_id):
+    return _jobs.get(job_id)
+
+
+def export_button(key, source, rows=None, columns=None, filters=(), name=None):
+    """Export controls for a filtered subset: format, prepare, progress, download.
+
+    `filters` describes the current selection (widget values); a change
+    marks an earlier export of this `key` as out of date.
+    """
+    import streamlit as st
+
+    state_key = f"_export_{key}"
+    formats = available_formats(subset=True)
+    c1, c2 = st.columns([2, 3])
+    fmt = c1.selectbox("Export format", formats, format_func=lambda f: FORMATS[f][0], key=f"export_fmt_{key}")
+    signature = (repr(filters), fmt)
+
+    entry = st.session_state.get(state_key)
+    job = get_job(entry["job"]) if entry and entry["signature"] == signature else None
+    if job is None or job.status in ("cancelled", "failed"):
+        if job is not None and job.status == "failed":
+            st.error(f"Export failed: {job.error}")
+        if c2.button("Prepare export", key=f"export_go_{key}"):
+            job = submit(source, rows, columns, fmt, name or f"{key}_export")
+            st.session_state[state_key] = {"job": job.id, "signature": signature}
+        else:
+            return
+
+    if not job.finished:
+        @st.fragment(run_every=1)
+        def progress():
+            if job.finished:
+                # Redraw the page once to swap the progress bar for the download
+                st.rerun()
+            done = f"{job.done:,} of {job.rows:,} rows" if job.rows is not None else "starting"
+            st.progress(job.progress, text=f"Exporting {FORMATS[fmt][0]}: {done}")
+            if st.button("Cancel", key=f"export_cancel_{key}"):
+                job.cancel()
+
+        progress()
+        return
+
+    if job.status == "done":
+        c2.download_button(
+            f"Download {job.rows:,} rows ({FORMATS[fmt][0]})",
+            data=lambda: read_file(job.path),
+            file_name=job.file_name,
+            mime=FORMATS[fmt][2],
+            key=f"export_dl_{key}",
+            on_click="ignore",
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the dataset (reused while it is unchanged)")
+    parser.add_argument("format", choices=list(FORMATS))
+    args = parser.parse_args(argv)
+
+    if args.format not in available_formats():
+        print(f"{args.format} needs the zstandard package", file=sys.stderr)
+        return 1
+    path = export_file(args.format)
+    print(f"✓ {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
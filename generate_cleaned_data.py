@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+import risk_scoring
+
 def preprocess_data(df):
     """Preprocess the dataset with flexible column handling"""
     if df is None or df.empty:
@@ -112,26 +114,8 @@ def preprocess_data(df):
                                          labels=['New (0-5)', 'Moderate (5-10)', 'Old (10-15)', 'Very Old (15+)'],
                                          include_lowest=True)
     
-    # Risk score (composite metric) - only if required columns exist
-    if all(col in df.columns for col in ['Previous_Violations', 'License_Validity', 'Violation_Type', 
-                                         'Speed_Excess', 'Court_Appearance_Required', 'Alcohol_Level']):
-        risk_score = 0
-        if 'Previous_Violations' in df.columns:
-            risk_score += (df['Previous_Violations'] > 3).astype(int) * 3
-        if 'License_Validity' in df.columns:
-            risk_score += (df['License_Validity'] != 'Valid').astype(int) * 2
-        if 'Violation_Type' in df.columns:
-            risk_score += (df['Violation_Type'] == 'Drunk Driving').astype(int) * 4
-        if 'Speed_Excess' in df.columns:
-            risk_score += (df['Speed_Excess'] > 30).astype(int) * 2
-        if 'Court_Appearance_Required' in df.columns:
-            risk_score += (df['Court_Appearance_Required'] == 'Yes').astype(int) * 1
-        if 'Alcohol_Level' in df.columns:
-            risk_score += (df['Alcohol_Level'] > 0.08).astype(int) * 3
-        df['Risk_Score'] = risk_score
-        df['Risk_Category'] = pd.cut(df['Risk_Score'], bins=[-0.5, 2.5, 5.5, 8.5, float('inf')],
-                                    labels=['Low Risk', 'Medium Risk', 'High Risk', 'Very High Risk'],
-                                    include_lowest=True)
+    # Risk score (composite metric) - weighted rules in risk_scoring.py, only if their columns exist
+    df = risk_scoring.apply(df)
     
     # Compliance flags
     if 'Helmet_Worn' in df.columns:
@@ -173,6 +157,47 @@ def preprocess_data(df):
     
     return df
 
+# Time-of-day buckets of the published dataset (hours are right-inclusive)
+DATASET_TIME_OF_DAY_BINS = [-1, 6, 12, 18, 23]
+DATASET_TIME_OF_DAY_LABELS = ['Night (0-6)', 'Morning (6-12)', 'Afternoon (12-18)', 'Evening (18-24)']
+
+
+def conform_to_dataset(df, reference_year=None):
+    """Bring preprocess_data output in line with Indian_Traffic_Violations_Dataset.csv.
+
+    The published file uses 6-hour Time_of_Day buckets, stores Date as text and
+    has plain (non-categorical) label columns. `reference_year` fixes the year
+    Vehicle_Age is measured from, so data cleaned in chunks stays consistent.
+    """
+    df = df.copy()
+
+    if 'Hour' in df.columns:
+        df['Hour'] = df['Hour'].astype('int64')
+        df['Time_of_Day'] = pd.cut(df['Hour'], bins=DATASET_TIME_OF_DAY_BINS,
+                                   labels=DATASET_TIME_OF_DAY_LABELS)
+
+    if reference_year is not None and 'Vehicle_Model_Year' in df.columns:
+        df['Vehicle_Age'] = reference_year - df['Vehicle_Model_Year']
+        df['Vehicle_Age_Group'] = pd.cut(df['Vehicle_Age'], bins=[0, 5, 10, 15, float('inf')],
+                                         labels=['New (0-5)', 'Moderate (5-10)', 'Old (10-15)', 'Very Old (15+)'],
+                                         include_lowest=True)
+
+    if 'Date' in df.columns and pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        elif pd.api.types.is_integer_dtype(df[col]) and df[col].dtype != 'int64':
+            df[col] = df[col].astype('int64')
+
+    # Compliance "N/A" is read back as missing from the published CSV
+    for col in ['Helmet_Compliance', 'Seatbelt_Compliance']:
+        if col in df.columns:
+            df[col] = df[col].replace('N/A', np.nan)
+
+    return df
+
 def generate_cleaned_dataset():
     """
     Load raw dataset, preprocess it, and save as cleaned CSV.
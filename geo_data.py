@@ -0,0 +1,85 @@
+import copy
+import json
+import os
+import threading
+
+import metrics
+
+WORLD_GEOJSON = "world.geojson"
+INDIA_GEOJSON = "india_states.geojson"
+# Used only when the bundled world.geojson is missing
+WORLD_GEOJSON_URL = "https://raw.githubusercontent.com/holtzy/D3-graph-gallery/master/DATA/world.geojson"
+
+_cache = {}
+# Reentrant: combined and derived entries build on the cached files
+_lock = threading.RLock()
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_world():
+    if os.path.exists(WORLD_GEOJSON):
+        return _read_json(WORLD_GEOJSON)
+    import requests
+    return requests.get(WORLD_GEOJSON_URL, timeout=30).json()
+
+
+def _load_india():
+    try:
+        return _read_json(INDIA_GEOJSON)
+    except (OSError, ValueError):
+        return None
+
+
+def _cached(key, build):
+    metrics.cache_lookup("geojson", hit=key in _cache)
+    if key not in _cache:
+        with _lock:
+            if key not in _cache:
+                _cache[key] = build()
+    return _cache[key]
+
+
+def load_geojsons():
+    """(world, india) GeoJSON dicts, parsed once per process.
+
+    The dicts are shared by every session and must not be modified; india is
+    None when india_states.geojson is not available.
+    """
+    return _cached("world", _load_world), _cached("india", _load_india)
+
+
+def combined_geojson():
+    """World countries plus Indian districts as one FeatureCollection (shared)."""
+    def build():
+        world, india = load_geojsons()
+        combined = copy.copy(world)
+        combined["features"] = list(world["features"]) + list((india or {}).get("features", []))
+        return combined
+    return _cached("combined", build)
+
+
+def _ring_points(geometry):
+    coords = geometry.get("coordinates", [])
+    polygons = [coords] if geometry.get("type") == "Polygon" else coords
+    for polygon in polygons:
+        for ring in polygon[:1]:  # outer ring only
+            yield from ring
+
+
+def state_centroids():
+    """{state name: (lat, lon)} averaged over the India GeoJSON's district outlines."""
+    def build():
+        _, india = load_geojsons()
+        sums = {}
+        for feature in (india or {}).get("features", []):
+            state = feature["properties"].get("st_nm")
+            lat, lon, n = sums.get(state, (0.0, 0.0, 0))
+            for x, y, *_ in _ring_points(feature.get("geometry") or {}):
+                lat, lon, n = lat + y, lon + x, n + 1
+            sums[state] = (lat, lon, n)
+        return {state: (lat / n, lon / n) for state, (lat, lon, n) in sums.items() if n}
+    return _cached("centroids", build)
@@ -0,0 +1,176 @@
+"""Per-section timings for the pages and the data layer.
+
+    with timed("map: Vehicle Class Hotspots"):
+        ...
+
+    @timed("store.frame", kind="data")
+    def frame(...):
+        ...
+
+Kinds used across the app: "page" (a whole rerun), "section" (a chart or
+expander), "data" (reading columns), "aggregate" (derived columns, KPI
+passes) and "render" (st.pyplot / st.plotly_chart / st.dataframe, timed
+through track_rendering()).
+
+Each timing is logged to the "perf" logger as one JSON object per line. Set
+STV_PERF_LOG to "-" (stderr) or a file path to write them out. Timings taken
+while main.py renders a page are also kept for that rerun and can be shown in
+the sidebar "Performance" panel (add ?perf=1 to the URL, or STV_PERF_PANEL=1).
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ContextDecorator, contextmanager
+
+logger = logging.getLogger("perf")
+
+LOG_ENV = "STV_PERF_LOG"
+PANEL_ENV = "STV_PERF_PANEL"
+
+# Streamlit runs each session's script in its own thread, so the open timers
+# and the rerun being recorded are kept per thread.
+_local = threading.local()
+
+
+class PageRun:
+    """Timings recorded during one rerun of one page."""
+
+    def __init__(self, page):
+        self.page = page
+        self.records = []
+        self.origin = time.perf_counter()
+        # "ok", "stopped" (st.stop()), "rerun" (st.rerun()) or "error"
+        self.outcome = "ok"
+
+    @property
+    def total(self):
+        return sum(r["ms"] for r in self.records if r["kind"] == "page")
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class timed(ContextDecorator):
+    """Time a block or function, log it and add it to the current rerun."""
+
+    def __init__(self, name, kind="section", **fields):
+        self.name = name
+        self.kind = kind
+        self.fields = fields
+
+    def __enter__(self):
+        # Start times live on the thread's stack, not on self, so one instance
+        # (e.g. a decorator) can be entered from several threads at once
+        _stack().append((self.name, time.perf_counter()))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stack = _stack()
+        name, start = stack.pop()
+        record = {
+            "name": name,
+            "kind": self.kind,
+            "ms": round((time.perf_counter() - start) * 1000, 3),
+            "depth": len(stack),
+            "parent": stack[-1][0] if stack else None,
+            **self.fields,
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        run = current_run()
+        if run is not None:
+            record["page"] = run.page
+            record["offset_ms"] = round((start - run.origin) * 1000, 3)
+            run.records.append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"event": "timing", "thread": threading.current_thread().name, **record},
+                                   default=str))
+        return False
+
+
+@contextmanager
+def page_run(page):
+    """Collect the timings of one page rerun (main.py wraps the routing in this)."""
+    run = PageRun(page)
+    previous, _local.run = current_run(), run
+    try:
+        with timed(page, kind="page"):
+            yield run
+    except BaseException as exc:
+        # Streamlit ends a rerun early by raising these through the script
+        run.outcome = {"StopException": "stopped", "RerunException": "rerun"}.get(type(exc).__name__, "error")
+        raise
+    finally:
+        _local.run = previous
+
+
+# ==================================================
+# STREAMLIT HOOKS
+# ==================================================
+RENDER_FUNCTIONS = ("pyplot", "plotly_chart", "dataframe")
+
+
+def _timed_render(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(name, kind="render"):
+            return func(*args, **kwargs)
+    wrapper._timed = True
+    return wrapper
+
+
+def track_rendering():
+    """Time every st.pyplot / st.plotly_chart / st.dataframe call (once per process)."""
+    import streamlit as st
+
+    for name in RENDER_FUNCTIONS:
+        func = getattr(st, name)
+        if not getattr(func, "_timed", False):
+            setattr(st, name, _timed_render(func, f"st.{name}"))
+
+
+def configure_logging():
+    """Write timings as JSON lines to STV_PERF_LOG ("-" for stderr), if set."""
+    target = os.environ.get(LOG_ENV)
+    if not target or logger.handlers:
+        return
+    handler = logging.StreamHandler() if target == "-" else logging.FileHandler(target, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def panel_enabled():
+    import streamlit as st
+
+    return os.environ.get(PANEL_ENV) == "1" or st.query_params.get("perf") == "1"
+
+
+def show_panel(slot, run):
+    """Fill a sidebar placeholder with the timings of `run`."""
+    import pandas as pd
+    import streamlit as st
+
+    # Timers are recorded when they finish; list them in the order they started
+    rows = [
+        {"Section": "\u2003" * r["depth"] + r["name"], "Kind": r["kind"], "ms": r["ms"]}
+        for r in sorted(run.records, key=lambda r: r["offset_ms"])
+    ]
+    with slot.container():
+        with st.expander("⏱️ Performance", expanded=False):
+            st.caption(f"{run.page}: {run.total:,.0f} ms this rerun")
+            # The panel's own table is not part of the page, so skip its timer
+            dataframe = getattr(st.dataframe, "__wrapped__", st.dataframe)
+            dataframe(pd.DataFrame(rows), hide_index=True, width="stretch")
@@ -0,0 +1,188 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+# ==================================================
+# METRIC DECLARATIONS
+# ==================================================
+# Every KPI is declared once as a Metric. The engine groups the metrics by the
+# column they read so that each column is scanned exactly once per evaluation,
+# no matter how many KPIs are derived from it.
+
+# Metric kinds answered from a column's value counts
+COUNT_KINDS = {"top", "top_count", "distinct", "share", "count_of"}
+# Metric kinds answered from a column's numeric totals
+NUMERIC_KINDS = {"sum", "mean", "max"}
+
+
+class Metric:
+    """A single KPI: what to compute (kind) and on which column."""
+
+    def __init__(self, name, kind, column=None, values=()):
+        if kind != "rows" and kind not in COUNT_KINDS | NUMERIC_KINDS:
+            raise ValueError(f"Unknown metric kind: {kind}")
+        if kind != "rows" and column is None:
+            raise ValueError(f"Metric '{name}' needs a column")
+        self.name = name
+        self.kind = kind
+        self.column = column
+        self.values = tuple(values)
+
+    def __repr__(self):
+        return f"Metric({self.name!r}, {self.kind!r}, {self.column!r})"
+
+
+def rows(name):
+    """Number of records."""
+    return Metric(name, "rows")
+
+
+def total(name, column):
+    """Sum of a numeric column."""
+    return Metric(name, "sum", column)
+
+
+def mean(name, column):
+    """Mean of a numeric column (NaN for an empty frame)."""
+    return Metric(name, "mean", column)
+
+
+def maximum(name, column):
+    """Maximum of a numeric column."""
+    return Metric(name, "max", column)
+
+
+def top(name, column):
+    """Most frequent value of a column (same as value_counts().idxmax())."""
+    return Metric(name, "top", column)
+
+
+def top_count(name, column):
+    """Frequency of the most frequent value of a column."""
+    return Metric(name, "top_count", column)
+
+
+def distinct(name, column):
+    """Number of distinct non-null values of a column."""
+    return Metric(name, "distinct", column)
+
+
+def count_of(name, column, values):
+    """Number of records whose column value is in `values`."""
+    return Metric(name, "count_of", column, values)
+
+
+def share(name, column, values):
+    """Percentage of records whose column value is in `values`."""
+    return Metric(name, "share", column, values)
+
+
+# ==================================================
+# PARTIAL STATE
+# ==================================================
+class KPIState:
+    """Mergeable partial aggregates from which every declared KPI is finalized.
+
+    States computed on disjoint slices of a dataset (partitions, streaming
+    batches) can be merged and finalized without touching the rows again.
+    """
+
+    def __init__(self, rows=0, counts=None, sums=None, nonnull=None, maxes=None):
+        self.rows = rows
+        self.counts = counts or {}
+        self.sums = sums or {}
+        self.nonnull = nonnull or {}
+        self.maxes = maxes or {}
+
+    def merge(self, other):
+        counts = dict(self.counts)
+        for col, vc in other.counts.items():
+            counts[col] = counts[col].add(vc, fill_value=0) if col in counts else vc
+        sums = dict(self.sums)
+        nonnull = dict(self.nonnull)
+        maxes = dict(self.maxes)
+        for col in other.sums:
+            sums[col] = sums.get(col, 0) + other.sums[col]
+            nonnull[col] = nonnull.get(col, 0) + other.nonnull[col]
+            maxes[col] = np.nanmax([maxes.get(col, np.nan), other.maxes[col]])
+        return KPIState(self.rows + other.rows, counts, sums, nonnull, maxes)
+
+
+# ==================================================
+# ENGINE
+# ==================================================
+class KPIEngine:
+    """Evaluates a fixed set of metrics in one fused pass over a DataFrame."""
+
+    def __init__(self, metrics, name="KPI"):
+        self.name = name
+        self.metrics = list(metrics)
+        names = [m.name for m in self.metrics]
+        if len(set(names)) != len(names):
+            raise ValueError("Metric names must be unique")
+        self.result_type = namedtuple(f"{name}Result", names)
+
+        self.count_columns = sorted({m.column for m in self.metrics if m.kind in COUNT_KINDS})
+        self.numeric_columns = sorted({m.column for m in self.metrics if m.kind in NUMERIC_KINDS})
+
+    @property
+    def columns(self):
+        """Columns the engine reads."""
+        return sorted(set(self.count_columns) | set(self.numeric_columns))
+
+    def accumulate(self, df):
+        """Scan each referenced column of `df` once and return a KPIState."""
+        counts = {col: df[col].value_counts() for col in self.count_columns}
+
+        sums, nonnull, maxes = {}, {}, {}
+        for col in self.numeric_columns:
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64")
+            valid = values[~np.isnan(values)]
+            sums[col] = float(valid.sum())
+            nonnull[col] = int(valid.size)
+            maxes[col] = float(valid.max()) if valid.size else np.nan
+
+        return KPIState(len(df), counts, sums, nonnull, maxes)
+
+    def finalize(self, state):
+        """Turn a (possibly merged) KPIState into the typed result."""
+        values = {}
+        for metric in self.metrics:
+            values[metric.name] = self._finalize_metric(metric, state)
+        return self.result_type(**values)
+
+    def evaluate(self, df):
+        """Compute every declared metric over `df`."""
+        with timed(f"kpi: {self.name}", kind="aggregate"):
+            return self.finalize(self.accumulate(df))
+
+    @staticmethod
+    def _finalize_metric(metric, state):
+        kind, col = metric.kind, metric.column
+
+        if kind == "rows":
+            return state.rows
+
+        if kind in NUMERIC_KINDS:
+            if kind == "sum":
+                return state.sums[col]
+            if kind == "max":
+                return state.maxes[col]
+            n = state.nonnull[col]
+            return state.sums[col] / n if n else np.nan
+
+        vc = state.counts[col]
+        if kind == "distinct":
+            return int((vc > 0).sum())
+        if kind == "top":
+            return vc.idxmax() if len(vc) else None
+        if kind == "top_count":
+            return int(vc.max()) if len(vc) else 0
+
+        matched = int(vc.reindex(list(metric.values)).fillna(0).sum())
+        if kind == "count_of":
+            return matched
+        return (matched / state.rows) * 100 if state.rows else 0.0
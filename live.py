@@ -0,0 +1,194 @@
+"""Live mode for the Dashboard and Map: sections that follow streamed data.
+
+With live mode switched on (a toggle on the page), each live section runs as
+its own st.fragment, re-run by the browser every STV_LIVE_POLL seconds
+(default 2) without rerunning the rest of the page. A tick only reads the
+version of the section's inputs, an O(1) check. The section's work is redone
+only when that changed; otherwise its computations and rendered figures come
+from memo() / figure_png(), keyed by the input version the section shows.
+
+Sections declare their inputs. A section built only from store aggregates
+declares them with aggregates(...) and recomputes only when an append
+changed one of those states; anything else read through the data store
+depends on data_version(), which streaming.py bumps on every append.
+Sections built from session-only data declare no inputs and never recompute.
+
+Under load the refresh is throttled: a changed input is picked up only after
+the section's refresh interval, which grows with the number of live sections
+being computed in the process at the time and with the section's own cost.
+"""
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+POLL_ENV = "STV_LIVE_POLL"
+MEMO_SIZE = 256
+
+_local = threading.local()
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+# Live sections recomputing right now, across all sessions of the process
+_busy = 0
+_busy_lock = threading.Lock()
+
+
+def poll_seconds():
+    return float(os.environ.get(POLL_ENV, "2"))
+
+
+# ==================================================
+# INPUTS
+# ==================================================
+def data_version():
+    """Appends applied to the shared store (cheap: a counter read)."""
+    from data_store import get_store
+
+    return get_store().version
+
+
+def aggregates(*engines):
+    """Input reading when the store's states of `engines` last changed (O(1) per engine)."""
+    def aggregates_version():
+        from data_store import get_store
+
+        store = get_store()
+        return max(store.aggregate_version(engine) for engine in engines)
+    return aggregates_version
+
+
+# ==================================================
+# MEMOISED WORK (per section and input version)
+# ==================================================
+def memo(key, compute):
+    """compute() once per live section, key and input version, shared by sessions.
+
+    Outside a live section it simply calls compute().
+    """
+    section = getattr(_local, "section", None)
+    if section is None:
+        return compute()
+    full_key = (*section, key)
+    with _memo_lock:
+        if full_key in _memo:
+            _memo.move_to_end(full_key)
+            return _memo[full_key]
+    value = compute()
+    with _memo_lock:
+        _memo[full_key] = value
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return value
+
+
+def figure_png(key, build):
+    """PNG bytes of the matplotlib figure returned by build(), memoised like memo().
+
+    Show the result with st.image; rendering is what makes st.pyplot costly,
+    so unchanged ticks only resend the bytes.
+    """
+    def render():
+        import matplotlib.pyplot as plt
+
+        fig = build()
+        buf = io.BytesIO()
+        # Same output as st.pyplot
+        fig.savefig(buf, format="png", bbox_inches="tight", dpi=200)
+        plt.close(fig)
+        return buf.getvalue()
+    return memo(("png", key), render)
+
+
+def in_section():
+    return getattr(_local, "section", None) is not None
+
+
+def show_figure(key, build):
+    """st.pyplot(build()), served from figure_png() inside a live section."""
+    import streamlit as st
+
+    if in_section():
+        st.image(figure_png(key, build), width="stretch")
+    else:
+        st.pyplot(build())
+
+
+# ==================================================
+# SECTIONS
+# ==================================================
+def toggle(page):
+    """Live mode switch for `page`; returns whether live mode is on."""
+    import streamlit as st
+
+    return st.toggle(
+        "Live updates",
+        key=f"live_{page}",
+        help=f"Refresh the live sections every {poll_seconds():g}s when new violations arrive",
+    )
+
+
+def refresh_interval(cost):
+    """Minimum seconds between two recomputations of a section costing `cost` seconds."""
+    load = _busy / (os.cpu_count() or 1)
+    return max(poll_seconds() * (1 + load), 4 * cost)
+
+
+class _SectionState:
+    def __init__(self):
+        self.token = None
+        self.refreshed = 0.0
+        self.refreshed_at = None
+        self.cost = 0.0
+
+
+def section(name, page, inputs=(data_version,)):
+    """Decorate a function drawing one section; it becomes live when `page`'s live mode is on.
+
+    `inputs` are functions returning the version of what the section reads
+    (data_version, aggregates(...)). The decorated function takes the same
+    arguments; when live mode is off it runs as a plain part of the page.
+    """
+    def wrap(body):
+        def run(*args, **kwargs):
+            import streamlit as st
+
+            if not st.session_state.get(f"live_{page}"):
+                return body(*args, **kwargs)
+
+            def tick():
+                global _busy
+                states = st.session_state.setdefault("_live_sections", {})
+                state = states.setdefault(name, _SectionState())
+                latest = tuple(read() for read in inputs)
+                now = time.monotonic()
+
+                refresh = state.token is None or (
+                    latest != state.token and now - state.refreshed >= refresh_interval(state.cost)
+                )
+                if refresh:
+                    state.token, state.refreshed = latest, now
+                    state.refreshed_at = time.strftime("%H:%M:%S")
+
+                _local.section = (name, state.token)
+                start = time.perf_counter()
+                if refresh:
+                    with _busy_lock:
+                        _busy += 1
+                try:
+                    body(*args, **kwargs)
+                finally:
+                    _local.section = None
+                    if refresh:
+                        with _busy_lock:
+                            _busy -= 1
+                        state.cost = time.perf_counter() - start
+
+                shown = f"data version {state.token[0]}" if state.token else "session data"
+                pending = " · update pending" if latest != state.token else ""
+                st.caption(f"🟢 Live · {shown} · refreshed {state.refreshed_at}{pending}")
+
+            st.fragment(tick, run_every=poll_seconds(), key=f"live:{name}")()
+        return run
+    return wrap
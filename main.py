@@ -1,6 +1,12 @@
+import importlib
+
 import streamlit as st
-import pandas as pd
 from utils import apply_theme
+from startup import PAGES, page_data, start_import_warmup, warmup_enabled
+from instrumentation import configure_logging, page_run, panel_enabled, show_panel, track_rendering
+from metrics import record_rerun, start_exporter
+from profiling import profile_rerun
+from streaming import start_ingest
 
 # ==================================================
 # PAGE CONFIG
@@ -20,15 +26,6 @@ load_global_css()
 if "sidebar_open" not in st.session_state:
     st.session_state.sidebar_open = True
 
-# ==================================================
-# LOAD DATA (ONCE – FAST)
-# ==================================================
-@st.cache_resource
-def load_data():
-    return pd.read_csv("Indian_Traffic_Violations_Dataset.csv")
-
-df = load_data()
-
 # ==================================================
 # THEME & ICONS
 # ==================================================
@@ -55,21 +52,9 @@ except:
 # SIDEBAR
 # ==================================================
 with st.sidebar:
-    page = st.radio(
-        "Navigation",
-        [
-            "Home",
-            "Dashboard",
-            "Time Trend Analysis",
-            "Environment Analysis",
-            "Vehicle Analysis",
-            "Driver Behaviour Analysis",
-            "Payment Analysis",
-            "Map Visualisation",
-            "Report",
-            "About"
-        ]
-    )
+    page = st.radio("Navigation", list(PAGES))
+    # Filled with this rerun's section timings once the page has rendered
+    perf_slot = st.empty()
 
     st.markdown("---")
     st.caption("Smart Traffic Violation Pattern Detector")
@@ -92,42 +77,29 @@ if not st.session_state.sidebar_open:
 # ==================================================
 # ROUTING
 # ==================================================
-if page == "Home":
-    from views._1_Home import app
-    app(df)
-
-elif page == "Dashboard":
-    from views._2_Dashboard import app
-    app(df)
-
-elif page == "Time Trend Analysis":
-    from views._3_Time_Trend_Analysis import app
-    app(df)
+# Section timings (logs, sidebar panel) and the metrics exporter
+configure_logging()
+track_rendering()
+start_exporter()
+# Live events from STV_STREAM, if set (once per process)
+start_ingest()
 
-elif page == "Environment Analysis":
-    from views._4_Environment_Analysis import app
-    app(df)
-
-elif page == "Vehicle Analysis":
-    from views._5_Vehicle_Analysis import app
-    app(df)
-
-elif page == "Driver Behaviour Analysis":
-    from views._6_Driver_Behaviour_Analysis import app
-    app(df)
-
-elif page == "Payment Analysis":
-    from views._7_Payment_Analysis import app
-    app(df)
-
-elif page == "Map Visualisation":
-    from views._8_Map_Visualisation import app
-    app(df)
-
-elif page == "Report":
-    from views._9_Report import app
-    app(df)
-
-elif page == "About":
-    from views._10_About import app
-    app(df)
+# Recorded however the rerun ends: reruns cut short by st.stop() or an error count too
+try:
+    with page_run(page) as run, profile_rerun(page):
+        view = importlib.import_module(PAGES[page])
+        view.app(page_data(view))
+finally:
+    record_rerun(page, run.total / 1000, run.outcome)
+
+if panel_enabled():
+    show_panel(perf_slot, run)
+
+# Optionally import the remaining heavy libraries now that the page is up
+if warmup_enabled():
+    start_import_warmup()
+
+# Warm the shared data, aggregate and geometry caches for every page (once per process)
+from warmup import start_background_warmup, warmup_on_start
+if warmup_on_start():
+    start_background_warmup()
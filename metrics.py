@@ -0,0 +1,333 @@
+"""Prometheus-style metrics for the dashboard server.
+
+The metrics live in this process and are exposed in the Prometheus text
+format, either over HTTP or as a file for node_exporter's textfile collector.
+main.py starts the exporter on the first script run (once per process):
+
+    STV_METRICS_PORT=9464 streamlit run main.py          # http://localhost:9464/metrics
+    STV_METRICS_TEXTFILE=/var/lib/node_exporter/stv.prom streamlit run main.py
+
+Hooks feed it from main.py (reruns per page and their latency), the data
+store (cache hits, rows loaded, bytes held, partitions pruned) and
+geo_data (GeoJSON cache hits). Open matplotlib figures and the process'
+resident memory are read at scrape time.
+
+Scrape stub for local testing:
+
+    python metrics.py                                    # scrape localhost:9464 and print samples
+    python metrics.py --url http://host:9464/metrics
+"""
+import argparse
+import bisect
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT_ENV = "STV_METRICS_PORT"
+TEXTFILE_ENV = "STV_METRICS_TEXTFILE"
+TEXTFILE_INTERVAL = 15
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ==================================================
+# METRIC TYPES
+# ==================================================
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. reruns per page."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        lines = self._header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; `func` makes it read at scrape time instead."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), func=None):
+        super().__init__(name, documentation, labelnames)
+        self.func = func
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(self.labelnames, labels)] = value
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels))
+
+    def samples(self):
+        values = self._values
+        if self.func is not None:
+            try:
+                values = {(): self.func()}
+            except Exception:
+                # A failing reader must not break the whole scrape
+                values = {}
+        lines = self._header()
+        for key, value in sorted(values.items()):
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, e.g. rerun latency in seconds."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        lines = self._header()
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = (("le", _format_value(float(bound))),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ==================================================
+# APP METRICS
+# ==================================================
+def _open_figures():
+    # Only count when pyplot is in use; importing it here would cost seconds
+    plt = sys.modules.get("matplotlib.pyplot")
+    return len(plt.get_fignums()) if plt is not None else 0
+
+
+def _resident_bytes():
+    with open("/proc/self/statm", encoding="ascii") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+RERUNS = REGISTRY.register(Counter(
+    "stv_reruns", "Script reruns per page and outcome (ok, stopped, rerun or error).", ["page", "outcome"]))
+RERUN_SECONDS = REGISTRY.register(Histogram(
+    "stv_rerun_seconds", "Time to render a page, routing included.", ["page"]))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "stv_cache_requests", "Lookups in the shared caches by result (hit or miss).", ["cache", "result"]))
+DATASET_ROWS = REGISTRY.register(Gauge(
+    "stv_dataset_rows", "Rows of the dataset held by the shared store."))
+STORE_BYTES = REGISTRY.register(Gauge(
+    "stv_store_bytes", "Bytes held by the shared store (loaded columns, derived overlays).", ["part"]))
+DATASET_VERSION = REGISTRY.register(Gauge(
+    "stv_dataset_version", "Appends applied to the shared store since start."))
+INGESTED_ROWS = REGISTRY.register(Counter(
+    "stv_ingested_rows", "Streamed rows by outcome (appended, or dropped by cleaning).", ["outcome"]))
+INGEST_BATCH_SECONDS = REGISTRY.register(Histogram(
+    "stv_ingest_batch_seconds", "Time to clean and append one streamed micro-batch.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)))
+PARTITION_SCANS = REGISTRY.register(Counter(
+    "stv_partition_scans", "Partitions considered by filtered reads, by result (read or pruned).", ["result"]))
+LOADED_COLUMNS = REGISTRY.register(Gauge(
+    "stv_store_loaded_columns", "Dataset columns resident in memory."))
+OPEN_FIGURES = REGISTRY.register(Gauge(
+    "stv_open_figures", "Open matplotlib figures (pyplot), i.e. figures not yet closed.", func=_open_figures))
+RESIDENT_BYTES = REGISTRY.register(Gauge(
+    "stv_process_resident_bytes", "Resident memory of the server process.", func=_resident_bytes))
+
+
+def cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_rerun(page, seconds, outcome="ok"):
+    RERUNS.inc(page=page, outcome=outcome)
+    RERUN_SECONDS.observe(seconds, page=page)
+
+
+# ==================================================
+# EXPORTERS
+# ==================================================
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, addr="127.0.0.1"):
+    """Serve /metrics from a daemon thread. Returns the server."""
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_textfile(path):
+    """Write the metrics for the textfile collector (atomically, via rename)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp, path)
+
+
+def _textfile_loop(path, interval):
+    while True:
+        try:
+            write_textfile(path)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_exporter():
+    """Start the exporters configured by STV_METRICS_PORT / STV_METRICS_TEXTFILE, once per process."""
+    global _started
+    if _started:
+        return
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+        port = os.environ.get(PORT_ENV)
+        if port:
+            try:
+                start_http_server(int(port), os.environ.get("STV_METRICS_ADDR", "127.0.0.1"))
+            except OSError:
+                # Another server process already holds the port
+                pass
+        path = os.environ.get(TEXTFILE_ENV)
+        if path:
+            threading.Thread(
+                target=_textfile_loop, args=(path, TEXTFILE_INTERVAL), name="metrics-textfile", daemon=True
+            ).start()
+
+
+# ==================================================
+# SCRAPE STUB
+# ==================================================
+def parse(text):
+    """{(sample name, labels): value} from the text format (enough for local checks)."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        series, value = line.rsplit(" ", 1)
+        name, _, labels = series.partition("{")
+        labels = tuple(
+            tuple(pair.split("=", 1)) for pair in labels.rstrip("}").split(",") if pair
+        )
+        samples[(name, tuple((k, v.strip('"')) for k, v in labels))] = float(value)
+    return samples
+
+
+def scrape(url="http://127.0.0.1:9464/metrics", timeout=5):
+    from urllib.request import urlopen
+
+    with urlopen(url, timeout=timeout) as response:
+        return parse(response.read().decode("utf-8"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape the dashboard metrics endpoint once")
+    parser.add_argument("--url", default="http://127.0.0.1:9464/metrics")
+    args = parser.parse_args(argv)
+
+    try:
+        samples = scrape(args.url)
+    except OSError as exc:
+        print(f"scrape of {args.url} failed: {exc}", file=sys.stderr)
+        return 1
+    for (name, labels), value in sorted(samples.items()):
+        label_text = ",".join(f"{k}={v}" for k, v in labels)
+        print(f"{name:<40} {label_text:<50} {value:g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
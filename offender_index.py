@@ -0,0 +1,352 @@
+"""Links violations to the same driver across the history and counts them per driver.
+
+Every violation gets an identity key, a 64-bit hash of the driver's
+registration and licence identifiers (IDENTITY_COLUMNS) when the data has
+them, as synthetic_data.py output does. The published dataset has neither, so
+a stand-in is hashed instead: attributes of the vehicle and driver
+(STAND_IN_COLUMNS) plus the birth year implied by Date and Driver_Age. Rows
+sharing a key are one driver. The stand-in only groups rows that happen to
+share those attributes, which does not link a driver's violations; pages
+check identifies_drivers() before presenting the index as repeat offending.
+
+OffenderIndex assigns driver IDs in order of first appearance and keeps, in
+arrays indexed by ID, each driver's violation count and first/last-seen
+dates, plus the driver ID of every row. Looking a driver up is one dict probe
+(by key) or array read (by ID). As a DataStore aggregate the index is built
+once, read from a saved copy beside the dataset (<name>.offenders.npz) when
+that is newer than the data, and merged with every appended batch into a new
+index, so streamed rows get IDs as they arrive.
+
+    python offender_index.py build                   # index the dataset, save the copy
+    python offender_index.py show --top 20 --data violations/
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Real identifiers, used when the dataset has any of them
+IDENTITY_COLUMNS = ["Registration_Number", "License_Number"]
+# The stand-in identity (with the birth year) when it has none
+STAND_IN_COLUMNS = ["Registration_State", "Vehicle_Type", "Vehicle_Color", "Vehicle_Model_Year",
+                    "Driver_Gender", "License_Type"]
+SAVED_VERSION = 1
+# Dates are days since 1970-01-01; a driver seen only on rows without a date
+# keeps these, so that merging is a plain min/max
+FIRST_UNSET = np.iinfo("int64").max
+LAST_UNSET = np.iinfo("int64").min
+
+
+def key_columns(schema):
+    """Columns the identity keys of a dataset with `schema` are hashed from."""
+    real = [col for col in IDENTITY_COLUMNS if col in schema]
+    if real:
+        return real
+    return [col for col in STAND_IN_COLUMNS if col in schema] + ["Driver_Age"]
+
+
+def identifies_drivers(schema):
+    """Whether a dataset with `schema` has real driver identifiers to link rows by."""
+    return any(col in schema for col in IDENTITY_COLUMNS)
+
+
+def identity_keys(df, columns):
+    """uint64 identity key of every row of `df`."""
+    parts = df[[col for col in columns if col != "Driver_Age"]]
+    if "Driver_Age" in columns:
+        # Age grows over the history; the birth year it implies does not
+        birth = pd.to_datetime(df["Date"], errors="coerce").dt.year - df["Driver_Age"]
+        parts = parts.assign(Birth_Year=birth)
+    # 2012 and 2012.0 hash differently; batches may differ in int/float dtypes
+    parts = parts.apply(lambda col: col.astype("float64") if pd.api.types.is_numeric_dtype(col) else col)
+    return pd.util.hash_pandas_object(parts, index=False).to_numpy(dtype="uint64")
+
+
+def _days(dates):
+    """Days since 1970-01-01 of `dates`; LAST_UNSET (NaT's own value) where missing."""
+    return pd.to_datetime(dates, errors="coerce").to_numpy(dtype="datetime64[D]").astype("int64")
+
+
+def _date(day):
+    return None if day in (FIRST_UNSET, LAST_UNSET) else np.datetime64(int(day), "D").astype(object)
+
+
+# ==================================================
+# THE INDEX
+# ==================================================
+class OffenderIndex:
+    """Driver IDs and per-driver violation counts and dates; mergeable like a KPIState.
+
+    merge() returns a new index and leaves this one untouched, so that
+    DataStore.append can publish it in its final swap and a failed append
+    keeps serving the old index.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self.size = 0
+        self.keys = np.zeros(0, dtype="uint64")
+        self.counts = np.zeros(0, dtype="int64")
+        self.first_seen = np.zeros(0, dtype="int64")
+        self.last_seen = np.zeros(0, dtype="int64")
+        self._rows = np.zeros(0, dtype="int64")
+        self.rows = 0
+
+    @classmethod
+    def of(cls, keys, days):
+        index = cls()
+        index.add(keys, days)
+        return index
+
+    # ---------------- BUILDING ----------------
+    def _grow(self, drivers, rows):
+        """Room for `drivers` more drivers and `rows` more rows (capacity doubles)."""
+        if self.size + drivers > len(self.keys):
+            capacity = max(2 * len(self.keys), self.size + drivers, 1024)
+            for name, fill in (("keys", 0), ("counts", 0), ("first_seen", FIRST_UNSET), ("last_seen", LAST_UNSET)):
+                old = getattr(self, name)
+                new = np.full(capacity, fill, dtype=old.dtype)
+                new[:self.size] = old[:self.size]
+                setattr(self, name, new)
+        if self.rows + rows > len(self._rows):
+            new = np.zeros(max(2 * len(self._rows), self.rows + rows, 1024), dtype="int64")
+            new[:self.rows] = self._rows[:self.rows]
+            self._rows = new
+
+    def _ids_of(self, unique_keys):
+        """Driver IDs of `unique_keys`, assigning new ones in the order given."""
+        ids = np.empty(len(unique_keys), dtype="int64")
+        lookup = self._ids
+        for i, key in enumerate(unique_keys.tolist()):
+            driver = lookup.get(key)
+            if driver is None:
+                driver = lookup[key] = self.size
+                self.keys[driver] = key
+                self.size += 1
+            ids[i] = driver
+        return ids
+
+    def _record(self, drivers, counts, first, last):
+        # `drivers` are distinct, so plain fancy-index updates are safe
+        self.counts[drivers] += counts
+        self.first_seen[drivers] = np.minimum(self.first_seen[drivers], first)
+        self.last_seen[drivers] = np.maximum(self.last_seen[drivers], last)
+
+    def add(self, keys, days):
+        """Index rows with identity `keys` and dates (`days`, see _days); returns their driver IDs."""
+        codes, unique_keys = pd.factorize(np.asarray(keys, dtype="uint64"), sort=False)
+        self._grow(len(unique_keys), len(codes))
+        drivers = self._ids_of(unique_keys)
+        days = np.asarray(days, dtype="int64")
+        first = np.full(len(unique_keys), FIRST_UNSET)
+        np.minimum.at(first, codes, np.where(days == LAST_UNSET, FIRST_UNSET, days))
+        last = np.full(len(unique_keys), LAST_UNSET)
+        np.maximum.at(last, codes, days)
+        self._record(drivers, np.bincount(codes, minlength=len(unique_keys)), first, last)
+        row_ids = drivers[codes]
+        self._rows[self.rows:self.rows + len(row_ids)] = row_ids
+        self.rows += len(row_ids)
+        return row_ids
+
+    def copy(self, drivers=0, rows=0):
+        """A copy of this index with room for `drivers` more drivers and `rows` more rows."""
+        index = OffenderIndex()
+        index._ids = dict(self._ids)
+        index._grow(self.size + drivers, self.rows + rows)
+        index.size, index.rows = self.size, self.rows
+        for name in ("keys", "counts", "first_seen", "last_seen"):
+            getattr(index, name)[:self.size] = getattr(self, name)[:self.size]
+        index._rows[:self.rows] = self._rows[:self.rows]
+        return index
+
+    def merge(self, other):
+        """A new index with `other`'s rows after this index's rows."""
+        index = self.copy(other.size, other.rows)
+        drivers = index._ids_of(other.keys[:other.size])
+        index._record(drivers, other.counts[:other.size], other.first_seen[:other.size], other.last_seen[:other.size])
+        index._rows[index.rows:index.rows + other.rows] = drivers[other.row_ids()]
+        index.rows += other.rows
+        return index
+
+    # ---------------- QUERIES ----------------
+    def row_ids(self, n=None):
+        """Driver ID of each indexed row (of the first `n`), in store order."""
+        return self._rows[:self.rows if n is None else min(n, self.rows)]
+
+    def driver_of(self, key):
+        """Driver ID of an identity key, or None."""
+        return self._ids.get(int(key))
+
+    def driver(self, driver_id):
+        """{"violations", "first_seen", "last_seen"} of one driver, or None for an unknown ID."""
+        if not 0 <= driver_id < self.size:
+            return None
+        return {
+            "violations": int(self.counts[driver_id]),
+            "first_seen": _date(self.first_seen[driver_id]),
+            "last_seen": _date(self.last_seen[driver_id]),
+        }
+
+    def violations(self, row_ids=None):
+        """Violation count of the driver of each row (all indexed rows when None)."""
+        return self.counts[self.row_ids() if row_ids is None else row_ids]
+
+    def repeat_offenders(self, minimum=2):
+        """Number of drivers with at least `minimum` violations."""
+        return int((self.counts[:self.size] >= minimum).sum())
+
+    def distribution(self, cap=5):
+        """Drivers by violation count, counts of `cap` and more in the last bucket."""
+        counts = np.bincount(np.minimum(self.counts[:self.size], cap), minlength=cap + 1)[1:]
+        labels = [str(n) for n in range(1, cap)] + [f"{cap}+"]
+        return pd.Series(counts, index=pd.Index(labels, name="Violations"), name="Drivers")
+
+    def top(self, n=10):
+        """The `n` drivers with the most violations: Driver_ID, Violations, First_Seen, Last_Seen."""
+        counts = self.counts[:self.size]
+        n = min(n, self.size)
+        best = np.argpartition(-counts, n - 1)[:n] if n else np.zeros(0, dtype="int64")
+        best = best[np.lexsort((best, -counts[best]))]
+        return pd.DataFrame({
+            "Driver_ID": best,
+            "Violations": counts[best],
+            "First_Seen": [_date(day) for day in self.first_seen[best]],
+            "Last_Seen": [_date(day) for day in self.last_seen[best]],
+        })
+
+    # ---------------- SAVING ----------------
+    def to_arrays(self):
+        return {
+            "keys": self.keys[:self.size], "counts": self.counts[:self.size],
+            "first_seen": self.first_seen[:self.size], "last_seen": self.last_seen[:self.size],
+            "rows": self.row_ids(),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = cls()
+        index.size, index.rows = len(arrays["keys"]), len(arrays["rows"])
+        index.keys = np.array(arrays["keys"], dtype="uint64")
+        index.counts = np.array(arrays["counts"], dtype="int64")
+        index.first_seen = np.array(arrays["first_seen"], dtype="int64")
+        index.last_seen = np.array(arrays["last_seen"], dtype="int64")
+        index._rows = np.array(arrays["rows"], dtype="int64")
+        index._ids = dict(zip(index.keys.tolist(), range(index.size)))
+        return index
+
+
+class OffenderEngine:
+    """Builds the OffenderIndex of a dataset; a store aggregate like a KPIEngine."""
+
+    name = "offender index"
+
+    def __init__(self, key_columns):
+        self.key_columns = list(key_columns)
+
+    @property
+    def columns(self):
+        return list(dict.fromkeys(self.key_columns + ["Date"]))
+
+    def accumulate(self, df):
+        return OffenderIndex.of(identity_keys(df, self.key_columns), _days(df["Date"]))
+
+    def load_saved(self, store):
+        """Index of the dataset file from its saved copy, or None when missing or stale."""
+        if not saved_ready(store):
+            return None
+        try:
+            with np.load(saved_path(store)) as saved:
+                if int(saved["version"]) != SAVED_VERSION or list(saved["columns"]) != self.key_columns:
+                    return None
+                return OffenderIndex.from_arrays(saved)
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+_engines = {}
+
+
+def engine_for(store):
+    """The store's offender engine (one per set of key columns, so its aggregate is cached)."""
+    key = tuple(key_columns(store.schema))
+    return _engines.setdefault(key, OffenderEngine(key))
+
+
+def get_index(store=None):
+    """The OffenderIndex of the store's rows (the served store when None), saved when computed."""
+    from data_store import get_store
+
+    store = store or get_store()
+    engine = engine_for(store)
+    if store.has_aggregate(engine):
+        return store.aggregate(engine)
+    saved = saved_ready(store)
+    index = store.aggregate(engine)
+    if not saved and store.version == 0:
+        save(store, index)
+    return index
+
+
+# ==================================================
+# SAVED COPY
+# ==================================================
+def saved_path(store):
+    if store.partitioned is not None:
+        return os.path.join(store.path, "_offenders.npz")
+    return os.path.splitext(store.path)[0] + ".offenders.npz"
+
+
+def saved_ready(store):
+    """Whether a saved copy newer than the dataset exists."""
+    path = saved_path(store)
+    source = store.path.rstrip("/\\")
+    return os.path.exists(path) and os.path.exists(source) and os.path.getmtime(path) >= os.path.getmtime(source)
+
+
+def save(store, index):
+    """Write the saved copy; skipped (False) on read-only deployments."""
+    path = saved_path(store)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    try:
+        np.savez(tmp, version=SAVED_VERSION, columns=np.array(engine_for(store).key_columns), **index.to_arrays())
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return True
+
+
+# ==================================================
+# CLI
+# ==================================================
+def main(argv=None):
+    from data_store import DATA_PATH, DataStore
+
+    parser = argparse.ArgumentParser(description="Build or inspect the repeat-offender index")
+    parser.add_argument("command", choices=["build", "show"])
+    parser.add_argument("--data", default=DATA_PATH, help="dataset CSV or partitioned directory")
+    parser.add_argument("--top", type=int, default=10, help="drivers to list (show)")
+    args = parser.parse_args(argv)
+
+    store = DataStore(args.data)
+    engine = engine_for(store)
+    start = time.perf_counter()
+    if args.command == "build":
+        index = engine.accumulate(store.frame(engine.columns))
+        saved = save(store, index)
+        print(f"✓ {index.size:,} drivers in {index.rows:,} rows ({time.perf_counter() - start:.1f}s)"
+              + (f", saved to {saved_path(store)}" if saved else ", not saved (read-only)"))
+        return 0
+
+    index = get_index(store)
+    print(f"{index.size:,} drivers in {index.rows:,} rows, keyed on {', '.join(engine.key_columns)}")
+    print(f"{index.repeat_offenders():,} drivers with 2+ violations")
+    print(index.distribution().to_string())
+    print(index.top(args.top).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Headless page-render harness built on Streamlit's testing API.
+
+Each page runs on its own (the same `app(page_data(view))` call main.py
+makes) in an AppTest, without a server or browser. Every rerun records wall
+time, CPU time and the elements produced; one extra rerun is traced for peak
+Python memory. Scenarios replay widget interactions and time each rerun they
+trigger.
+
+    python page_harness.py                          # every page, 3 reruns each
+    python page_harness.py Dashboard "Map Visualisation" --repeat 5
+    python page_harness.py --scenario dashboard-year map-date
+    python page_harness.py --data synthetic/violations_1m.csv --json harness.json
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from startup import PAGES
+
+PAGE_SCRIPT = """
+import importlib
+from startup import page_data
+
+view = importlib.import_module({module!r})
+view.app(page_data(view))
+"""
+
+# Element types that are layout containers rather than rendered output
+CONTAINER_TYPES = {"main", "sidebar", "event", "column", "flex_container", "expander", "tab", "form", "vertical"}
+FIGURE_TYPES = {"image", "plotly_chart", "vega_lite_chart", "arrow_vega_lite_chart", "deck_gl_json_chart", "map", "graphviz_chart", "pyplot"}
+
+
+# ==================================================
+# SCENARIOS
+# ==================================================
+# page -> list of (widget kind, key, value); a callable value gets the widget
+# and returns the value to set, so scenarios adapt to the dataset's range.
+def _first_year(slider):
+    return (slider.min, slider.min)
+
+
+def _first_month(date_input):
+    start = date_input.value[0]
+    return (start, start + datetime.timedelta(days=30))
+
+
+SCENARIOS = {
+    "dashboard-year": ("Dashboard", [("slider", "year_range", _first_year)]),
+    "dashboard-vehicle": ("Dashboard", [("multiselect", "vehicle_filter", ["Car", "Bike"])]),
+    "map-date": ("Map Visualisation", [("date_input", "date_range_key", _first_month)]),
+    "map-age": ("Map Visualisation", [("slider", "age_range_exp3", (30, 40))]),
+}
+
+
+# ==================================================
+# MEASUREMENT
+# ==================================================
+def _walk(node, counts):
+    for child in getattr(node, "children", {}).values():
+        counts[child.type] += 1
+        _walk(child, counts)
+
+
+def element_counts(at):
+    """Rendered elements of the last run by type (layout containers excluded)."""
+    counts = Counter()
+    _walk(at._tree, counts)
+    return {t: n for t, n in sorted(counts.items()) if t not in CONTAINER_TYPES}
+
+
+def _timed_run(at):
+    wall, cpu = time.perf_counter(), time.process_time()
+    at.run()
+    return {
+        "wall": time.perf_counter() - wall,
+        "cpu": time.process_time() - cpu,
+        "exceptions": [str(e.value) for e in at.exception],
+    }
+
+
+def _traced_run(at):
+    """Peak Python heap allocated during one rerun (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        at.run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _apply(at, kind, key, value):
+    widget = getattr(at, kind)(key=key)
+    widget.set_value(value(widget) if callable(value) else value)
+
+
+def run_page(label, repeat=3, actions=(), memory=True, timeout=300):
+    """Render one page `repeat` times, then replay `actions`; return the measurements.
+
+    The first rerun includes column loading and module imports ("cold"); the
+    rest show the steady-state cost of a rerun.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(PAGE_SCRIPT.format(module=PAGES[label]), default_timeout=timeout)
+    reruns = [_timed_run(at) for _ in range(max(repeat, 1))]
+    elements = element_counts(at)
+
+    result = {
+        "page": label,
+        "cold_wall": reruns[0]["wall"],
+        "wall": [r["wall"] for r in reruns],
+        "cpu": [r["cpu"] for r in reruns],
+        "elements": sum(elements.values()),
+        "figures": sum(n for t, n in elements.items() if t in FIGURE_TYPES),
+        "element_types": elements,
+        "exceptions": sorted({e for r in reruns for e in r["exceptions"]}),
+        "interactions": [],
+    }
+    if memory:
+        result["peak_memory"] = _traced_run(at)
+
+    for kind, key, value in actions:
+        try:
+            _apply(at, kind, key, value)
+        except Exception as exc:
+            result["interactions"].append({"widget": f"{kind}:{key}", "error": repr(exc)})
+            continue
+        run = _timed_run(at)
+        counts = element_counts(at)
+        result["interactions"].append({
+            "widget": f"{kind}:{key}",
+            "wall": run["wall"],
+            "cpu": run["cpu"],
+            "figures": sum(n for t, n in counts.items() if t in FIGURE_TYPES),
+            "exceptions": run["exceptions"],
+        })
+    return result
+
+
+def run_harness(pages=None, scenarios=(), repeat=3, memory=True, log=print):
+    results = []
+    for label in pages or []:
+        result = run_page(label, repeat=repeat, memory=memory)
+        results.append(result)
+        log(_format(result))
+    for name in scenarios:
+        label, actions = SCENARIOS[name]
+        result = run_page(label, repeat=1, actions=actions, memory=False)
+        result["scenario"] = name
+        results.append(result)
+        for step in result["interactions"]:
+            if "error" in step:
+                log(f"{name:<28} {step['widget']:<28} ERROR {step['error']}")
+            else:
+                log(f"{name:<28} {step['widget']:<28} wall {step['wall']:7.3f}s  cpu {step['cpu']:7.3f}s  "
+                    f"figures {step['figures']:3d}  exceptions {len(step['exceptions'])}")
+    return results
+
+
+def _format(r):
+    warm = r["wall"][1:] or r["wall"]
+    line = (f"{r['page']:<28} cold {r['cold_wall']:7.3f}s  warm {min(warm):7.3f}s  "
+            f"cpu {min(r['cpu']):7.3f}s  elements {r['elements']:4d}  figures {r['figures']:3d}")
+    if "peak_memory" in r:
+        line += f"  peak {r['peak_memory'] / 1e6:7.1f} MB"
+    if r["exceptions"]:
+        line += f"  exceptions {len(r['exceptions'])}"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time full page reruns headless")
+    parser.add_argument("pages", nargs="*", help="page labels as in the navigation (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="reruns per page")
+    parser.add_argument("--scenario", nargs="+", default=[], choices=sorted(SCENARIOS),
+                        help="widget interaction scenarios to replay")
+    parser.add_argument("--data", help="dataset CSV to use instead of the bundled one")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced rerun")
+    parser.add_argument("--json", help="write the measurements to this file")
+    args = parser.parse_args(argv)
+
+    unknown = [p for p in args.pages if p not in PAGES]
+    if unknown:
+        parser.error(f"unknown pages: {unknown}; choose from {list(PAGES)}")
+    if args.data:
+        from data_store import DataStore, use_store
+        use_store(DataStore(args.data))
+
+    pages = args.pages or ([] if args.scenario else list(PAGES))
+    results = run_harness(pages, args.scenario, args.repeat, not args.no_memory)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+    return 1 if any(r["exceptions"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    # Pages use paths relative to the repository root
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""Dataset partitioned by Year/Month (optionally Location), with pruning reads.
+
+The layout is a directory of Parquet files, one directory per partition:
+
+    violations/
+        _partitions.json                          schema and per-partition statistics
+        Year=2023/Month=01/part-00000.parquet
+        Year=2023/Month=01/Location=Delhi/part-00000.parquet   (with --by-location)
+
+For every partition the manifest records its row count, min/max Date, the
+distinct values of the filter columns (Location, Violation_Type, ...) and
+the min/max Driver_Age, plus a HyperLogLog sketch of the ID columns
+(approx_distinct) and a t-digest of the numeric measures (quantiles). A
+Predicate built from the sidebar filters (utils.apply_filters) or a page's
+year/date selector skips every partition whose statistics cannot match, so a
+query for one state or one month opens only a fraction of the files.
+
+Point the app at a partitioned copy with STV_DATA_PATH=<directory>.
+
+    python partitions.py build Indian_Traffic_Violations_Dataset.csv --out violations
+    python partitions.py build big.csv --out violations --by-location
+    python partitions.py inspect violations --years 2024 2024 --location Delhi
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+
+import pandas as pd
+
+from sketches import HyperLogLog, TDigest
+
+MANIFEST = "_partitions.json"
+CSV_CHUNK_ROWS = 500_000
+
+# Columns whose distinct values are kept per partition (the sidebar filters)
+VALUE_COLUMNS = ["Location", "Violation_Type", "Vehicle_Type", "Driver_Gender"]
+# Columns whose min/max are kept per partition
+RANGE_COLUMNS = ["Driver_Age"]
+# More distinct values than this are not worth recording; such a column never prunes
+MAX_DISTINCT = 256
+# Columns whose distinct count is sketched per partition (sketches.HyperLogLog)
+SKETCH_COLUMNS = ["Violation_ID", "Officer_ID"]
+# ~2 KB of registers per column and partition
+SKETCH_ERROR = 0.025
+# Columns whose distribution is sketched per partition (sketches.TDigest)
+QUANTILE_COLUMNS = ["Fine_Amount", "Speed_Excess", "Driver_Age", "Risk_Score"]
+
+
+# ==================================================
+# PREDICATES
+# ==================================================
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+class Predicate:
+    """Row filter that can also rule out whole partitions from their statistics.
+
+    `date_range` is an inclusive (start, end) pair of dates, `years` an
+    inclusive (first, last) pair, `values` maps a column to the values it may
+    take and `ranges` maps a column to an inclusive (low, high) pair.
+    """
+
+    def __init__(self, date_range=None, years=None, values=None, ranges=None):
+        self.date_range = tuple(_as_date(d) for d in date_range) if date_range else None
+        self.years = tuple(int(y) for y in years) if years else None
+        self.values = {col: set(v) for col, v in (values or {}).items()}
+        self.ranges = dict(ranges or {})
+
+    @classmethod
+    def from_filters(cls, date_range, selected_location, selected_violation,
+                     selected_vehicle, selected_gender, age_range):
+        """The predicate of utils.apply_filters called with the same arguments."""
+        selected = {
+            "Location": selected_location,
+            "Violation_Type": selected_violation,
+            "Vehicle_Type": selected_vehicle,
+            "Driver_Gender": selected_gender,
+        }
+        dates = date_range if date_range and date_range[0] and date_range[1] else None
+        return cls(
+            date_range=dates,
+            values={col: v for col, v in selected.items() if "All" not in v},
+            ranges={"Driver_Age": tuple(age_range)} if age_range else None,
+        )
+
+    @property
+    def columns(self):
+        """Columns mask() reads."""
+        cols = ["Date"] if self.date_range or self.years else []
+        return cols + list(self.values) + list(self.ranges)
+
+    def key(self):
+        """Hashable form, for caching results per predicate."""
+        return (
+            self.date_range, self.years,
+            tuple(sorted((c, tuple(sorted(map(str, v)))) for c, v in self.values.items())),
+            tuple(sorted(self.ranges.items())),
+        )
+
+    def may_match(self, part):
+        """False when the partition's statistics rule out every row."""
+        if self.years and not self.years[0] <= part["keys"]["Year"] <= self.years[1]:
+            return False
+        if self.date_range and part["date_min"] is not None:
+            if _as_date(part["date_max"]) < self.date_range[0] or _as_date(part["date_min"]) > self.date_range[1]:
+                return False
+        for col, allowed in self.values.items():
+            if col in part["keys"]:
+                present = {part["keys"][col]}
+            else:
+                present = part["distinct"].get(col)
+            # Without statistics for a column the partition has to be read
+            if present is not None and not present & {str(v) for v in allowed}:
+                return False
+        for col, (low, high) in self.ranges.items():
+            stats = part["ranges"].get(col)
+            if stats is not None and (stats[1] < low or stats[0] > high):
+                return False
+        return True
+
+    def mask(self, df):
+        """Boolean Series selecting the rows of `df` that match."""
+        keep = pd.Series(True, index=df.index)
+        if self.date_range or self.years:
+            date = df["Date"]
+            if not pd.api.types.is_datetime64_any_dtype(date):
+                date = pd.to_datetime(date, errors="coerce")
+            if self.date_range:
+                day = date.dt.normalize()
+                keep &= (day >= pd.Timestamp(self.date_range[0])) & (day <= pd.Timestamp(self.date_range[1]))
+            if self.years:
+                keep &= date.dt.year.between(*self.years)
+        for col, allowed in self.values.items():
+            keep &= df[col].isin(allowed)
+        for col, (low, high) in self.ranges.items():
+            keep &= df[col].between(low, high)
+        return keep
+
+
+# ==================================================
+# WRITING
+# ==================================================
+def _partition_keys(chunk, by_location):
+    date = pd.to_datetime(chunk["Date"], errors="coerce")
+    keys = pd.DataFrame({"Year": date.dt.year, "Month": date.dt.month}, index=chunk.index)
+    if by_location:
+        keys["Location"] = chunk["Location"]
+    # Rows without a valid date still need a home
+    return keys.fillna({"Year": 0, "Month": 0}).astype({"Year": int, "Month": int}), date
+
+
+def _partition_dir(keys):
+    parts = [f"Year={keys['Year']}", f"Month={keys['Month']:02d}"]
+    if "Location" in keys:
+        parts.append(f"Location={keys['Location']}")
+    return "/".join(parts)
+
+
+def _merge_stats(part, rows, date):
+    part["rows"] += len(rows)
+    valid = date.dropna()
+    if not valid.empty:
+        low, high = valid.min().date().isoformat(), valid.max().date().isoformat()
+        part["date_min"] = min(part["date_min"] or low, low)
+        part["date_max"] = max(part["date_max"] or high, high)
+    for col in VALUE_COLUMNS:
+        if col not in rows.columns or part["distinct"].get(col, ()) is None:
+            continue
+        seen = set(part["distinct"].get(col, ())) | set(rows[col].dropna().astype(str))
+        part["distinct"][col] = sorted(seen) if len(seen) <= MAX_DISTINCT else None
+    for col in RANGE_COLUMNS:
+        if col in rows.columns and rows[col].notna().any():
+            low, high = rows[col].min().item(), rows[col].max().item()
+            old = part["ranges"].get(col, (low, high))
+            part["ranges"][col] = [min(old[0], low), max(old[1], high)]
+    for col in SKETCH_COLUMNS:
+        if col in rows.columns:
+            sketch = HyperLogLog.of(rows[col], SKETCH_ERROR)
+            if col in part["sketches"]:
+                sketch = sketch.merge(HyperLogLog.from_dict(part["sketches"][col]))
+            part["sketches"][col] = sketch.to_dict()
+    for col in QUANTILE_COLUMNS:
+        if col in rows.columns:
+            digest = TDigest.of(rows[col])
+            if col in part["digests"]:
+                digest = TDigest.from_dict(part["digests"][col]).merge(digest)
+            part["digests"][col] = digest.to_dict()
+
+
+def file_schema(chunk):
+    """Arrow schema every file of a dataset starting with `chunk` is written with.
+
+    Inferred per file, a column with no values in that file would get Arrow
+    type null, which does not unify with the other files' type when they are
+    scanned together; such columns are written as strings instead.
+    """
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema
+
+
+def write_file(rows, path, schema):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pq.write_table(pa.Table.from_pandas(rows, schema=schema, preserve_index=False), path)
+
+
+def write_partitioned(chunks, root, by_location=False, progress=None):
+    """Write an iterable of DataFrames as a partitioned dataset under `root`.
+
+    Memory use is bounded by one chunk. A partition gets one file per chunk
+    that has rows for it, and its statistics are merged across those files.
+    Every file has the schema of the first chunk (file_schema). Returns the
+    manifest.
+    """
+    if os.path.exists(os.path.join(root, MANIFEST)):
+        raise FileExistsError(f"{root} already holds a partitioned dataset")
+    os.makedirs(root, exist_ok=True)
+    partitions = {}
+    columns = schema = None
+    done = 0
+    for i, chunk in enumerate(chunks):
+        columns = columns or list(chunk.columns)
+        schema = schema or file_schema(chunk)
+        keys, date = _partition_keys(chunk, by_location)
+        for values, index in keys.groupby(list(keys.columns), sort=True).groups.items():
+            part_keys = dict(zip(keys.columns, [v.item() if hasattr(v, "item") else v for v in values]))
+            path = _partition_dir(part_keys)
+            part = partitions.setdefault(path, {
+                "path": path, "keys": part_keys, "files": [], "rows": 0,
+                "date_min": None, "date_max": None, "distinct": {}, "ranges": {}, "sketches": {}, "digests": {},
+            })
+            rows = chunk.loc[index]
+            os.makedirs(os.path.join(root, path), exist_ok=True)
+            name = f"part-{i:05d}.parquet"
+            write_file(rows, os.path.join(root, path, name), schema)
+            part["files"].append(name)
+            _merge_stats(part, rows, date.loc[index])
+        done += len(chunk)
+        if progress:
+            progress(done)
+
+    manifest = {
+        "columns": columns or [],
+        "by": ["Year", "Month"] + (["Location"] if by_location else []),
+        "rows": done,
+        # Sorted by key so that a full read returns the months in order
+        "partitions": [partitions[p] for p in sorted(partitions)],
+    }
+    with open(os.path.join(root, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def partition_csv(csv_path, root, by_location=False, progress=None):
+    """Partition a dataset CSV, reading it CSV_CHUNK_ROWS rows at a time."""
+    chunks = pd.read_csv(csv_path, chunksize=CSV_CHUNK_ROWS)
+    return write_partitioned(chunks, root, by_location, progress)
+
+
+# ==================================================
+# READING
+# ==================================================
+class PartitionedDataset:
+    """Read access to a partitioned dataset written by write_partitioned()."""
+
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.columns = manifest["columns"]
+        self.by = manifest["by"]
+        self.rows = manifest["rows"]
+        self.partitions = manifest["partitions"]
+        for part in self.partitions:
+            part["distinct"] = {col: set(v) for col, v in part["distinct"].items() if v is not None}
+
+    def prune(self, predicate=None):
+        """Partitions that may hold rows matching `predicate` (all when None)."""
+        if predicate is None:
+            return list(self.partitions)
+        return [part for part in self.partitions if predicate.may_match(part)]
+
+    def approx_distinct(self, column, predicate=None):
+        """Estimated distinct values of a SKETCH_COLUMNS column in the partitions `predicate` keeps.
+
+        Every row of a kept partition counts, so with a predicate finer than
+        the partitioning this is an upper estimate. None without sketches.
+        """
+        merged = None
+        for part in self.prune(predicate):
+            sketch = part.get("sketches", {}).get(column)
+            if sketch is None:
+                return None
+            sketch = HyperLogLog.from_dict(sketch)
+            merged = sketch if merged is None else merged.merge(sketch)
+        return 0 if merged is None else int(round(merged.estimate()))
+
+    def quantiles(self, column, q, predicate=None):
+        """Quantile(s) `q` of a QUANTILE_COLUMNS column over the partitions `predicate` keeps.
+
+        Like approx_distinct, every row of a kept partition counts. None
+        without digests.
+        """
+        merged = None
+        for part in self.prune(predicate):
+            digest = part.get("digests", {}).get(column)
+            if digest is None:
+                return None
+            digest = TDigest.from_dict(digest)
+            merged = digest if merged is None else merged.merge(digest)
+        return None if merged is None else merged.quantile(q)
+
+    def read(self, columns=None, predicate=None):
+        """Rows matching `predicate`, with `columns`, read from the unpruned partitions only."""
+        columns = list(columns or self.columns)
+        needed = columns + [c for c in (predicate.columns if predicate else []) if c not in columns]
+        frames = []
+        for part in self.prune(predicate):
+            for name in part["files"]:
+                frame = pd.read_parquet(os.path.join(self.root, part["path"], name), columns=needed)
+                if predicate is not None:
+                    frame = frame[predicate.mask(frame)]
+                frames.append(frame[columns])
+        if not frames:
+            # Keep the dtypes of the data even when nothing matches
+            first = self.partitions[0] if self.partitions else None
+            if first is None:
+                return pd.DataFrame(columns=columns)
+            return pd.read_parquet(os.path.join(self.root, first["path"], first["files"][0]), columns=columns).iloc[:0]
+        return pd.concat(frames, ignore_index=True)
+
+
+# ==================================================
+# CLI
+# ==================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect a partitioned copy of the dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="partition a dataset CSV")
+    p_build.add_argument("csv")
+    p_build.add_argument("--out", required=True, help="output directory")
+    p_build.add_argument("--by-location", action="store_true", help="also partition on Location")
+
+    p_inspect = sub.add_parser("inspect", help="show the partitions a filter would read")
+    p_inspect.add_argument("root")
+    p_inspect.add_argument("--years", nargs=2, type=int, metavar=("FIRST", "LAST"))
+    p_inspect.add_argument("--dates", nargs=2, metavar=("START", "END"))
+    p_inspect.add_argument("--location", nargs="+")
+    p_inspect.add_argument("--violation", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        manifest = partition_csv(args.csv, args.out, args.by_location,
+                                 progress=lambda done: print(f"\r{done:,} rows", end="", flush=True))
+        print()
+        print(f"✓ {args.out}: {manifest['rows']:,} rows in {len(manifest['partitions'])} partitions")
+        return 0
+
+    dataset = PartitionedDataset(args.root)
+    values = {}
+    if args.location:
+        values["Location"] = args.location
+    if args.violation:
+        values["Violation_Type"] = args.violation
+    predicate = Predicate(date_range=args.dates, years=args.years, values=values)
+    kept = dataset.prune(predicate)
+    kept_rows = sum(p["rows"] for p in kept)
+    print(f"{len(kept)} of {len(dataset.partitions)} partitions, "
+          f"{kept_rows:,} of {dataset.rows:,} rows ({kept_rows / max(dataset.rows, 1):.1%}) to read")
+    for part in kept:
+        print(f"  {part['path']:<45} {part['rows']:>10,}  {part['date_min']} .. {part['date_max']}")
+    for col in SKETCH_COLUMNS:
+        estimate = dataset.approx_distinct(col, predicate)
+        if estimate is not None:
+            print(f"~{estimate:,} distinct {col}")
+    for col in QUANTILE_COLUMNS:
+        quartiles = dataset.quantiles(col, [0.25, 0.5, 0.75], predicate)
+        if quartiles is not None:
+            print(f"{col} quartiles: " + " / ".join(f"{v:g}" for v in quartiles))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
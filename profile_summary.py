@@ -0,0 +1,64 @@
+"""Headline figures of the dataset profile, in a file small enough for cold starts.
+
+dataset_profile.py saves this summary (rows, columns, missing values,
+distinct locations and the span of years) beside the profile sidecar, as
+<name>.summary.json or _summary.json in a partitioned directory. It is read
+with the standard library only, so the Home page shows it without importing
+pandas or parsing the full profile with its sketches.
+"""
+import json
+import os
+
+SUMMARY_VERSION = 1
+# Same default as data_store.DATA_PATH, which Home does not import
+DATA_PATH = os.environ.get("STV_DATA_PATH", "Indian_Traffic_Violations_Dataset.csv")
+
+
+def summary_path(path):
+    if os.path.isdir(path):
+        return os.path.join(path, "_summary.json")
+    return os.path.splitext(path)[0] + ".summary.json"
+
+
+def summarize(profile):
+    """Summary dict of a DatasetProfile."""
+    locations = profile.columns.get("Location")
+    years = profile.columns.get("Year")
+    return {
+        "rows": profile.rows,
+        "columns": len(profile.columns),
+        "nulls": profile.nulls,
+        "locations": locations.distinct if locations is not None else None,
+        "years": [years.low, years.high] if years is not None and years.low is not None else None,
+    }
+
+
+def ready(path):
+    """Whether a summary newer than the dataset at `path` exists."""
+    summary, source = summary_path(path), path.rstrip("/\\")
+    return os.path.exists(summary) and os.path.exists(source) and os.path.getmtime(summary) >= os.path.getmtime(source)
+
+
+def write(path, summary):
+    """Write the summary of the dataset at `path`; False on read-only deployments."""
+    target = summary_path(path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": SUMMARY_VERSION, **summary}, f)
+        os.replace(tmp, target)
+    except OSError:
+        return False
+    return True
+
+
+def read(path=DATA_PATH):
+    """Summary of the dataset at `path`, or None when missing or stale."""
+    if not ready(path):
+        return None
+    try:
+        with open(summary_path(path), encoding="utf-8") as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return summary if summary.get("version") == SUMMARY_VERSION else None
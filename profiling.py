@@ -0,0 +1,279 @@
+"""Opt-in profiling of page reruns, saved per rerun for flamegraphs.
+
+    STV_PROFILE=sample streamlit run main.py        # every session, sampling
+    STV_PROFILE=sample STV_PROFILE_RATE=0.05 ...    # 5% of sessions
+    STV_PROFILE=cprofile streamlit run main.py      # deterministic (cProfile)
+    http://localhost:8501/?profile=1                # this session only (or ?profile=cprofile)
+
+The sampling profiler reads the script thread's stack every
+STV_PROFILE_INTERVAL seconds (default 5 ms) from a separate thread, so the
+page itself runs uninstrumented. It costs a few microseconds per sample,
+little enough to leave on for a fraction of production sessions. cProfile
+traces every call and slows the page down noticeably; use it on demand.
+
+Each profiled rerun writes to STV_PROFILE_DIR (default profiles/), named
+after the time, page and a hash of the widget state:
+
+    <stem>.speedscope.json   sampled stacks, open in https://www.speedscope.app
+    <stem>.collapsed.txt     the same stacks for flamegraph.pl / inferno
+    <stem>.prof              cProfile stats (snakeviz, gprof2dot, pstats)
+    <stem>.meta.json         page, widget state, duration, sample count
+
+Summarise a saved profile without a browser:
+
+    python profiling.py profiles/<stem>.collapsed.txt --top 25
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "STV_PROFILE"
+RATE_ENV = "STV_PROFILE_RATE"
+DIR_ENV = "STV_PROFILE_DIR"
+INTERVAL_ENV = "STV_PROFILE_INTERVAL"
+MODES = ("sample", "cprofile")
+
+# Session-state key holding whether this session was picked for profiling
+SESSION_KEY = "_profile_session"
+
+
+# ==================================================
+# SAMPLING PROFILER
+# ==================================================
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """Collects the call stacks of one thread at a fixed interval.
+
+    Stacks are kept as tuples of frame labels, outermost first, starting at
+    the first frame from `root_file` (main.py), so Streamlit's own runner
+    frames do not bury the page.
+    """
+
+    def __init__(self, thread_id=None, interval=0.005, root_file=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.root_file = root_file
+        self.stacks = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stack(self, frame):
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        if self.root_file:
+            for i, code in enumerate(codes):
+                if code.co_filename.endswith(self.root_file):
+                    codes = codes[i:]
+                    break
+        return tuple(_frame_label(code) for code in codes)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._stack(frame)] += 1
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def collapsed(self):
+        """Brendan Gregg's folded format: "outer;inner count" per line."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self, name):
+        """Speedscope "sampled" profile, weighted in seconds."""
+        index, frames, samples, weights = {}, [], [], []
+        for stack, count in self.stacks.items():
+            ids = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    func, _, where = label.partition(" (")
+                    file, _, line = where.rstrip(")").rpartition(":")
+                    frames.append({"name": func, "file": file, "line": int(line)})
+                ids.append(index[label])
+            samples.append(ids)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "profiling.py",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+# ==================================================
+# PER-RERUN HOOK
+# ==================================================
+def _mode_for_session():
+    """Profiling mode for the current session, or None."""
+    import streamlit as st
+
+    requested = st.query_params.get("profile")
+    if requested:
+        return "sample" if requested in ("1", "true") else requested if requested in MODES else None
+
+    mode = os.environ.get(PROFILE_ENV)
+    if mode not in MODES:
+        return None
+    # Pick sessions once, so a profiled session has every rerun profiled
+    if SESSION_KEY not in st.session_state:
+        rate = float(os.environ.get(RATE_ENV, "1"))
+        st.session_state[SESSION_KEY] = random.random() < rate
+    return mode if st.session_state[SESSION_KEY] else None
+
+
+def _widget_state():
+    """JSON-friendly snapshot of the session's widget values (the filter state)."""
+    import streamlit as st
+
+    state = {}
+    for key, value in st.session_state.items():
+        if isinstance(key, str) and key.startswith("_"):
+            continue
+        if isinstance(value, (str, int, float, bool, type(None), datetime.date, datetime.time)):
+            state[key] = value
+        elif isinstance(value, (list, tuple)) and len(value) <= 50:
+            state[key] = list(value)
+    return json.loads(json.dumps(state, default=str, sort_keys=True))
+
+
+def _stem(page, state):
+    digest = hashlib.sha1(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    slug = re.sub(r"[^a-z0-9]+", "-", page.lower()).strip("-")
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return f"{stamp}_{slug}_{digest}"
+
+
+def save_profile(page, mode, profiler, state, seconds, directory=None):
+    """Write a finished profile and its metadata. Returns the path stem."""
+    directory = directory or os.environ.get(DIR_ENV, "profiles")
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, _stem(page, state))
+    meta = {"page": page, "mode": mode, "seconds": round(seconds, 4), "widget_state": state}
+
+    if mode == "sample":
+        meta.update(samples=profiler.samples, interval=profiler.interval)
+        with open(f"{stem}.speedscope.json", "w", encoding="utf-8") as f:
+            json.dump(profiler.speedscope(f"{page} rerun"), f)
+        with open(f"{stem}.collapsed.txt", "w", encoding="utf-8") as f:
+            f.write(profiler.collapsed())
+    else:
+        profiler.dump_stats(f"{stem}.prof")
+
+    with open(f"{stem}.meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return stem
+
+
+@contextmanager
+def profile_rerun(page):
+    """Profile the enclosed page dispatch when profiling is on for this session."""
+    mode = _mode_for_session()
+    if mode is None:
+        yield None
+        return
+
+    if mode == "sample":
+        interval = float(os.environ.get(INTERVAL_ENV, "0.005"))
+        profiler = Sampler(interval=interval, root_file="main.py").start()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        yield profiler
+    finally:
+        seconds = time.perf_counter() - start
+        if mode == "sample":
+            profiler.stop()
+        else:
+            profiler.disable()
+        try:
+            stem = save_profile(page, mode, profiler, _widget_state(), seconds)
+            logger.info("profile of %r saved to %s.*", page, stem)
+        except OSError:
+            logger.warning("could not save the profile of %r", page, exc_info=True)
+
+
+# ==================================================
+# SUMMARY CLI
+# ==================================================
+def summarize_collapsed(path, top=20):
+    """(self samples, total samples, frame) for the hottest frames of a folded file."""
+    own, inclusive, total = Counter(), Counter(), 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            frames, count = stack.split(";"), int(count)
+            total += count
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+    rows = [(own[f], inclusive[f], f) for f, _ in inclusive.most_common()]
+    rows.sort(key=lambda r: r[0], reverse=True)
+    return total, rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise a saved rerun profile")
+    parser.add_argument("path", help=".collapsed.txt or .prof file")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.path.endswith(".prof"):
+        import pstats
+        pstats.Stats(args.path).sort_stats("cumulative").print_stats(args.top)
+        return 0
+
+    total, rows = summarize_collapsed(args.path, args.top)
+    print(f"{total} samples")
+    print(f"{'self':>7} {'total':>7}  frame")
+    for own, inclusive, frame in rows:
+        print(f"{own / total:7.1%} {inclusive / total:7.1%}  {frame}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,445 @@
+"""Grouped aggregation queries for the views, in memory or out-of-core.
+
+Views describe a query instead of running pandas operations on a frame:
+
+    monthly = query_engine.aggregate(
+        ["Year_Month"], {"Violations": count()}, where=Predicate(years=(2024, 2025)),
+    )
+
+and get back a small DataFrame (one row per group). Three backends run it:
+
+    pandas    the shared in-memory store (DataStore.scan), for data that fits in RAM
+    arrow     pyarrow record batches streamed from the Parquet files
+    duckdb    DuckDB over the same files (when the duckdb package is installed)
+
+The out-of-core backends read the partitioned store (partitions.py, pruned
+with the manifest's statistics) or the store's Parquet copy, holding only a
+batch and the partial aggregates in memory. Rows streamed in since start
+(streaming.py) live only in memory; they are aggregated with pandas and
+merged into the result.
+
+STV_QUERY_ENGINE picks the backend (default "auto": pandas below
+STV_OUT_OF_CORE_ROWS rows, default 5,000,000, otherwise duckdb if installed,
+else arrow). Results are cached per query and dataset version.
+
+    python query_engine.py --by Location --engine arrow       # compare against pandas
+"""
+import argparse
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import metrics
+from instrumentation import timed
+
+ENGINE_ENV = "STV_QUERY_ENGINE"
+ROWS_ENV = "STV_OUT_OF_CORE_ROWS"
+ENGINES = ("pandas", "arrow", "duckdb")
+BATCH_ROWS = 256_000
+# Partial results are merged once this many batches have been aggregated
+MERGE_EVERY = 32
+CACHE_SIZE = 128
+
+# Group keys computed from Date rather than read from a column
+DATE_KEYS = {"Year_Month": 7, "Day": 10}
+
+
+# ==================================================
+# QUERIES
+# ==================================================
+class Agg:
+    """One output column of a query: `kind` applied to `column` within each group."""
+
+    # Partial results each kind keeps per group, merged with the given function
+    PARTS = {
+        "count": {"n": "sum"},
+        "sum": {"sum": "sum"},
+        "mean": {"sum": "sum", "count": "sum"},
+        "min": {"min": "min"},
+        "max": {"max": "max"},
+    }
+
+    def __init__(self, kind, column=None):
+        self.kind = kind
+        self.column = column
+
+    def __repr__(self):
+        return f"{self.kind}({self.column or ''})"
+
+    def finalize(self, partial, name):
+        if self.kind == "mean":
+            return partial[f"{name}.sum"] / partial[f"{name}.count"].where(partial[f"{name}.count"] > 0)
+        return partial[f"{name}.{next(iter(self.PARTS[self.kind]))}"]
+
+
+def count():
+    return Agg("count")
+
+
+def total(column):
+    return Agg("sum", column)
+
+
+def mean(column):
+    return Agg("mean", column)
+
+
+def minimum(column):
+    return Agg("min", column)
+
+
+def maximum(column):
+    return Agg("max", column)
+
+
+class Query:
+    def __init__(self, by, aggregates, where=None):
+        self.by = list(by)
+        self.aggregates = dict(aggregates)
+        self.where = where
+
+    @property
+    def columns(self):
+        """Dataset columns the query reads (filter columns included)."""
+        cols = [c for c in self.by if c not in DATE_KEYS]
+        if any(c in DATE_KEYS for c in self.by):
+            cols.append("Date")
+        cols += [a.column for a in self.aggregates.values() if a.column]
+        if self.where is not None:
+            cols += self.where.columns
+        return list(dict.fromkeys(cols))
+
+    def key(self):
+        where = self.where.key() if self.where is not None else None
+        return tuple(self.by), tuple((n, repr(a)) for n, a in self.aggregates.items()), where
+
+    def merge(self, partials):
+        """Combine partial results (from batches, files or backends) into one partial."""
+        import pandas as pd
+
+        partials = [p for p in partials if p is not None and not p.empty]
+        if not partials:
+            return None
+        frame = pd.concat(partials, ignore_index=True)
+        how = {
+            f"{name}.{part}": func
+            for name, agg in self.aggregates.items()
+            for part, func in Agg.PARTS[agg.kind].items()
+        }
+        if not self.by:
+            return frame.agg(how).to_frame().T
+        return frame.groupby(self.by, sort=False).agg(how).reset_index()
+
+    def finalize(self, partial):
+        import pandas as pd
+
+        if partial is None:
+            return pd.DataFrame(columns=self.by + list(self.aggregates))
+        result = partial[self.by].copy()
+        for name, agg in self.aggregates.items():
+            result[name] = agg.finalize(partial, name)
+        if self.by:
+            result = result.sort_values(self.by, ignore_index=True)
+        return result
+
+
+# ==================================================
+# BACKENDS
+# ==================================================
+def _pandas_partial(query, frame):
+    """Partial result of `query` over an in-memory frame (already filtered)."""
+    import pandas as pd
+
+    frame = frame.copy()
+    for key, width in DATE_KEYS.items():
+        if key in query.by:
+            date = frame["Date"]
+            text = date.dt.strftime("%Y-%m-%d") if pd.api.types.is_datetime64_any_dtype(date) else date.astype("string")
+            frame[key] = text.str.slice(0, width)
+    out = {}
+    for name, agg in query.aggregates.items():
+        if agg.kind == "count":
+            out[f"{name}.n"] = pd.Series(1, index=frame.index)
+        elif agg.kind == "mean":
+            out[f"{name}.sum"] = frame[agg.column]
+            out[f"{name}.count"] = frame[agg.column].notna().astype("int64")
+        else:
+            out[f"{name}.{agg.kind}"] = frame[agg.column]
+    parts = pd.DataFrame(out, index=frame.index)
+    if query.by:
+        parts[query.by] = frame[query.by]
+    return query.merge([parts.dropna(subset=query.by)]) if len(parts) else None
+
+
+class PandasEngine:
+    """Aggregates frames of the shared in-memory store."""
+
+    name = "pandas"
+
+    def partial(self, query, store):
+        from partitions import Predicate
+
+        frame = store.scan(query.columns, query.where or Predicate())
+        return _pandas_partial(query, frame)
+
+
+def _source_files(store, where):
+    """Parquet files to scan for `where`: the unpruned partitions, or the columnar copy."""
+    if store.partitioned is not None:
+        parts = store.partitioned.prune(where)
+        metrics.PARTITION_SCANS.inc(len(parts), result="read")
+        metrics.PARTITION_SCANS.inc(len(store.partitioned.partitions) - len(parts), result="pruned")
+        root = store.partitioned.root
+        return [os.path.join(root, part["path"], name) for part in parts for name in part["files"]]
+    if not store._columnar_ready():
+        store.build_columnar()
+    return [store.columnar_path]
+
+
+def _appended_partial(query, store):
+    """Partial result over rows appended since start, which are not on disk."""
+    import pandas as pd
+
+    with store._lock:
+        appended = list(store._appended)
+    if not appended:
+        return None
+    rows = pd.concat([r[query.columns] for r in appended], ignore_index=True)
+    if query.where is not None:
+        rows = rows[query.where.mask(rows)]
+    return _pandas_partial(query, rows)
+
+
+class ArrowEngine:
+    """Streams record batches through pyarrow's group_by, one batch in memory at a time."""
+
+    name = "arrow"
+
+    @staticmethod
+    def _filter(where, schema):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if where is None:
+            return None
+        expr = None
+
+        def both(e):
+            return e if expr is None else expr & e
+
+        date = ds.field("Date")
+        if "Date" in schema.names and not pa.types.is_string(schema.field("Date").type):
+            date = date.cast(pa.string())
+        bounds = []
+        if where.date_range:
+            bounds.append((where.date_range[0].isoformat(), where.date_range[1].isoformat()))
+        if where.years:
+            bounds.append((f"{where.years[0]:04d}-01-01", f"{where.years[1]:04d}-12-31"))
+        for low, high in bounds:
+            # ISO dates order as strings; "<= high~" keeps a time part on the last day
+            expr = both((date >= low) & (date <= high + "~"))
+        for col, allowed in where.values.items():
+            expr = both(ds.field(col).isin(list(allowed)))
+        for col, (low, high) in where.ranges.items():
+            expr = both((ds.field(col) >= low) & (ds.field(col) <= high))
+        return expr
+
+    def partial(self, query, store):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        files = _source_files(store, query.where)
+        if not files:
+            return None
+        dataset = ds.dataset(files, format="parquet")
+        # Arrow output column -> the partial columns it fills (aggregates may share one)
+        outputs = {}
+        for name, agg in query.aggregates.items():
+            for part in Agg.PARTS[agg.kind]:
+                spec = (None, "count_all") if agg.kind == "count" else (agg.column, part)
+                outputs.setdefault(spec, []).append(f"{name}.{part}")
+        aggs = [(column or [], func) for column, func in outputs]
+        read = [c for c in query.columns if c in dataset.schema.names]
+
+        partials, merged = [], None
+        scanner = dataset.scanner(columns=read, filter=self._filter(query.where, dataset.schema), batch_size=BATCH_ROWS)
+        for batch in scanner.to_batches():
+            if batch.num_rows == 0:
+                continue
+            table = pa.Table.from_batches([batch])
+            for key, width in DATE_KEYS.items():
+                if key in query.by:
+                    date = table["Date"] if pa.types.is_string(table.schema.field("Date").type) \
+                        else pc.cast(table["Date"], pa.string())
+                    table = table.append_column(key, pc.utf8_slice_codeunits(date, 0, width))
+            result = table.group_by(query.by).aggregate(aggs).to_pandas()
+            partial = result[query.by].copy()
+            for (column, func), names in outputs.items():
+                for name in names:
+                    partial[name] = result[f"{column}_{func}" if column else func]
+            partials.append(partial)
+            if len(partials) >= MERGE_EVERY:
+                merged = query.merge([merged] + partials)
+                partials = []
+        return query.merge([merged] + partials)
+
+
+class DuckDBEngine:
+    """Runs the query as SQL in DuckDB, which spills to disk beyond memory."""
+
+    name = "duckdb"
+
+    @staticmethod
+    def _quote(name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def _where(self, where):
+        if where is None:
+            return "", []
+        clauses, params = [], []
+        date = "CAST(\"Date\" AS VARCHAR)"
+        bounds = []
+        if where.date_range:
+            bounds.append((where.date_range[0].isoformat(), where.date_range[1].isoformat()))
+        if where.years:
+            bounds.append((f"{where.years[0]:04d}-01-01", f"{where.years[1]:04d}-12-31"))
+        for low, high in bounds:
+            clauses.append(f"substr({date}, 1, 10) BETWEEN ? AND ?")
+            params += [low, high]
+        for col, allowed in where.values.items():
+            allowed = list(allowed)
+            clauses.append(f"{self._quote(col)} IN ({', '.join('?' * len(allowed))})")
+            params += allowed
+        for col, (low, high) in where.ranges.items():
+            clauses.append(f"{self._quote(col)} BETWEEN ? AND ?")
+            params += [low, high]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def partial(self, query, store):
+        import duckdb
+
+        files = _source_files(store, query.where)
+        if not files:
+            return None
+        keys = [
+            f"substr(CAST(\"Date\" AS VARCHAR), 1, {DATE_KEYS[c]}) AS {self._quote(c)}" if c in DATE_KEYS
+            else self._quote(c)
+            for c in query.by
+        ]
+        selects = list(keys)
+        for name, agg in query.aggregates.items():
+            col = self._quote(agg.column) if agg.column else None
+            sql = {
+                "count": [("n", "count(*)")],
+                "sum": [("sum", f"sum({col})")],
+                "mean": [("sum", f"sum({col})"), ("count", f"count({col})")],
+                "min": [("min", f"min({col})")],
+                "max": [("max", f"max({col})")],
+            }[agg.kind]
+            selects += [f"{expr} AS {self._quote(f'{name}.{part}')}" for part, expr in sql]
+        where, params = self._where(query.where)
+        group = f" GROUP BY {', '.join(str(i + 1) for i in range(len(keys)))}" if keys else ""
+        paths = ", ".join("'" + f.replace("'", "''") + "'" for f in files)
+        sql = f"SELECT {', '.join(selects)} FROM read_parquet([{paths}], union_by_name = true){where}{group}"
+        with duckdb.connect() as con:
+            result = con.execute(sql, params).df()
+        return result.dropna(subset=query.by)
+
+
+def available(engine):
+    if engine == "duckdb":
+        try:
+            import duckdb  # noqa: F401
+        except ImportError:
+            return False
+    return engine in ENGINES
+
+
+def _dataset_rows(store):
+    if store.partitioned is not None:
+        return store.partitioned.rows
+    if store.columnar and store._columnar_ready():
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(store.columnar_path).metadata.num_rows
+    # Only the CSV exists: the in-memory path is what reads it anyway
+    return 0
+
+
+def choose_engine(store):
+    """Backend name for `store` from STV_QUERY_ENGINE and the dataset size."""
+    requested = os.environ.get(ENGINE_ENV, "auto")
+    if requested in ENGINES and available(requested):
+        return requested
+    if _dataset_rows(store) < int(float(os.environ.get(ROWS_ENV, "5e6"))):
+        return "pandas"
+    return "duckdb" if available("duckdb") else "arrow"
+
+
+_BACKENDS = {"pandas": PandasEngine(), "arrow": ArrowEngine(), "duckdb": DuckDBEngine()}
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def aggregate(by, aggregates, where=None, engine=None, store=None):
+    """One row per group of `by` with the `aggregates` columns (a small DataFrame)."""
+    from data_store import get_store
+
+    store = store or get_store()
+    name = engine or choose_engine(store)
+    query = Query(by, aggregates, where)
+    version = store.version
+    cache_key = (id(store), name, query.key(), version)
+    with _cache_lock:
+        cached = _cache.get(cache_key)
+    metrics.cache_lookup("queries", hit=cached is not None)
+    if cached is not None:
+        return cached.copy()
+
+    with timed(f"query: {name}", kind="aggregate", by=",".join(query.by)):
+        partial = _BACKENDS[name].partial(query, store)
+        if name != "pandas":
+            partial = query.merge([partial, _appended_partial(query, store)])
+        result = query.finalize(partial)
+    with _cache_lock:
+        _cache[cache_key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result.copy()
+
+
+def main(argv=None):
+    import time
+
+    parser = argparse.ArgumentParser(description="Run one grouped count/sum query and compare with pandas")
+    parser.add_argument("--by", nargs="*", default=["Location"])
+    parser.add_argument("--sum", default="Fine_Amount", help="column to total and average per group")
+    parser.add_argument("--years", nargs=2, type=int)
+    parser.add_argument("--engine", choices=ENGINES, default="arrow")
+    parser.add_argument("--data", help="dataset CSV or partitioned directory (default: STV_DATA_PATH)")
+    args = parser.parse_args(argv)
+
+    from data_store import DataStore, get_store
+    from partitions import Predicate
+
+    store = DataStore(args.data) if args.data else get_store()
+    where = Predicate(years=args.years) if args.years else None
+    aggs = {"Violations": count(), "Fines": total(args.sum), "Average": mean(args.sum)}
+    results = {}
+    for engine in dict.fromkeys([args.engine, "pandas"]):
+        start = time.perf_counter()
+        results[engine] = aggregate(args.by, aggs, where, engine=engine, store=store)
+        print(f"{engine:<8} {time.perf_counter() - start:8.3f}s  {len(results[engine])} groups")
+    print(results[args.engine].to_string(index=False))
+    if len(results) == 2:
+        a, b = (r.reset_index(drop=True) for r in results.values())
+        same = a.shape == b.shape and (a[args.by].astype(str).equals(b[args.by].astype(str)) if args.by else True) \
+            and all(((a[c] - b[c]).abs() <= 1e-6 * b[c].abs().clip(lower=1)).all() for c in aggs)
+        print("matches pandas" if same else "DIFFERS from pandas")
+        return 0 if same else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""Risk_Score and Risk_Category from a declarative table of weighted rules.
+
+A rule adds its weight to a row's score when its condition holds, e.g.
+Violation_Type == "Drunk Driving" adds 4. The score is then cut into
+Risk_Category by `bins`/`labels`. The built-in table (RULES) is the one
+preprocess_data has always used; a JSON file can change weights, replace the
+rules or move the category thresholds:
+
+    {"weights": {"drunk_driving": 5, "court_appearance": 0},
+     "bins": [-0.5, 3.5, 6.5, 9.5, null]}
+
+    {"rules": [{"name": "night_speeding", "column": "Speed_Excess", "op": ">", "value": 20, "weight": 2}, ...]}
+
+(null stands for infinity.) Point STV_RISK_WEIGHTS at such a file to make it
+the model preprocess_data and streamed rows are scored with.
+
+Scoring is one vectorized pass per rule over whole columns. Re-scoring with
+new weights but the same conditions only evaluates the rules whose weight
+changed and only re-categorises the rows whose score moved; `rows=` limits
+scoring to a subset (edited or appended rows). `rescore_dataset` rewrites
+Risk_Score/Risk_Category of a dataset file, or of a partitioned dataset one
+partition per worker process, skipping files no row of which changed.
+
+    python risk_scoring.py show --weights weights.json
+    python risk_scoring.py rescore Indian_Traffic_Violations_Dataset.csv --weights weights.json
+    python risk_scoring.py rescore violations/ --weights weights.json --from old.json --workers 8
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+WEIGHTS_ENV = "STV_RISK_WEIGHTS"
+SCORE_COLUMN = "Risk_Score"
+CATEGORY_COLUMN = "Risk_Category"
+
+Rule = namedtuple("Rule", "name column op value weight")
+
+# ==================================================
+# THE DEFAULT MODEL
+# ==================================================
+RULES = (
+    Rule("repeat_offender", "Previous_Violations", ">", 3, 3),
+    Rule("invalid_license", "License_Validity", "!=", "Valid", 2),
+    Rule("drunk_driving", "Violation_Type", "==", "Drunk Driving", 4),
+    Rule("high_speed_excess", "Speed_Excess", ">", 30, 2),
+    Rule("court_appearance", "Court_Appearance_Required", "==", "Yes", 1),
+    Rule("over_alcohol_limit", "Alcohol_Level", ">", 0.08, 3),
+)
+# Scores in (bins[i], bins[i + 1]] get labels[i]; the lowest edge is included
+BINS = (-0.5, 2.5, 5.5, 8.5, math.inf)
+LABELS = ("Low Risk", "Medium Risk", "High Risk", "Very High Risk")
+
+# Missing values compare like pandas: false, except for "!=" and "not in"
+OPS = {
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    "in": lambda s, v: s.isin(v),
+    "not in": lambda s, v: ~s.isin(v),
+}
+
+
+class RiskModel:
+    """A rule table plus the category thresholds."""
+
+    def __init__(self, rules=RULES, bins=BINS, labels=LABELS):
+        self.rules = tuple(Rule(*rule) for rule in rules)
+        self.bins = np.array([math.inf if b is None else b for b in bins], dtype=float)
+        self.labels = list(labels)
+        unknown = [rule.op for rule in self.rules if rule.op not in OPS]
+        if unknown:
+            raise ValueError(f"unknown rule operator(s): {', '.join(unknown)}")
+        if len(self.labels) != len(self.bins) - 1:
+            raise ValueError(f"{len(self.bins)} bin edges need {len(self.bins) - 1} labels")
+
+    @property
+    def columns(self):
+        """Input columns, in rule order."""
+        return list(dict.fromkeys(rule.column for rule in self.rules))
+
+    @property
+    def dtype(self):
+        integral = all(float(rule.weight).is_integer() for rule in self.rules)
+        return np.int64 if integral else np.float64
+
+    def with_weights(self, weights):
+        """The same conditions with the weights in `weights` (rule name -> weight) replaced."""
+        unknown = set(weights) - {rule.name for rule in self.rules}
+        if unknown:
+            raise ValueError(f"no rule named {', '.join(sorted(unknown))}")
+        rules = [rule._replace(weight=weights.get(rule.name, rule.weight)) for rule in self.rules]
+        return RiskModel(rules, self.bins, self.labels)
+
+    def same_conditions(self, other):
+        strip = lambda model: [rule._replace(weight=None) for rule in model.rules]
+        return strip(self) == strip(other)
+
+    def to_dict(self):
+        return {
+            "rules": [rule._asdict() for rule in self.rules],
+            "bins": [None if math.isinf(b) else float(b) for b in self.bins],
+            "labels": self.labels,
+        }
+
+    @classmethod
+    def from_dict(cls, d, base=None):
+        """A model from a weights file's contents; keys it lacks come from `base` (default model)."""
+        base = base or RiskModel()
+        rules = [Rule(**rule) for rule in d["rules"]] if "rules" in d else base.rules
+        model = cls(rules, d.get("bins", base.bins), d.get("labels", base.labels))
+        return model.with_weights(d.get("weights", {}))
+
+
+def load_model(path=None):
+    """The model in a weights file (`path`, else STV_RISK_WEIGHTS); the built-in one without."""
+    path = path or os.environ.get(WEIGHTS_ENV)
+    if not path:
+        return RiskModel()
+    with open(path, encoding="utf-8") as f:
+        return RiskModel.from_dict(json.load(f))
+
+
+_default = None
+
+
+def default_model():
+    """The process-wide model (load_model() once)."""
+    global _default
+    if _default is None:
+        _default = load_model()
+    return _default
+
+
+# ==================================================
+# SCORING
+# ==================================================
+def _condition(df, rule):
+    column = df[rule.column]
+    if rule.op not in ("in", "not in") and not isinstance(column.dtype, pd.api.extensions.ExtensionDtype):
+        # Plain NumPy columns are compared without the Series machinery (~4x faster on text)
+        hit = OPS[rule.op](column.to_numpy(), rule.value)
+        if np.ndim(hit) == 1:
+            return hit.astype(bool, copy=False)
+    return OPS[rule.op](column, rule.value).to_numpy(dtype=bool, na_value=False)
+
+
+def score(df, model=None):
+    """Risk_Score of every row of `df` as an array (`df` needs model.columns)."""
+    model = model or default_model()
+    total = np.zeros(len(df), dtype=model.dtype)
+    for rule in model.rules:
+        if rule.weight:
+            np.add(total, rule.weight, out=total, where=_condition(df, rule))
+    return total
+
+
+def categorize(scores, model=None):
+    """Risk_Category of `scores`: pd.cut(scores, model.bins, labels=model.labels, include_lowest=True)."""
+    model = model or default_model()
+    scores = np.asarray(scores, dtype=float)
+    codes = np.searchsorted(model.bins, scores, side="left") - 1
+    codes[scores == model.bins[0]] = 0
+    codes[~((scores >= model.bins[0]) & (scores <= model.bins[-1]))] = -1
+    return pd.Categorical.from_codes(codes, categories=model.labels, ordered=True)
+
+
+def apply(df, model=None, rows=None):
+    """`df` with Risk_Score and Risk_Category set; only `rows` (mask or labels) are scored when given.
+
+    Returns `df` unchanged when it lacks a column the rules need.
+    """
+    model = model or default_model()
+    if not all(col in df.columns for col in model.columns):
+        return df
+    # Only whole columns are replaced, so the caller's frame is never written to
+    df = df.copy(deep=False)
+    if rows is None:
+        scores = score(df, model)
+        df[SCORE_COLUMN] = scores
+        df[CATEGORY_COLUMN] = pd.Series(categorize(scores, model), index=df.index)
+        return df
+
+    positions = df.index.get_indexer(df.loc[rows].index)
+    scores = score(df.iloc[positions], model)
+    if SCORE_COLUMN in df.columns:
+        column = df[SCORE_COLUMN].to_numpy().astype(np.result_type(df[SCORE_COLUMN].dtype, scores.dtype), copy=True)
+    else:
+        column = np.full(len(df), np.nan)
+    column[positions] = scores
+    categories = pd.Categorical(df[CATEGORY_COLUMN] if CATEGORY_COLUMN in df.columns else [None] * len(df),
+                                categories=model.labels, ordered=True)
+    codes = categories.codes.copy()
+    codes[positions] = categorize(scores, model).codes
+    df[SCORE_COLUMN] = column
+    df[CATEGORY_COLUMN] = pd.Series(pd.Categorical.from_codes(codes, categories=model.labels, ordered=True),
+                                    index=df.index)
+    return df
+
+
+def _labels(values):
+    return pd.Series(np.asarray(values, dtype=object)).fillna("").to_numpy()
+
+
+def rescore(df, old, new):
+    """Scores and categories of `df` under model `new`, given it was scored with `old`.
+
+    Returns (scores, categories, changed) where `changed` masks the rows
+    whose score or category moved. With the same conditions only the rules
+    whose weight differs are evaluated; otherwise every row is scored afresh.
+    """
+    scored = SCORE_COLUMN in df.columns and CATEGORY_COLUMN in df.columns
+    if not (scored and new.same_conditions(old)):
+        scores = score(df, new)
+        categories = categorize(scores, new)
+        if not scored:
+            return scores, categories, np.ones(len(df), dtype=bool)
+        changed = (scores != df[SCORE_COLUMN].to_numpy()) | (_labels(categories) != _labels(df[CATEGORY_COLUMN]))
+        return scores, categories, changed
+
+    scores = df[SCORE_COLUMN].to_numpy().astype(np.result_type(new.dtype, old.dtype), copy=True)
+    changed = np.zeros(len(df), dtype=bool)
+    for before, after in zip(old.rules, new.rules):
+        if after.weight != before.weight:
+            hit = _condition(df, after)
+            np.add(scores, after.weight - before.weight, out=scores, where=hit)
+            changed |= hit
+    if np.array_equal(new.bins, old.bins) and new.labels == old.labels:
+        # Only rows whose score moved can change category
+        categories = pd.Categorical(df[CATEGORY_COLUMN], categories=new.labels, ordered=True)
+        if changed.any():
+            codes = categories.codes.copy()
+            codes[changed] = categorize(scores[changed], new).codes
+            categories = pd.Categorical.from_codes(codes, categories=new.labels, ordered=True)
+    else:
+        categories = categorize(scores, new)
+        changed |= _labels(categories) != _labels(df[CATEGORY_COLUMN])
+    return scores, categories, changed
+
+
+# ==================================================
+# DATASETS ON DISK
+# ==================================================
+def _rescore_frame(df, old, new):
+    scores, categories, changed = rescore(df, old, new)
+    df[SCORE_COLUMN] = scores
+    # The dataset files keep plain text labels (conform_to_dataset)
+    df[CATEGORY_COLUMN] = np.asarray(categories, dtype=object)
+    return df, int(changed.sum())
+
+
+def _rescore_partition(root, part, old, new):
+    """Rescore one partition's files in place; returns (rows changed, the partition's new digest)."""
+    import pyarrow.parquet as pq
+    from partitions import write_file
+    from sketches import TDigest
+
+    changed = 0
+    digest = None
+    for name in part["files"]:
+        path = os.path.join(root, part["path"], name)
+        df, moved = _rescore_frame(pd.read_parquet(path), old, new)
+        if moved:
+            # The file's own schema, so that a column without values keeps its type
+            write_file(df, f"{path}.tmp", pq.read_schema(path))
+            os.replace(f"{path}.tmp", path)
+            changed += moved
+        piece = TDigest.of(df[SCORE_COLUMN])
+        digest = piece if digest is None else digest.merge(piece)
+    return changed, digest.to_dict() if digest is not None else None
+
+
+def rescore_partitioned(root, new, old=None, workers=None):
+    """Rescore a partitioned dataset, one partition per worker; returns the rows changed.
+
+    The manifest's Risk_Score digests are refreshed with the new scores.
+    """
+    from partitions import MANIFEST
+
+    old = old or RiskModel()
+    with open(os.path.join(root, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    parts = manifest["partitions"]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        results = [_rescore_partition(root, part, old, new) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_rescore_partition, [root] * len(parts), parts,
+                                    [old] * len(parts), [new] * len(parts)))
+    changed = 0
+    for part, (moved, digest) in zip(parts, results):
+        changed += moved
+        if digest is not None:
+            part.setdefault("digests", {})[SCORE_COLUMN] = digest
+    # Replacing the manifest also marks the dataset as changed (dataset_profile.sidecar_ready)
+    tmp = os.path.join(root, f"{MANIFEST}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, os.path.join(root, MANIFEST))
+    return changed
+
+
+def rescore_csv(path, new, old=None, chunk_rows=None):
+    """Rescore a dataset CSV chunk by chunk, rewriting it only when a score moved."""
+    from partitions import CSV_CHUNK_ROWS
+
+    old = old or RiskModel()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    changed = 0
+    try:
+        # round_trip: the other columns are written back exactly as they were read
+        chunks = pd.read_csv(path, chunksize=chunk_rows or CSV_CHUNK_ROWS, float_precision="round_trip")
+        for i, chunk in enumerate(chunks):
+            chunk, moved = _rescore_frame(chunk, old, new)
+            changed += moved
+            chunk.to_csv(tmp, index=False, header=i == 0, mode="w" if i == 0 else "a")
+        if changed:
+            # The Parquet copy and the profile sidecar are older now and get rebuilt
+            os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return changed
+
+
+def rescore_dataset(path, new, old=None, workers=None):
+    """Rescore the dataset at `path` (CSV or partitioned directory) from `old` to `new`; rows changed."""
+    if os.path.isdir(path):
+        return rescore_partitioned(path, new, old, workers)
+    return rescore_csv(path, new, old)
+
+
+# ==================================================
+# CLI
+# ==================================================
+def _describe(model):
+    lines = [f"{'rule':<20} {'condition':<45} {'weight':>6}"]
+    for rule in model.rules:
+        lines.append(f"{rule.name:<20} {f'{rule.column} {rule.op} {rule.value!r}':<45} {rule.weight:>6}")
+    edges = [f"{b:g}" for b in model.bins]
+    lines.append("")
+    lines += [f"{label:<15} ({low}, {high}]" for label, low, high in zip(model.labels, edges, edges[1:])]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from data_store import DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Show the risk model or rescore a dataset with it")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_show = sub.add_parser("show", help="print the rules and category thresholds")
+    p_show.add_argument("--weights", help="weights file (default: STV_RISK_WEIGHTS or the built-in rules)")
+    p_rescore = sub.add_parser("rescore", help="rewrite Risk_Score/Risk_Category of a dataset")
+    p_rescore.add_argument("data", nargs="?", default=DATA_PATH, help="dataset CSV or partitioned directory")
+    p_rescore.add_argument("--weights", help="model to score with (default: STV_RISK_WEIGHTS or built-in)")
+    p_rescore.add_argument("--from", dest="old", help="weights file the dataset was scored with (default: built-in)")
+    p_rescore.add_argument("--workers", type=int, help="partition processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    new = load_model(args.weights)
+    if args.command == "show":
+        print(_describe(new))
+        return 0
+
+    old = load_model(args.old) if args.old else RiskModel()
+    start = time.perf_counter()
+    changed = rescore_dataset(args.data, new, old, args.workers)
+    print(f"✓ {args.data}: {changed:,} row(s) rescored in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,538 @@
+"""Mergeable sketches for high-cardinality columns (IDs, registration numbers).
+
+    HyperLogLog      distinct count, relative error ~`error` (default 1%)
+    CountMinSketch   frequency of one value, overestimated by at most
+                     `epsilon` x rows with probability 1 - `delta`
+    SpaceSaving      the `k` most frequent values; each count is overestimated
+                     by at most its recorded error (<= rows / k)
+    TDigest          quantiles of a numeric column from at most ~`compression`
+                     centroids, most precise in the tails
+
+Each sketch is built from a batch of values, merged with sketches of other
+batches (partitions, streamed micro-batches) without touching the rows again,
+and serialised with to_dict() / from_dict(). Values are hashed with pandas'
+fixed-key hash, so sketches built in different processes merge.
+
+DistinctEngine and QuantileEngine are store aggregates (like
+kpi_engine.KPIEngine) holding one sketch per group; the Driver Behaviour page
+counts distinct violation IDs with the first instead of nunique(), and the
+Environment page draws its box plots from the second.
+
+    python sketches.py --data synthetic/bench/cleaned_100000_2023.csv --column Violation_ID
+"""
+import argparse
+import base64
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ERROR = 0.01
+DEFAULT_EPSILON = 0.001
+DEFAULT_DELTA = 0.01
+DEFAULT_K = 64
+DEFAULT_COMPRESSION = 200
+# A DistinctState counts exactly (from the values' hashes) while its groups
+# hold at most this many distinct values; past it only the sketches remain
+MAX_EXACT_DISTINCT = 100_000
+
+
+def hash_values(values):
+    """64-bit hashes of the non-null values, identical across processes."""
+    values = pd.Series(values).dropna()
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype="uint64")
+
+
+def _leading_zeros(words):
+    """Leading zero bits of each uint64 (64 for zero), exactly."""
+    high = (words >> np.uint64(32)).astype("float64")
+    low = (words & np.uint64(0xFFFFFFFF)).astype("float64")
+    # Below 2**32 a float64 holds the value exactly, so log2 is exact at powers of two
+    with np.errstate(divide="ignore"):
+        lz_high = 31 - np.floor(np.log2(high))
+        lz_low = 63 - np.floor(np.log2(low))
+    return np.where(high > 0, lz_high, np.where(low > 0, lz_low, 64)).astype("int64")
+
+
+def _encode(array):
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+# ==================================================
+# DISTINCT COUNT
+# ==================================================
+class HyperLogLog:
+    """Approximate distinct count with relative standard error ~1.04 / sqrt(2**p)."""
+
+    def __init__(self, error=DEFAULT_ERROR, p=None):
+        self.p = p or min(18, max(4, math.ceil(math.log2((1.04 / error) ** 2))))
+        self.registers = np.zeros(1 << self.p, dtype="uint8")
+
+    @classmethod
+    def of(cls, values, error=DEFAULT_ERROR):
+        sketch = cls(error)
+        sketch.add(values)
+        return sketch
+
+    @property
+    def error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, values):
+        return self.add_hashes(hash_values(values))
+
+    def add_hashes(self, hashes):
+        if not hashes.size:
+            return self
+        p = np.uint64(self.p)
+        index = (hashes >> (np.uint64(64) - p)).astype("int64")
+        rank = np.minimum(_leading_zeros(hashes << p), 64 - self.p) + 1
+        np.maximum.at(self.registers, index, rank.astype("uint8"))
+        return self
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precision {self.p} and {other.p}")
+        merged = HyperLogLog(p=self.p)
+        merged.registers = np.maximum(self.registers, other.registers)
+        return merged
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype("int64")))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if zeros:
+            # Small cardinalities: linear counting is more accurate (and the
+            # raw estimate is biased) up to about 3m
+            linear = m * math.log(m / zeros)
+            if linear <= 3 * m:
+                return linear
+        return float(raw)
+
+    def to_dict(self):
+        return {"p": self.p, "registers": _encode(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(p=data["p"])
+        sketch.registers = np.frombuffer(base64.b64decode(data["registers"]), dtype="uint8").copy()
+        return sketch
+
+
+# ==================================================
+# POINT FREQUENCIES
+# ==================================================
+class CountMinSketch:
+    """Frequencies of individual values, never underestimated."""
+
+    def __init__(self, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA, width=None, depth=None):
+        self.width = width or math.ceil(math.e / epsilon)
+        self.depth = depth or math.ceil(math.log(1 / delta))
+        self.table = np.zeros((self.depth, self.width), dtype="int64")
+
+    @classmethod
+    def of(cls, values, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA):
+        sketch = cls(epsilon, delta)
+        sketch.add(values)
+        return sketch
+
+    def _columns(self, hashes):
+        # Row i uses h1 + i * h2 (Kirsch-Mitzenmacher double hashing)
+        h1 = (hashes & np.uint64(0xFFFFFFFF)).astype("int64")
+        h2 = (hashes >> np.uint64(32)).astype("int64") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, values):
+        counts = pd.Series(values).value_counts()
+        self.add_counts(counts)
+        return self
+
+    def add_counts(self, counts):
+        """Add a value -> count Series (e.g. a value_counts())."""
+        if counts.empty:
+            return self
+        hashes = hash_values(counts.index.to_series())
+        for row, cols in enumerate(self._columns(hashes)):
+            np.add.at(self.table[row], cols, counts.to_numpy(dtype="int64"))
+        return self
+
+    def merge(self, other):
+        if other.table.shape != self.table.shape:
+            raise ValueError("Cannot merge count-min sketches of different sizes")
+        merged = CountMinSketch(width=self.width, depth=self.depth)
+        merged.table = self.table + other.table
+        return merged
+
+    def estimate(self, value):
+        hashes = hash_values([value])
+        return int(min(self.table[row, cols[0]] for row, cols in enumerate(self._columns(hashes))))
+
+    def to_dict(self):
+        return {"width": self.width, "depth": self.depth, "table": _encode(self.table)}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(width=data["width"], depth=data["depth"])
+        table = np.frombuffer(base64.b64decode(data["table"]), dtype="int64")
+        sketch.table = table.reshape(sketch.depth, sketch.width).copy()
+        return sketch
+
+
+# ==================================================
+# TOP-K
+# ==================================================
+class SpaceSaving:
+    """The k most frequent values with counts and per-value overestimation bounds.
+
+    A summary that dropped values ("full") may have missed up to its smallest
+    kept count for any value it does not hold; merging charges that amount as
+    error to the values only the other summary holds.
+    """
+
+    def __init__(self, k=DEFAULT_K, counts=None, errors=None, full=False):
+        self.k = k
+        self.counts = counts if counts is not None else pd.Series(dtype="int64")
+        self.errors = errors if errors is not None else pd.Series(0, index=self.counts.index, dtype="int64")
+        self.full = full
+
+    @classmethod
+    def of(cls, values, k=DEFAULT_K):
+        return cls.from_counts(pd.Series(values).value_counts(), k)
+
+    @classmethod
+    def from_counts(cls, counts, k=DEFAULT_K):
+        """Summary of exact value -> count pairs (e.g. a value_counts())."""
+        counts = counts[counts > 0].sort_values(ascending=False, kind="stable").astype("int64")
+        return cls(k, counts.head(k), full=len(counts) > k)
+
+    def _floor(self):
+        return int(self.counts.min()) if self.full and len(self.counts) else 0
+
+    def add(self, values):
+        return self.merge(SpaceSaving.of(values, self.k))
+
+    def merge(self, other):
+        index = self.counts.index.union(other.counts.index)
+        floor_a, floor_b = self._floor(), other._floor()
+        counts = self.counts.reindex(index).fillna(floor_a) + other.counts.reindex(index).fillna(floor_b)
+        errors = self.errors.reindex(index).fillna(floor_a) + other.errors.reindex(index).fillna(floor_b)
+        order = counts.sort_values(ascending=False, kind="stable").index
+        k = max(self.k, other.k)
+        return SpaceSaving(
+            k, counts[order[:k]].astype("int64"), errors[order[:k]].astype("int64"),
+            self.full or other.full or len(index) > k,
+        )
+
+    def top(self, n):
+        """(value -> count) Series of the n most frequent values, like value_counts().head(n)."""
+        return self.counts.head(n).rename("count")
+
+    def to_dict(self):
+        return {
+            "k": self.k, "full": self.full,
+            "items": [[v.item() if hasattr(v, "item") else v, int(c), int(self.errors[v])]
+                      for v, c in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        items = data["items"]
+        index = [v for v, _, _ in items]
+        return cls(
+            data["k"],
+            pd.Series([c for _, c, _ in items], index=index, dtype="int64"),
+            pd.Series([e for _, _, e in items], index=index, dtype="int64"),
+            data["full"],
+        )
+
+
+# ==================================================
+# QUANTILES
+# ==================================================
+class TDigest:
+    """Merging t-digest: centroids (mean, weight) sized by the k1 scale function.
+
+    A centroid may span at most one unit of k(q) = compression / 2pi *
+    asin(2q - 1), so centroids near the median are large and those in the
+    tails small; min and max are kept exactly. While a column has at most
+    `compression` distinct values each value is its own centroid and the
+    quantiles are exact (risk scores, speed excess, ages).
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION, means=None, weights=None, low=np.inf, high=-np.inf,
+                 exact=True):
+        self.compression = compression
+        self.means = means if means is not None else np.empty(0)
+        self.weights = weights if weights is not None else np.empty(0)
+        self.low = low
+        self.high = high
+        self.exact = exact
+
+    @classmethod
+    def of(cls, values, compression=DEFAULT_COMPRESSION):
+        values = pd.to_numeric(pd.Series(values), errors="coerce").dropna().to_numpy(dtype="float64")
+        digest = cls(compression)
+        if values.size:
+            means, counts = np.unique(values, return_counts=True)
+            digest._build(means, counts.astype("float64"), exact=True)
+        return digest
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def _build(self, means, weights, exact):
+        """Set the centroids from (mean, weight) pairs sorted by mean."""
+        self.low, self.high = means[0], means[-1]
+        if exact:
+            if means.size <= self.compression:
+                self.means, self.weights, self.exact = means, weights, True
+                return
+        total = weights.sum()
+        # Cluster of each input: the k-unit its left edge falls in
+        left = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * left - 1)
+        cluster = np.floor(k).astype("int64")
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+        sums = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / sums
+        self.weights = sums
+        self.exact = False
+
+    def merge(self, other):
+        merged = TDigest(max(self.compression, other.compression))
+        means = np.concatenate([self.means, other.means])
+        if not means.size:
+            return merged
+        weights = np.concatenate([self.weights, other.weights])
+        low, high = min(self.low, other.low), max(self.high, other.high)
+        if self.exact and other.exact:
+            means, index = np.unique(means, return_inverse=True)
+            weights = np.bincount(index, weights=weights)
+            merged._build(means, weights, exact=True)
+        else:
+            order = np.argsort(means, kind="stable")
+            merged._build(means[order], weights[order], exact=False)
+        merged.low, merged.high = low, high
+        return merged
+
+    def _value_at(self, rank):
+        """The rank-th smallest value (0-based) of an exact digest."""
+        return self.means[np.searchsorted(np.cumsum(self.weights), rank, side="right")]
+
+    def quantile(self, q):
+        """Value at quantile(s) `q` in [0, 1] (NaN when empty), like Series.quantile."""
+        q = np.asarray(q, dtype="float64")
+        if not self.weights.size:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        total = self.weights.sum()
+        if self.exact:
+            # Linear interpolation between order statistics, as pandas does
+            h = (total - 1) * q
+            below, above = self._value_at(np.floor(h)), self._value_at(np.ceil(h))
+            return below + (above - below) * (h - np.floor(h))
+        # Each centroid's mean sits at the middle of its weight
+        positions = np.r_[0.0, np.cumsum(self.weights) - self.weights / 2, total]
+        values = np.r_[self.low, self.means, self.high]
+        return np.interp(q * total, positions, values)
+
+    def box_stats(self, whis=1.5):
+        """matplotlib Axes.bxp() statistics: quartiles, whiskers at `whis` IQR and outliers.
+
+        Exact digests give the same statistics as seaborn's boxplot. Otherwise
+        whiskers end at the fences (or min/max when inside them) and the
+        centroids beyond them stand in for the outliers.
+        """
+        q1, med, q3 = self.quantile([0.25, 0.5, 0.75])
+        low_fence, high_fence = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+        points = np.r_[self.low, self.means, self.high]
+        inside = points[(points >= low_fence) & (points <= high_fence)]
+        if self.exact:
+            whislo = inside.min() if inside.size else q1
+            whishi = inside.max() if inside.size else q3
+        else:
+            whislo, whishi = max(low_fence, self.low), min(high_fence, self.high)
+        return {
+            "med": med, "q1": q1, "q3": q3, "whislo": whislo, "whishi": whishi,
+            "fliers": np.unique(points[(points < low_fence) | (points > high_fence)]),
+        }
+
+    def to_dict(self):
+        return {
+            "compression": self.compression, "low": float(self.low), "high": float(self.high),
+            "exact": self.exact, "means": self.means.tolist(), "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["compression"], np.asarray(data["means"], dtype="float64"),
+            np.asarray(data["weights"], dtype="float64"), data["low"], data["high"], data["exact"],
+        )
+
+
+def binned_kde_kws(weights):
+    """kde_kws for a seaborn histplot drawn from bin counts.
+
+    The KDE then runs over the bins instead of every row. Its bandwidth is
+    Scott's rule for the rows counted, not for the number of bins.
+    """
+    return {"bw_method": max(float(np.sum(weights)), 1.0) ** -0.2}
+
+
+# ==================================================
+# STORE AGGREGATES
+# ==================================================
+class SketchState:
+    """One sketch per group; mergeable like a KPIState."""
+
+    def __init__(self, groups=None):
+        self.groups = groups or {}
+
+    def merge(self, other):
+        groups = dict(self.groups)
+        for key, sketch in other.groups.items():
+            groups[key] = groups[key].merge(sketch) if key in groups else sketch
+        return type(self)(groups)
+
+    def combined(self, keep=None):
+        """The groups for which keep(group) is true (all when None), merged; None when there are none."""
+        sketches = [s for key, s in self.groups.items() if keep is None or keep(key)]
+        if not sketches:
+            return None
+        merged = sketches[0]
+        for sketch in sketches[1:]:
+            merged = merged.merge(sketch)
+        return merged
+
+
+class DistinctState(SketchState):
+    """HyperLogLog sketches per group, and the distinct value hashes of each
+    group (`exact`) while they number at most MAX_EXACT_DISTINCT in all."""
+
+    def __init__(self, groups=None, exact=None):
+        super().__init__(groups)
+        self.exact = exact
+
+    def merge(self, other):
+        merged = super().merge(other)
+        if self.exact is not None and other.exact is not None:
+            exact = dict(self.exact)
+            for key, hashes in other.exact.items():
+                exact[key] = np.union1d(exact[key], hashes) if key in exact else hashes
+            if sum(len(hashes) for hashes in exact.values()) <= MAX_EXACT_DISTINCT:
+                merged.exact = exact
+        return merged
+
+    def estimate(self, keep=None):
+        """Distinct values across the groups for which keep(group) is true (all when None).
+
+        Exact while the state keeps the value hashes, a HyperLogLog estimate past that.
+        """
+        if self.exact is not None:
+            kept = [hashes for key, hashes in self.exact.items() if keep is None or keep(key)]
+            return len(np.unique(np.concatenate(kept))) if kept else 0
+        merged = self.combined(keep)
+        return 0 if merged is None else int(round(merged.estimate()))
+
+
+class DistinctEngine:
+    """Distinct values of `column`, per value of `by`, as a DataStore aggregate.
+
+    Counts are exact up to MAX_EXACT_DISTINCT values and approximate past it.
+    Rows whose `by` value is missing are counted in the group None.
+    """
+
+    def __init__(self, column, by=None, error=DEFAULT_ERROR, name=None):
+        self.column = column
+        self.by = by
+        self.error = error
+        self.name = name or f"distinct {column}"
+
+    @property
+    def columns(self):
+        return [self.column] + ([self.by] if self.by else [])
+
+    def accumulate(self, df):
+        if self.by is None:
+            groups = [(None, df[self.column])]
+        else:
+            groups = [
+                (None if pd.isna(key) else key.item() if hasattr(key, "item") else key, values)
+                for key, values in df.groupby(self.by, sort=False, dropna=False)[self.column]
+            ]
+        sketches, exact = {}, {}
+        for key, values in groups:
+            hashes = hash_values(values)
+            sketches[key] = HyperLogLog(self.error).add_hashes(hashes)
+            if exact is not None:
+                exact[key] = np.unique(hashes)
+                if sum(len(h) for h in exact.values()) > MAX_EXACT_DISTINCT:
+                    exact = None
+        return DistinctState(sketches, exact)
+
+
+class QuantileEngine:
+    """t-digests of `column` per combination of the `by` columns, as a DataStore aggregate.
+
+    Group keys are tuples in `by` order; a page filtering on those columns
+    merges the digests of the groups it keeps (SketchState.combined).
+    """
+
+    def __init__(self, column, by=(), compression=DEFAULT_COMPRESSION, name=None):
+        self.column = column
+        self.by = list(by)
+        self.compression = compression
+        self.name = name or f"quantiles {column}"
+
+    @property
+    def columns(self):
+        return [self.column] + self.by
+
+    def accumulate(self, df):
+        if not self.by:
+            return SketchState({(): TDigest.of(df[self.column], self.compression)})
+        return SketchState({
+            tuple(k.item() if hasattr(k, "item") else k for k in key): TDigest.of(values, self.compression)
+            for key, values in df.groupby(self.by, sort=False)[self.column]
+        })
+
+
+# ==================================================
+# CLI
+# ==================================================
+def main(argv=None):
+    from data_store import DATA_PATH, DataStore
+
+    parser = argparse.ArgumentParser(description="Compare sketch estimates with exact counts on one column")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--column", default="Violation_ID")
+    parser.add_argument("--error", type=float, default=DEFAULT_ERROR, help="HyperLogLog relative error")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="SpaceSaving counters")
+    args = parser.parse_args(argv)
+
+    values = DataStore(args.data).frame([args.column])[args.column]
+    start = time.perf_counter()
+    exact = values.nunique()
+    exact_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    hll = HyperLogLog.of(values, args.error)
+    sketch_seconds = time.perf_counter() - start
+    estimate = hll.estimate()
+    print(f"distinct: exact {exact:,} ({exact_seconds:.3f}s), HyperLogLog {estimate:,.0f} "
+          f"({sketch_seconds:.3f}s, {abs(estimate - exact) / max(exact, 1):.2%} off, "
+          f"{len(hll.registers):,} registers)")
+
+    top = SpaceSaving.of(values, args.k).top(5)
+    exact_top = values.value_counts().head(5)
+    print("top values (SpaceSaving / exact):")
+    for value, count in top.items():
+        print(f"  {value!s:<30} {count:>10,} {int(exact_top.get(value, 0)):>10,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
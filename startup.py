@@ -0,0 +1,206 @@
+"""Cold-start helpers: page table, background import warm-up and an import-time report.
+
+Run as a script to print how long each module takes to import in a fresh
+interpreter:
+
+    python startup.py                      # default module list
+    python startup.py views._2_Dashboard   # specific modules
+    python startup.py --json imports.json  # also save the timings
+    python startup.py --compare imports.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+
+# Libraries the pages import when they are first rendered, heaviest first
+HEAVY_MODULES = [
+    "seaborn",
+    "matplotlib.pyplot",
+    "pandas",
+    "plotly.express",
+    "plotly.graph_objects",
+    "numpy",
+    "pyarrow.parquet",
+]
+
+# Sidebar navigation: page label -> view module (imported only when selected)
+PAGES = {
+    "Home": "views._1_Home",
+    "Dashboard": "views._2_Dashboard",
+    "Time Trend Analysis": "views._3_Time_Trend_Analysis",
+    "Environment Analysis": "views._4_Environment_Analysis",
+    "Vehicle Analysis": "views._5_Vehicle_Analysis",
+    "Driver Behaviour Analysis": "views._6_Driver_Behaviour_Analysis",
+    "Payment Analysis": "views._7_Payment_Analysis",
+    "Map Visualisation": "views._8_Map_Visualisation",
+    "Report": "views._9_Report",
+    "Enforcement Analysis": "views._11_Enforcement_Analysis",
+    "About": "views._10_About",
+}
+
+# Modules main.py imports on every cold start, followed by the page modules
+STARTUP_MODULES = ["streamlit", "utils"]
+VIEW_MODULES = list(PAGES.values())
+
+# Set to "1" to import HEAVY_MODULES in a background thread after the first page
+WARMUP_ENV = "STV_WARMUP_IMPORTS"
+
+
+# ==================================================
+# PAGE DATA
+# ==================================================
+def page_data(view):
+    """A private frame with the columns the view declares.
+
+    REQUIRED_COLUMNS (None = all) selects the shared base columns and
+    DERIVED_COLUMNS adds shared, precomputed overlays. The frame shares memory
+    with the store but is copy-on-write, so pages cannot alter other sessions' data.
+    Pages that declare no columns get None, so they never import pandas.
+    """
+    columns = getattr(view, "REQUIRED_COLUMNS", None)
+    derived = getattr(view, "DERIVED_COLUMNS", ())
+    if columns == [] and not derived:
+        return None
+
+    from data_store import get_store
+    return get_store().frame(columns, derived=derived)
+
+
+# ==================================================
+# BACKGROUND IMPORT WARM-UP
+# ==================================================
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def _import_all(modules):
+    import importlib
+
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            # Optional libraries (e.g. pyarrow) may be missing
+            pass
+
+
+def warmup_enabled():
+    return os.environ.get(WARMUP_ENV, "") == "1"
+
+
+def start_import_warmup(modules=None):
+    """Import heavy libraries in a daemon thread, once per process.
+
+    Called after the first page has rendered so that later navigation does not
+    pay the import cost. Python's import lock keeps this safe when a page
+    imports the same module at the same time.
+    """
+    global _warmup_thread
+    if _warmup_thread is not None:
+        return _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(
+                target=_import_all,
+                args=(list(modules or HEAVY_MODULES),),
+                name="import-warmup",
+                daemon=True,
+            )
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+# ==================================================
+# IMPORT-TIME REPORT
+# ==================================================
+def _parse_importtime(stderr):
+    """Rows of (module, self_us, cumulative_us) from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[0].isdigit():
+            continue
+        rows.append((parts[2], int(parts[0]), int(parts[1])))
+    return rows
+
+
+def measure_import(module, top=5, cwd=None):
+    """Import `module` in a fresh interpreter and return its timing breakdown.
+
+    Returns a dict with the module's cumulative import time in seconds and the
+    `top` slowest modules (by self time) it pulled in.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=cwd or os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()
+        return {"module": module, "seconds": None, "error": error[-1] if error else "failed"}
+
+    rows = _parse_importtime(proc.stderr)
+    # The requested module is the last top-level entry with its name
+    cumulative = next((c for name, _, c in reversed(rows) if name.strip() == module), 0)
+    slowest = sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "seconds": cumulative / 1e6,
+        "slowest": [{"module": name.strip(), "seconds": s / 1e6} for name, s, _ in slowest],
+    }
+
+
+def import_report(modules=None, top=5):
+    return [measure_import(m, top=top) for m in (modules or STARTUP_MODULES + VIEW_MODULES)]
+
+
+def compare_reports(current, baseline, threshold=0.2):
+    """Modules whose import time grew by more than `threshold` (fraction)."""
+    before = {r["module"]: r["seconds"] for r in baseline if r.get("seconds")}
+    regressions = []
+    for row in current:
+        old, new = before.get(row["module"]), row.get("seconds")
+        if old and new and new > old * (1 + threshold):
+            regressions.append((row["module"], old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-module import-time report")
+    parser.add_argument("modules", nargs="*", help="modules to time (default: startup + pages)")
+    parser.add_argument("--top", type=int, default=5, help="slowest dependencies to list per module")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (fraction)")
+    args = parser.parse_args(argv)
+
+    report = import_report(args.modules, top=args.top)
+    for row in report:
+        if row["seconds"] is None:
+            print(f"{row['module']:<40} FAILED  {row['error']}")
+            continue
+        print(f"{row['module']:<40} {row['seconds']:7.3f}s")
+        for dep in row["slowest"]:
+            print(f"    {dep['module']:<36} {dep['seconds']:7.3f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f), args.threshold)
+        for module, old, new in regressions:
+            print(f"REGRESSION {module}: {old:.3f}s -> {new:.3f}s")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
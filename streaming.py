@@ -0,0 +1,288 @@
+"""Streaming ingest of live violation events into the shared data store.
+
+A source stands in for the camera / e-challan feed and delivers raw records
+(the columns of Indian_Traffic_Violations.csv) as JSON objects, one per line:
+
+    events.jsonl               an append-only file, followed like `tail -f`
+    tcp://127.0.0.1:9500       a local socket; producers send JSON lines
+
+main.py starts the ingest thread when STV_STREAM names a source. Every
+STV_STREAM_INTERVAL seconds (default 1) the records received since the last
+batch are cleaned with the same rules as the published dataset
+(preprocess_data + conform_to_dataset) and appended to the store, which
+extends its columns, overlays and KPI states with the new rows only.
+
+    STV_STREAM=events.jsonl streamlit run main.py
+    python streaming.py feed events.jsonl --rate 20      # synthetic live events
+    python streaming.py feed tcp://127.0.0.1:9500 --rate 200 --seconds 60
+    python streaming.py ingest events.jsonl              # ingest without the app, print batches
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+STREAM_ENV = "STV_STREAM"
+INTERVAL_ENV = "STV_STREAM_INTERVAL"
+THREAD_NAME = "stream-ingest"
+
+
+# ==================================================
+# SOURCES
+# ==================================================
+class JsonlTail:
+    """Records appended to a JSONL file since the last read.
+
+    Starts at the end of the file unless `from_start`; a partial last line is
+    kept until its newline arrives, and a truncated file is read again from
+    the top.
+    """
+
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.offset = 0 if from_start or not os.path.exists(path) else os.path.getsize(path)
+        self._partial = b""
+
+    def read(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.offset:
+            self.offset, self._partial = 0, b""
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset += len(data)
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        return _decode(lines)
+
+    def close(self):
+        pass
+
+
+class SocketSource:
+    """Newline-delimited JSON received on a local TCP port, from any number of producers."""
+
+    def __init__(self, host="127.0.0.1", port=9500):
+        self._queue = queue.SimpleQueue()
+        received = self._queue
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    received.put(line)
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="stream-socket", daemon=True).start()
+
+    def read(self):
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                return _decode(lines)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _decode(lines):
+    records = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            metrics.INGESTED_ROWS.inc(outcome="malformed")
+    return records
+
+
+def open_source(spec):
+    """Source for a file path or a tcp://host:port address."""
+    if spec.startswith("tcp://"):
+        host, _, port = spec[len("tcp://"):].rpartition(":")
+        return SocketSource(host or "127.0.0.1", int(port))
+    return JsonlTail(spec)
+
+
+# ==================================================
+# MICRO-BATCHES
+# ==================================================
+def clean_batch(records):
+    """Raw records -> rows in the published dataset's layout (may drop invalid ones)."""
+    import pandas as pd
+    from generate_cleaned_data import conform_to_dataset, preprocess_data
+
+    cleaned = preprocess_data(pd.DataFrame.from_records(records))
+    if cleaned is None or cleaned.empty:
+        return pd.DataFrame()
+    if "Hour" in cleaned.columns:
+        # The dataset has an hour for every row; unparseable times are dropped
+        cleaned = cleaned[cleaned["Hour"].notna()]
+    return conform_to_dataset(cleaned)
+
+
+class Ingestor:
+    """Moves records from a source into the store, one micro-batch at a time."""
+
+    def __init__(self, source, store=None, interval=1.0):
+        self.source = source
+        self.store = store
+        self.interval = interval
+        self.batches = 0
+        self.rows = 0
+        self._stop = threading.Event()
+
+    def poll(self):
+        """Ingest whatever arrived since the last call. Returns rows appended."""
+        from data_store import get_store
+
+        records = self.source.read()
+        if not records:
+            return 0
+        start = time.perf_counter()
+        rows = clean_batch(records)
+        version = (self.store or get_store()).append(rows)
+        seconds = time.perf_counter() - start
+
+        self.batches += 1
+        self.rows += len(rows)
+        metrics.INGESTED_ROWS.inc(len(rows), outcome="appended")
+        metrics.INGESTED_ROWS.inc(len(records) - len(rows), outcome="dropped")
+        metrics.INGEST_BATCH_SECONDS.observe(seconds)
+        logger.info("ingested %d of %d records in %.3fs (version %d)", len(rows), len(records), seconds, version)
+        return len(rows)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                # A bad batch is logged and skipped; the feed keeps flowing
+                logger.warning("stream batch failed", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        self.source.close()
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def start_ingest(spec=None, interval=None):
+    """Start ingesting from STV_STREAM (or `spec`) in a daemon thread, once per process."""
+    global _ingestor
+    spec = spec or os.environ.get(STREAM_ENV)
+    if not spec or _ingestor is not None:
+        return _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            interval = interval or float(os.environ.get(INTERVAL_ENV, "1"))
+            _ingestor = Ingestor(open_source(spec), interval=interval)
+            threading.Thread(target=_ingestor.run, name=THREAD_NAME, daemon=True).start()
+    return _ingestor
+
+
+# ==================================================
+# SYNTHETIC FEED
+# ==================================================
+def live_events(n, seed, counter=0):
+    """`n` raw events stamped with the current date and time."""
+    from synthetic_data import raw_block
+
+    now = datetime.datetime.now()
+    raw = raw_block(0, n, seed=seed, start_date=now.date().isoformat(), end_date=now.date().isoformat())
+    raw["Violation_ID"] = [f"LIVE{counter + i:09d}" for i in range(n)]
+    raw["Time"] = now.strftime("%H:%M")
+    return json.loads(raw.to_json(orient="records"))
+
+
+def feed(target, rate, seconds=None, seed=None):
+    """Write `rate` synthetic events per second to a JSONL file or tcp:// address."""
+    import socket
+
+    seed = seed if seed is not None else int(time.time())
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        sock = socket.create_connection((host or "127.0.0.1", int(port)))
+        write, close = (lambda data: sock.sendall(data.encode("utf-8"))), sock.close
+    else:
+        out = open(target, "a", encoding="utf-8")
+        write, close = (lambda data: (out.write(data), out.flush())), out.close
+
+    sent, tick, deadline = 0, 0, time.monotonic() + seconds if seconds else None
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            events = live_events(rate, seed + tick, counter=sent)
+            write("".join(json.dumps(e) + "\n" for e in events))
+            sent += len(events)
+            tick += 1
+            print(f"\r{sent:,} events sent", end="", file=sys.stderr)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close()
+        print(file=sys.stderr)
+    return sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live violation events: feed a source or ingest from it")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_feed = sub.add_parser("feed", help="send synthetic live events")
+    p_feed.add_argument("target", help="JSONL file or tcp://host:port")
+    p_feed.add_argument("--rate", type=int, default=20, help="events per second")
+    p_feed.add_argument("--seconds", type=float, help="stop after this long (default: until Ctrl-C)")
+    p_feed.add_argument("--seed", type=int)
+
+    p_ingest = sub.add_parser("ingest", help="ingest from a source into a store and print each batch")
+    p_ingest.add_argument("source", help="JSONL file or tcp://host:port")
+    p_ingest.add_argument("--interval", type=float, default=1.0)
+    p_ingest.add_argument("--from-start", action="store_true", help="read a JSONL file from its first line")
+    args = parser.parse_args(argv)
+
+    if args.command == "feed":
+        feed(args.target, args.rate, args.seconds, args.seed)
+        return 0
+
+    from data_store import get_store
+
+    source = JsonlTail(args.source, from_start=True) if args.from_start else open_source(args.source)
+    ingestor = Ingestor(source, interval=args.interval)
+    store = get_store()
+    try:
+        while True:
+            appended = ingestor.poll()
+            if appended:
+                print(f"batch {ingestor.batches}: +{appended} rows, "
+                      f"{metrics.DATASET_ROWS.value():,} rows, version {store.version}")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        ingestor.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
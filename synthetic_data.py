@@ -0,0 +1,382 @@
+"""Seeded synthetic traffic-violation data with the dataset's schema, at any size.
+
+Rows are generated in fixed blocks of CHUNK_ROWS, each from its own seeded
+random stream, so a given (rows, seed) always yields the same data no matter
+how it is written. Dates are spread over the date range in row order, which
+keeps the output sorted by date like the published dataset.
+
+Unlike the published dataset, every row names its driver: Registration_Number
+and License_Number come from a seeded pool of drivers, most of whom are seen
+once or twice and a few habitual offenders many times, so that
+offender_index.py has real identities to link.
+
+    python synthetic_data.py --rows 1e6 --out synthetic/violations_1m
+    python synthetic_data.py --rows 1e8 --out synthetic/violations_100m --formats parquet
+    python synthetic_data.py --rows 1e5 --out synthetic/raw_100k --stage raw
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from generate_cleaned_data import conform_to_dataset, preprocess_data
+
+DEFAULT_SEED = 2023
+CHUNK_ROWS = 100_000
+START_DATE = "2023-01-01"
+END_DATE = "2025-12-31"
+
+# ==================================================
+# DISTRIBUTIONS
+# ==================================================
+# State mix (same states as the published dataset and the map)
+STATES = {
+    "Uttar Pradesh": 0.20, "Maharashtra": 0.17, "Delhi": 0.13, "Tamil Nadu": 0.11,
+    "West Bengal": 0.10, "Karnataka": 0.10, "Gujarat": 0.10, "Punjab": 0.09,
+}
+
+# Relative traffic by hour: morning and evening rush peaks, quiet nights
+HOUR_CURVE = np.array([
+    0.9, 0.6, 0.4, 0.3, 0.3, 0.6, 1.4, 2.6, 3.8, 3.6, 2.8, 2.4,
+    2.5, 2.4, 2.3, 2.5, 3.0, 3.7, 4.0, 3.5, 2.6, 2.0, 1.6, 1.2,
+])
+
+# Violation mix and fine range (min, max) per violation type
+VIOLATIONS = {
+    "No Helmet": (0.18, 500, 1500),
+    "Over-speeding": (0.16, 1000, 4000),
+    "Signal Jumping": (0.13, 1000, 3000),
+    "No Seatbelt": (0.11, 500, 1500),
+    "Wrong Parking": (0.12, 100, 1000),
+    "Using Mobile Phone": (0.09, 1000, 5000),
+    "Driving Without License": (0.07, 2500, 5000),
+    "Overloading": (0.06, 2000, 5000),
+    "Drunk Driving": (0.08, 3000, 5000),
+}
+
+# Vehicle mix; helmets apply to two-wheelers, seatbelts to four-plus wheelers
+VEHICLES = {"Bike": 0.30, "Scooter": 0.20, "Car": 0.22, "Auto Rickshaw": 0.12, "Truck": 0.09, "Bus": 0.07}
+TWO_WHEELERS = ["Bike", "Scooter"]
+SEATBELT_VEHICLES = ["Car", "Truck", "Bus"]
+LICENSE_FOR_VEHICLE = {
+    "Bike": "Two-Wheeler", "Scooter": "Two-Wheeler", "Car": "Four-Wheeler",
+    "Auto Rickshaw": "Commercial", "Truck": "Heavy Vehicle", "Bus": "Heavy Vehicle",
+}
+MAX_PASSENGERS = {"Bike": 2, "Scooter": 2, "Car": 4, "Auto Rickshaw": 3, "Truck": 2, "Bus": 5}
+
+COLORS = {"White": 0.24, "Silver": 0.16, "Black": 0.15, "Grey": 0.13, "Red": 0.10, "Blue": 0.10, "Yellow": 0.07, "Green": 0.05}
+GENDERS = {"Male": 0.82, "Female": 0.16, "Other": 0.02}
+AGENCIES = ["Traffic Police", "RTO", "Highway Patrol", "Local Police"]
+SPEED_LIMITS = [30, 40, 50, 60, 80, 100]
+ROADS = ["Dry", "Wet", "Slippery", "Potholes", "Under Construction"]
+PAYMENT_METHODS = ["Cash", "Card", "Online"]
+
+# Weather weights per month (Clear, Cloudy, Rainy, Foggy, Dust Storm)
+WEATHER = ["Clear", "Cloudy", "Rainy", "Foggy", "Dust Storm"]
+WEATHER_BY_MONTH = {
+    1: [0.50, 0.15, 0.03, 0.30, 0.02], 2: [0.60, 0.15, 0.05, 0.18, 0.02],
+    3: [0.65, 0.15, 0.05, 0.05, 0.10], 4: [0.60, 0.12, 0.05, 0.01, 0.22],
+    5: [0.55, 0.12, 0.08, 0.00, 0.25], 6: [0.30, 0.25, 0.35, 0.00, 0.10],
+    7: [0.15, 0.30, 0.55, 0.00, 0.00], 8: [0.15, 0.30, 0.55, 0.00, 0.00],
+    9: [0.25, 0.30, 0.45, 0.00, 0.00], 10: [0.60, 0.20, 0.15, 0.05, 0.00],
+    11: [0.60, 0.15, 0.05, 0.20, 0.00], 12: [0.45, 0.15, 0.02, 0.38, 0.00],
+}
+
+# Officers: a fixed pool, each attached to one agency, a few far busier than the rest
+OFFICER_POOL = 9000
+
+# Drivers: each row's driver is drawn from a pool of DRIVERS_PER_ROW drivers per
+# row, or for HABITUAL_SHARE of the rows from its first HABITUAL_PER_ROW per row
+# only. About half the drivers are then seen once and the busiest around 15
+# times, at any size.
+DRIVERS_PER_ROW = 0.75
+HABITUAL_PER_ROW = 0.04
+HABITUAL_SHARE = 0.2
+STATE_CODES = {
+    "Uttar Pradesh": "UP", "Maharashtra": "MH", "Delhi": "DL", "Tamil Nadu": "TN",
+    "West Bengal": "WB", "Karnataka": "KA", "Gujarat": "GJ", "Punjab": "PB",
+}
+
+
+def _officer_weights(seed):
+    """Share of cases booked by each officer (same for every block of a seed)."""
+    weights = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(0,))).gamma(0.6, 1.0, OFFICER_POOL)
+    return weights / weights.sum()
+
+
+def _driver_bits(drivers, seed):
+    """Stable random bits of each driver number (splitmix64), the same in every block."""
+    with np.errstate(over="ignore"):
+        z = drivers.astype("uint64") + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _drivers(rng, rows, n, seed):
+    """Driver of each of `n` rows: home state, Registration_Number and License_Number."""
+    pool = np.where(rng.random(n) < HABITUAL_SHARE, max(1, int(rows * HABITUAL_PER_ROW)),
+                    max(1, int(rows * DRIVERS_PER_ROW)))
+    driver = (rng.random(n) * pool).astype("int64")
+    bits = _driver_bits(driver, seed)
+    share = (bits >> np.uint64(11)).astype("float64") / 2.0 ** 53
+    home = np.asarray(list(STATES), dtype=object)[
+        np.minimum(np.searchsorted(np.cumsum(_probs(STATES.values())), share), len(STATES) - 1)]
+    codes = pd.Series(home).map(STATE_CODES).tolist()
+    rto = (bits % np.uint64(60) + np.uint64(1)).tolist()
+    letters = (bits >> np.uint64(8)) % np.uint64(676)
+    plate = ((bits >> np.uint64(20)) % np.uint64(10000)).tolist()
+    issued = ((bits >> np.uint64(40)) % np.uint64(25) + np.uint64(2000)).tolist()
+    registration = [
+        f"{code}{r:02d}{chr(65 + int(l) // 26)}{chr(65 + int(l) % 26)}{p:04d}"
+        for code, r, l, p in zip(codes, rto, letters, plate)
+    ]
+    # The driver number keeps licence numbers distinct
+    licence = [f"{code}{r:02d}{y}{d:09d}" for code, r, y, d in zip(codes, rto, issued, driver.tolist())]
+    return home, registration, licence
+
+
+def _probs(weights):
+    p = np.asarray(list(weights), dtype="float64")
+    return p / p.sum()
+
+
+def _choice(rng, options, weights, n):
+    return np.asarray(list(options), dtype=object)[rng.choice(len(options), size=n, p=_probs(weights))]
+
+
+# ==================================================
+# DATES
+# ==================================================
+def _day_weights(days):
+    """Relative volume per day: weekday/weekend, festive season and yearly growth."""
+    weekday = np.where(days.dayofweek < 5, 1.0, 0.8)
+    season = np.where(days.month.isin([10, 11, 12]), 1.15, 1.0)
+    growth = 1.0 + 0.08 * (days.year - days.year.min())
+    return weekday * season * growth
+
+
+def _row_dates(rows, start, stop, start_date, end_date):
+    """Dates for rows [start, stop) of `rows`, spread over the range in row order."""
+    days = pd.date_range(start_date, end_date, freq="D")
+    cumulative = np.cumsum(_day_weights(days))
+    boundaries = cumulative / cumulative[-1] * rows
+    index = np.searchsorted(boundaries, np.arange(start, stop), side="right")
+    return days[np.minimum(index, len(days) - 1)]
+
+
+# ==================================================
+# RAW BLOCK
+# ==================================================
+def raw_block(block, rows, seed=DEFAULT_SEED, start_date=START_DATE, end_date=END_DATE):
+    """Raw (pre-cleaning) rows of block number `block` out of `rows` total rows."""
+    start = block * CHUNK_ROWS
+    stop = min(start + CHUNK_ROWS, rows)
+    n = stop - start
+    rng = np.random.default_rng([seed, block])
+
+    dates = _row_dates(rows, start, stop, start_date, end_date)
+    months = dates.month.to_numpy()
+
+    # Latent driver risk drives repeat offences, alcohol and licence problems together
+    risk = rng.normal(size=n)
+
+    violation = _choice(rng, VIOLATIONS, [v[0] for v in VIOLATIONS.values()], n)
+    # High-risk drivers are over-represented among drunk-driving cases
+    violation[rng.random(n) < 0.06 * np.clip(risk, 0, None)] = "Drunk Driving"
+    fine_min = pd.Series(violation).map({k: v[1] for k, v in VIOLATIONS.items()}).to_numpy()
+    fine_max = pd.Series(violation).map({k: v[2] for k, v in VIOLATIONS.items()}).to_numpy()
+    fine = np.round(fine_min + rng.beta(2, 3, n) * (fine_max - fine_min)).astype("int64")
+
+    # Drivers are registered in their home state and mostly caught there
+    home, registration_number, licence_number = _drivers(rng, rows, n, seed)
+    registration = home
+    location = np.where(rng.random(n) < 0.85, home, _choice(rng, STATES, STATES.values(), n))
+
+    hour = rng.choice(24, size=n, p=_probs(HOUR_CURVE))
+    # Drunk driving clusters late at night
+    drunk = violation == "Drunk Driving"
+    hour[drunk] = rng.choice([21, 22, 23, 0, 1, 2, 3], size=int(drunk.sum()))
+    minute = rng.integers(0, 60, n)
+    time = pd.Series(hour).astype(str).str.zfill(2) + ":" + pd.Series(minute).astype(str).str.zfill(2)
+
+    vehicle = _choice(rng, VEHICLES, VEHICLES.values(), n)
+    vehicle = np.where(violation == "No Helmet", _choice(rng, TWO_WHEELERS, [0.6, 0.4], n), vehicle)
+    vehicle = np.where(violation == "No Seatbelt", _choice(rng, SEATBELT_VEHICLES, [0.7, 0.2, 0.1], n), vehicle)
+    vehicle = np.where(violation == "Overloading", _choice(rng, ["Truck", "Auto Rickshaw", "Bus"], [0.6, 0.3, 0.1], n), vehicle)
+    two_wheeler = np.isin(vehicle, TWO_WHEELERS)
+    belted = np.isin(vehicle, SEATBELT_VEHICLES)
+
+    age = np.clip(18 + rng.gamma(2.2, 8.0, n), 18, 75).astype("int64")
+    model_year = np.clip(dates.year.to_numpy() - rng.gamma(2.0, 3.5, n).astype("int64"), 1995, None)
+
+    previous = np.clip(rng.poisson(np.exp(0.8 * risk - 0.5)), 0, 5)
+    licence_type = pd.Series(vehicle).map(LICENSE_FOR_VEHICLE).to_numpy()
+    licence_type = np.where(rng.random(n) < 0.08, "Learner", licence_type)
+    suspended_p = 1 / (1 + np.exp(-(-2.6 + 0.9 * risk)))
+    validity = np.where(rng.random(n) < suspended_p, "Suspended",
+                        np.where(rng.random(n) < 0.12, "Expired", "Valid"))
+    validity = np.where(violation == "Driving Without License",
+                        _choice(rng, ["Expired", "Suspended"], [0.6, 0.4], n), validity)
+
+    # Alcohol: drunk-driving cases are over the limit; risky drivers sometimes had a
+    # drink, which is only on record when a breathalyzer test was done
+    drinking = rng.random(n) < 1 / (1 + np.exp(-(-2.2 + 1.2 * risk)))
+    tested = drunk | (drinking & (rng.random(n) < 0.6)) | (rng.random(n) < 0.2)
+    alcohol = np.where(drunk, rng.uniform(0.08, 0.5, n),
+                       np.where(drinking & tested, rng.uniform(0.01, 0.08, n), 0.0)).round(2)
+    breath = np.where(~tested, "N/A", np.where(alcohol > 0.03, "Positive", "Negative"))
+
+    helmet = np.where(two_wheeler, np.where(rng.random(n) < 0.75, "Yes", "No"), "N/A")
+    helmet = np.where(violation == "No Helmet", "No", helmet)
+    seatbelt = np.where(belted, np.where(rng.random(n) < 0.7, "Yes", "No"), "N/A")
+    seatbelt = np.where(violation == "No Seatbelt", "No", seatbelt)
+
+    speed_limit = rng.choice(SPEED_LIMITS, size=n)
+    over = violation == "Over-speeding"
+    recorded = np.where(over, speed_limit + rng.integers(5, 61, n),
+                        speed_limit + rng.normal(-5, 12, n)).clip(10, 180).astype("int64")
+
+    light = np.where(violation == "Signal Jumping", _choice(rng, ["Red", "Yellow"], [0.85, 0.15], n),
+                     _choice(rng, ["Green", "Red", "Yellow"], [0.6, 0.3, 0.1], n))
+    towed = np.where(rng.random(n) < np.where(violation == "Wrong Parking", 0.4, 0.04), "Yes", "No")
+    paid = rng.random(n) < 0.62
+    method = np.where(paid, _choice(rng, PAYMENT_METHODS, [0.35, 0.25, 0.40], n), "Not Paid")
+    court = np.where(rng.random(n) < np.where(drunk | (fine >= 4000), 0.7, 0.15), "Yes", "No")
+    comments = np.where(previous > 0, np.where(rng.random(n) < 0.6, "Repeat Offender", "N/A"),
+                        np.where(rng.random(n) < 0.5, "First Violation", "N/A"))
+    comments = np.where(paid & (method == "Cash") & (rng.random(n) < 0.5), "Fine Paid On Spot", comments)
+
+    officer = rng.choice(OFFICER_POOL, size=n, p=_officer_weights(seed))
+
+    weather = np.empty(n, dtype=object)
+    for month, weights in WEATHER_BY_MONTH.items():
+        mask = months == month
+        weather[mask] = _choice(rng, WEATHER, weights, int(mask.sum()))
+    wet = np.isin(weather, ["Rainy"])
+    road = np.where(wet, _choice(rng, ["Wet", "Slippery", "Potholes"], [0.5, 0.3, 0.2], n),
+                    _choice(rng, ROADS, [0.55, 0.05, 0.05, 0.2, 0.15], n))
+
+    passengers = np.minimum(1 + rng.poisson(0.8, n), pd.Series(vehicle).map(MAX_PASSENGERS).to_numpy())
+
+    return pd.DataFrame({
+        "Violation_ID": ["VLT" + str(100000 + i) for i in range(start, stop)],
+        "Violation_Type": violation,
+        "Fine_Amount": fine,
+        "Location": location,
+        # Raw files use day-first dates, the first format preprocess_data tries
+        "Date": dates.strftime("%d-%m-%Y"),
+        "Time": time.to_numpy(),
+        "Vehicle_Type": vehicle,
+        "Vehicle_Color": _choice(rng, COLORS, COLORS.values(), n),
+        "Vehicle_Model_Year": model_year,
+        "Registration_State": registration,
+        "Registration_Number": registration_number,
+        "Driver_Age": age,
+        "Driver_Gender": _choice(rng, GENDERS, GENDERS.values(), n),
+        "License_Type": licence_type,
+        "License_Number": licence_number,
+        "Penalty_Points": np.clip(np.round(fine / 500 + rng.normal(0, 1, n)), 0, 10).astype("int64"),
+        "Weather_Condition": weather,
+        "Road_Condition": road,
+        "Officer_ID": ["OFF" + str(1000 + o) for o in officer],
+        "Issuing_Agency": np.asarray(AGENCIES, dtype=object)[officer % len(AGENCIES)],
+        "License_Validity": validity,
+        "Number_of_Passengers": passengers.astype("int64"),
+        "Helmet_Worn": helmet,
+        "Seatbelt_Worn": seatbelt,
+        "Traffic_Light_Status": light,
+        "Speed_Limit": speed_limit,
+        "Recorded_Speed": recorded,
+        "Alcohol_Level": alcohol,
+        "Breathalyzer_Result": breath,
+        "Towed": towed,
+        "Fine_Paid": np.where(paid, "Yes", "No"),
+        "Payment_Method": method,
+        "Court_Appearance_Required": court,
+        "Previous_Violations": previous.astype("int64"),
+        "Comments": comments,
+    })
+
+
+def cleaned_block(block, rows, seed=DEFAULT_SEED, start_date=START_DATE, end_date=END_DATE):
+    """Block `block` cleaned with preprocess_data and conformed to the dataset."""
+    raw = raw_block(block, rows, seed, start_date, end_date)
+    # Vehicle_Age is measured from the last year of the whole range, not the block
+    return conform_to_dataset(preprocess_data(raw), reference_year=pd.Timestamp(end_date).year)
+
+
+# ==================================================
+# PUBLIC API
+# ==================================================
+def iter_chunks(rows, seed=DEFAULT_SEED, stage="cleaned", start_date=START_DATE, end_date=END_DATE):
+    """Yield the dataset as DataFrames of up to CHUNK_ROWS rows."""
+    make = cleaned_block if stage == "cleaned" else raw_block
+    for block in range(-(-rows // CHUNK_ROWS)):
+        yield make(block, rows, seed, start_date, end_date)
+
+
+def generate(rows, seed=DEFAULT_SEED, stage="cleaned", start_date=START_DATE, end_date=END_DATE):
+    """The whole dataset as one DataFrame (for sizes that fit in memory)."""
+    return pd.concat(list(iter_chunks(rows, seed, stage, start_date, end_date)), ignore_index=True)
+
+
+def write_dataset(path, rows, seed=DEFAULT_SEED, stage="cleaned", formats=("csv", "parquet"),
+                  start_date=START_DATE, end_date=END_DATE, progress=None):
+    """Write `rows` synthetic rows to `path`.csv / `path`.parquet chunk by chunk.
+
+    Memory use is bounded by one chunk whatever the size. Returns the paths
+    written. `progress(rows_done, rows)` is called after every chunk.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    paths = {fmt: f"{path}.{fmt}" for fmt in formats}
+    writer = None
+    schema = None
+    done = 0
+    try:
+        for i, chunk in enumerate(iter_chunks(rows, seed, stage, start_date, end_date)):
+            if "csv" in paths:
+                chunk.to_csv(paths["csv"], mode="w" if i == 0 else "a", header=i == 0, index=False)
+            if "parquet" in paths:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if schema is None:
+                    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                    writer = pq.ParquetWriter(paths["parquet"], schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            done += len(chunk)
+            if progress:
+                progress(done, rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return list(paths.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic traffic-violation data")
+    parser.add_argument("--rows", default="1e4", help="number of rows, e.g. 1e6")
+    parser.add_argument("--out", required=True, help="output path without extension")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--stage", choices=["cleaned", "raw"], default="cleaned")
+    parser.add_argument("--formats", nargs="+", choices=["csv", "parquet"], default=["csv", "parquet"])
+    parser.add_argument("--start-date", default=START_DATE)
+    parser.add_argument("--end-date", default=END_DATE)
+    args = parser.parse_args(argv)
+
+    rows = int(float(args.rows))
+
+    def progress(done, total):
+        print(f"\r{done:,} / {total:,} rows", end="", flush=True)
+
+    paths = write_dataset(args.out, rows, args.seed, args.stage, args.formats,
+                          args.start_date, args.end_date, progress)
+    print()
+    for path in paths:
+        print(f"✓ {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""Violation counts and fine sums pre-bucketed by time, as a DataStore aggregate.
+
+TimeSeriesEngine keeps, for each granularity it is asked for (minute, hour,
+day, month), a dense array with one row per time bucket from the first to
+the last bucket seen, optionally split into one column per Violation_Type
+or Location. A bucket is its datetime64 number (minutes, hours, days or
+months since 1970-01), so a bucket's row is `bucket - start` and the arrays
+answer trend queries without touching the rows:
+
+    series(...)          counts, fines or average fine per bucket
+    rolling(window)      sums over the last `window` buckets (cumulative sums)
+    year_over_year()     each bucket against the same bucket a year earlier
+    by("hour"), ...      folded by hour of day, weekday, month or year
+
+The state is built once per dataset and merged with each appended batch into
+a new state, which DataStore.append publishes in its final swap. Rows without
+a Date are left out; rows without a Time (or Hour) are in the day and month
+buckets only.
+
+    python time_series.py --granularity month --rolling 3
+    python time_series.py --granularity day --breakdown Violation_Type --yoy
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+GRANULARITIES = ("minute", "hour", "day", "month")
+# numpy datetime64 unit of each granularity; bucket numbers are in this unit
+UNITS = {"minute": "m", "hour": "h", "day": "D", "month": "M"}
+BREAKDOWNS = ("Violation_Type", "Location")
+MEASURES = ("violations", "fines", "avg_fine")
+# Calendar parts buckets can be folded by; each needs buckets at least this fine
+PARTS = {"hour": "hour", "weekday": "day", "month": "month", "year": "month"}
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Column of the totals when there is no breakdown
+TOTAL = "All"
+EPOCH = pd.Timestamp("1970-01-01")
+
+
+def _measure(counts, fines, measure):
+    if measure == "violations":
+        return counts
+    if measure == "fines":
+        return fines
+    if measure == "avg_fine":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(counts > 0, fines / counts, np.nan)
+    raise ValueError(f"unknown measure {measure!r}; expected one of {MEASURES}")
+
+
+def _parsed(values, parse):
+    """parse() of each distinct value only; dates and times repeat heavily."""
+    codes, uniques = pd.factorize(values)
+    if not len(uniques):
+        return np.full(len(codes), np.nan)
+    parsed = parse(pd.Series(uniques, dtype=object)).to_numpy()
+    return np.where(codes >= 0, parsed[codes], np.nan)
+
+
+def row_times(df):
+    """(days since 1970-01-01, minute of the day) of each row, NaN where unknown."""
+    if "Date" not in df.columns:
+        missing = np.full(len(df), np.nan)
+        return missing, missing
+
+    def day_number(s):
+        return (pd.to_datetime(s, errors="coerce").dt.normalize() - EPOCH).dt.days.astype(float)
+
+    date = df["Date"]
+    if pd.api.types.is_datetime64_any_dtype(date):
+        days = day_number(date).to_numpy()
+    else:
+        days = _parsed(date, day_number)
+
+    minutes = np.full(len(df), np.nan)
+    if "Time" in df.columns:
+        def minute_of_day(s):
+            parsed = pd.to_datetime(s, format="%H:%M", errors="coerce")
+            return (parsed.dt.hour * 60 + parsed.dt.minute).astype(float)
+        minutes = _parsed(df["Time"], minute_of_day)
+    if "Hour" in df.columns:
+        hours = pd.to_numeric(df["Hour"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        minutes = np.where(np.isnan(minutes), hours * 60, minutes)
+    minutes[(minutes < 0) | (minutes >= 1440)] = np.nan
+    return days, minutes
+
+
+def buckets_of(days, minutes, granularity):
+    """Bucket number of each row at `granularity`, -1 where the row has no such bucket."""
+    known = ~np.isnan(days)
+    if granularity in ("minute", "hour"):
+        known &= ~np.isnan(minutes)
+    day = np.where(known, days, 0).astype("int64")
+    if granularity == "day":
+        buckets = day
+    elif granularity == "month":
+        buckets = day.astype("datetime64[D]").astype("datetime64[M]").astype("int64")
+    else:
+        minute = day * 1440 + np.where(known, minutes, 0).astype("int64")
+        buckets = minute if granularity == "minute" else minute // 60
+    return np.where(known, buckets, -1)
+
+
+class Buckets:
+    """Counts and fine sums per bucket of one granularity, one column per category.
+
+    Rows cover buckets start .. start + len - 1; the arrays grow (with spare
+    rows at the end, where streamed rows arrive) when a batch falls outside.
+    add() and _cover() change the object, so they are only called on Buckets
+    nothing else reads yet; merge() returns a new one.
+    """
+
+    def __init__(self, granularity, breakdown=None):
+        self.granularity = granularity
+        self.unit = UNITS[granularity]
+        self.breakdown = breakdown
+        self.categories = [] if breakdown else [TOTAL]
+        self._columns = {TOTAL: 0} if breakdown is None else {}
+        self.start = 0
+        self._len = 0
+        self._counts = np.zeros((0, len(self.categories)), dtype="int64")
+        self._fines = np.zeros((0, len(self.categories)))
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def counts(self):
+        return self._counts[:self._len, :len(self.categories)]
+
+    @property
+    def fines(self):
+        return self._fines[:self._len, :len(self.categories)]
+
+    @property
+    def buckets(self):
+        return np.arange(self.start, self.start + self._len)
+
+    def labels(self, buckets=None):
+        """Start time of each bucket (all when None) as a DatetimeIndex."""
+        buckets = self.buckets if buckets is None else np.asarray(buckets)
+        return pd.DatetimeIndex(buckets.astype(f"datetime64[{self.unit}]").astype("datetime64[ns]"),
+                                name=self.granularity)
+
+    def columns_of(self, keys):
+        """Column of each of `keys`, adding columns for new categories."""
+        lookup = self._columns
+        columns = np.empty(len(keys), dtype="int64")
+        for i, key in enumerate(keys):
+            column = lookup.get(key)
+            if column is None:
+                column = lookup[key] = len(self.categories)
+                self.categories.append(key)
+            columns[i] = column
+        return columns
+
+    def _cover(self, lo, hi):
+        """Grow the arrays to hold buckets lo..hi and all categories."""
+        start = min(self.start, lo) if self._len else lo
+        stop = max(self.start + self._len, hi + 1) if self._len else hi + 1
+        width = len(self.categories)
+        rows, capacity = self._counts.shape
+        if start == self.start and stop - start <= rows and width <= capacity:
+            self._len = max(self._len, stop - start)
+            return
+        # Spare rows for later buckets and spare columns for new categories
+        rows = max(stop - start, 2 * rows if start == self.start else 0)
+        capacity = max(width, 2 * capacity if width > capacity else capacity)
+        counts, fines = np.zeros((rows, capacity), dtype="int64"), np.zeros((rows, capacity))
+        if self._len:
+            offset = self.start - start
+            counts[offset:offset + self._len, :self._counts.shape[1]] = self._counts[:self._len]
+            fines[offset:offset + self._len, :self._fines.shape[1]] = self._fines[:self._len]
+        self._counts, self._fines = counts, fines
+        self.start, self._len = start, stop - start
+
+    def add(self, buckets, columns, counts, fines):
+        """Add `counts` and `fines` to the (bucket, column) cells; pairs may repeat."""
+        if not len(buckets):
+            return self
+        self._cover(int(buckets.min()), int(buckets.max()))
+        rows = buckets - self.start
+        np.add.at(self._counts, (rows, columns), counts)
+        np.add.at(self._fines, (rows, columns), fines)
+        return self
+
+    def copy(self):
+        buckets = Buckets(self.granularity, self.breakdown)
+        buckets.categories, buckets._columns = list(self.categories), dict(self._columns)
+        buckets.start, buckets._len = self.start, self._len
+        buckets._counts, buckets._fines = self.counts.copy(), self.fines.copy()
+        return buckets
+
+    def merge(self, other):
+        """A new Buckets with `other`'s buckets (same granularity and breakdown) added to this one's."""
+        merged = self.copy()
+        if len(other):
+            columns = merged.columns_of(other.categories)
+            merged._cover(other.start, other.start + len(other) - 1)
+            rows = slice(other.start - merged.start, other.start - merged.start + len(other))
+            merged._counts[rows, columns] += other.counts
+            merged._fines[rows, columns] += other.fines
+        return merged
+
+    # ---------------- QUERIES ----------------
+    def _select(self, categories):
+        if categories is None:
+            return slice(None), list(self.categories)
+        return [self._columns[c] for c in categories if c in self._columns], \
+            [c for c in categories if c in self._columns]
+
+    def _window(self, start, stop):
+        """Rows of the buckets starting at or after `start` and before `stop` (datetimes or None)."""
+        lo = 0 if start is None else np.datetime64(pd.Timestamp(start), self.unit).astype("int64") - self.start
+        hi = self._len if stop is None else np.datetime64(pd.Timestamp(stop), self.unit).astype("int64") - self.start
+        return slice(int(np.clip(lo, 0, self._len)), int(np.clip(hi, 0, self._len)))
+
+    def values(self, measure="violations", categories=None, start=None, stop=None, total=False):
+        """(labels, values) of `measure` per bucket, one column per category or summed when `total`."""
+        rows = self._window(start, stop)
+        columns, _ = self._select(categories)
+        counts, fines = self.counts[rows][:, columns], self.fines[rows][:, columns]
+        if total:
+            counts, fines = counts.sum(axis=1, keepdims=True), fines.sum(axis=1, keepdims=True)
+        return self.buckets[rows], _measure(counts, fines, measure)
+
+    def series(self, measure="violations", categories=None, start=None, stop=None, total=False):
+        """DataFrame of `measure` per bucket between `start` and `stop`, one column per category."""
+        _, names = self._select(categories)
+        buckets, values = self.values(measure, categories, start, stop, total)
+        return pd.DataFrame(values, index=self.labels(buckets), columns=[TOTAL] if total else names)
+
+    def rolling(self, window, measure="violations", categories=None, total=False, mean=False):
+        """Sum (or mean) of `measure` over each bucket and the `window` - 1 before it.
+
+        The first `window` - 1 buckets are NaN, as with DataFrame.rolling.
+        """
+        if window < 1:
+            raise ValueError("window must be at least one bucket")
+        if measure == "avg_fine":
+            counts, fines = (self.rolling(window, m, categories, total) for m in ("violations", "fines"))
+            return fines / counts.where(counts > 0)
+        buckets, values = self.values(measure, categories, total=total)
+        sums = np.cumsum(values, axis=0, dtype=float)
+        sums[window:] -= sums[:-window].copy()
+        sums[:window - 1] = np.nan
+        if mean:
+            sums /= window
+        _, names = self._select(categories)
+        return pd.DataFrame(sums, index=self.labels(buckets), columns=[TOTAL] if total else names)
+
+    def year_ago(self, buckets=None):
+        """Bucket a year before each bucket (29 February falls back to the 28th)."""
+        buckets = self.buckets if buckets is None else np.asarray(buckets)
+        if self.granularity == "month":
+            return buckets - 12
+        per_day = {"day": 1, "hour": 24, "minute": 1440}[self.granularity]
+        days, within = np.divmod(buckets, per_day)
+        dates = days.astype("datetime64[D]")
+        months = dates.astype("datetime64[M]")
+        day_of_month = (dates - months.astype("datetime64[D]")).astype("int64")
+        earlier = (months - 12).astype("datetime64[D]")
+        month_length = ((months - 11).astype("datetime64[D]") - earlier).astype("int64")
+        days = (earlier.astype("int64") + np.minimum(day_of_month, month_length - 1))
+        return days * per_day + within
+
+    def year_over_year(self, measure="violations", categories=None, total=True):
+        """`measure` per bucket next to the same bucket a year earlier, with the change.
+
+        Previous values before the first bucket are NaN.
+        """
+        buckets, values = self.values(measure, categories, total=total)
+        rows = self.year_ago(buckets) - self.start
+        known = rows >= 0
+        previous = np.full(values.shape, np.nan)
+        previous[known] = values[rows[known]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_pct = np.where(previous != 0, (values - previous) / previous * 100, np.nan)
+        columns = {"Current": values, "Previous": previous, "Change": values - previous, "Change_Pct": change_pct}
+        index = self.labels(buckets)
+        if total:
+            return pd.DataFrame({name: column[:, 0] for name, column in columns.items()}, index=index)
+        # One column per (figure, category) otherwise
+        _, names = self._select(categories)
+        return pd.concat({name: pd.DataFrame(column, index=index, columns=names)
+                          for name, column in columns.items()}, axis=1)
+
+    def part(self, name, buckets=None):
+        """Calendar part of each bucket: hour (0-23), weekday (0 = Monday), month (1-12) or year."""
+        buckets = self.buckets if buckets is None else np.asarray(buckets)
+        needed = PARTS[name]
+        if GRANULARITIES.index(self.granularity) > GRANULARITIES.index(needed):
+            raise ValueError(f"{self.granularity} buckets have no {name}")
+        if name == "hour":
+            return (buckets // {"minute": 60, "hour": 1}[self.granularity]) % 24
+        if self.granularity == "month":
+            return buckets % 12 + 1 if name == "month" else buckets // 12 + 1970
+        per_day = {"day": 1, "hour": 24, "minute": 1440}[self.granularity]
+        days = buckets // per_day
+        if name == "weekday":
+            # 1970-01-01 was a Thursday
+            return (days + 3) % 7
+        months = days.astype("datetime64[D]").astype("datetime64[M]").astype("int64")
+        return months % 12 + 1 if name == "month" else months // 12 + 1970
+
+    def by(self, part, measure="violations", categories=None, mask=None, total=False):
+        """`measure` folded by calendar `part` (see part()), over the buckets where `mask` is True."""
+        columns, names = self._select(categories)
+        counts, fines, keys = self.counts[:, columns], self.fines[:, columns], self.part(part)
+        if mask is not None:
+            counts, fines, keys = counts[mask], fines[mask], keys[mask]
+        if total:
+            counts, fines, names = counts.sum(axis=1, keepdims=True), fines.sum(axis=1, keepdims=True), [TOTAL]
+        index, keys = np.unique(keys, return_inverse=True)
+        folded_counts = np.zeros((len(index), counts.shape[1]), dtype="int64")
+        folded_fines = np.zeros((len(index), counts.shape[1]))
+        np.add.at(folded_counts, keys, counts)
+        np.add.at(folded_fines, keys, fines)
+        return pd.DataFrame(_measure(folded_counts, folded_fines, measure),
+                            index=pd.Index(index, name=part.title()), columns=names)
+
+
+class TimeSeriesState:
+    """Buckets per granularity; merge() returns a new state and leaves this one untouched."""
+
+    def __init__(self, granularities, breakdown=None):
+        self.breakdown = breakdown
+        self.granularities = {g: Buckets(g, breakdown) for g in granularities}
+
+    def __getitem__(self, granularity):
+        return self.granularities[granularity]
+
+    def merge(self, other):
+        merged = TimeSeriesState((), self.breakdown)
+        merged.granularities = {granularity: buckets.merge(other.granularities[granularity])
+                                for granularity, buckets in self.granularities.items()}
+        return merged
+
+    @property
+    def rows(self):
+        coarsest = self.granularities[max(self.granularities, key=GRANULARITIES.index)]
+        return int(coarsest.counts.sum())
+
+
+class TimeSeriesEngine:
+    """Pre-bucketed time series of counts and fine sums, as a DataStore aggregate.
+
+    Keep the granularities to those a page reads: minute buckets of a
+    decade-long dataset are five million rows per category.
+    """
+
+    def __init__(self, granularities=("hour", "day", "month"), breakdown=None, name="time series"):
+        unknown = set(granularities) - set(GRANULARITIES)
+        if unknown:
+            raise ValueError(f"unknown granularities {sorted(unknown)}; expected some of {GRANULARITIES}")
+        if breakdown is not None and breakdown not in BREAKDOWNS:
+            raise ValueError(f"breakdown must be one of {BREAKDOWNS}, not {breakdown!r}")
+        self.granularities = tuple(g for g in GRANULARITIES if g in granularities)
+        self.breakdown = breakdown
+        self.name = name
+        self.columns = ["Date", "Time", "Hour", "Fine_Amount"] + ([breakdown] if breakdown else [])
+
+    def accumulate(self, df):
+        days, minutes = row_times(df)
+        fines = pd.to_numeric(df["Fine_Amount"], errors="coerce").to_numpy(dtype=float, na_value=0.0) \
+            if "Fine_Amount" in df.columns else np.zeros(len(df))
+        state = TimeSeriesState(self.granularities, self.breakdown)
+        if self.breakdown:
+            codes, categories = pd.factorize(df[self.breakdown])
+        else:
+            codes, categories = np.zeros(len(df), dtype="int64"), [TOTAL]
+        for granularity, target in state.granularities.items():
+            buckets = buckets_of(days, minutes, granularity)
+            keep = (buckets >= 0) & (codes >= 0)
+            if not keep.any():
+                continue
+            columns = target.columns_of(list(categories))
+            # One (bucket, category) cell per distinct pair, then a single add
+            lo = buckets[keep].min()
+            cells = (buckets[keep] - lo) * len(categories) + codes[keep]
+            cells, inverse = np.unique(cells, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(cells))
+            sums = np.bincount(inverse, weights=np.nan_to_num(fines[keep]), minlength=len(cells))
+            target.add(cells // len(categories) + lo, columns[cells % len(categories)], counts, sums)
+        return state
+
+
+# ==================================================
+# CLI
+# ==================================================
+def main(argv=None):
+    from data_store import DATA_PATH, DataStore
+
+    parser = argparse.ArgumentParser(description="Pre-bucketed violation time series")
+    parser.add_argument("--data", default=DATA_PATH, help="dataset CSV or partitioned directory")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="month")
+    parser.add_argument("--breakdown", choices=BREAKDOWNS)
+    parser.add_argument("--measure", choices=MEASURES, default="violations")
+    parser.add_argument("--rolling", type=int, metavar="N", help="sum over the last N buckets")
+    parser.add_argument("--yoy", action="store_true", help="compare with the same bucket a year earlier")
+    parser.add_argument("--tail", type=int, default=24, help="buckets shown")
+    args = parser.parse_args(argv)
+
+    store = DataStore(args.data)
+    start = time.perf_counter()
+    state = store.aggregate(TimeSeriesEngine([args.granularity], args.breakdown))
+    buckets = state[args.granularity]
+    print(f"{state.rows:,} violations in {len(buckets):,} {args.granularity} buckets "
+          f"({time.perf_counter() - start:.1f}s)\n")
+    if args.yoy:
+        result = buckets.year_over_year(args.measure, total=not args.breakdown)
+    elif args.rolling:
+        result = buckets.rolling(args.rolling, args.measure)
+    else:
+        result = buckets.series(args.measure)
+    print(result.tail(args.tail).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
-import pandas as pd
 import streamlit as st
 import os
 
-def load_data():
-    df = pd.read_csv("Indian_Traffic_Violations_Dataset.csv")
+def load_data(path="Indian_Traffic_Violations_Dataset.csv"):
+    import pandas as pd
+
+    df = pd.read_csv(path)
 
     if 'Date' in df.columns:
         df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
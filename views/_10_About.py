@@ -1,5 +1,8 @@
 import streamlit as st
 
+# About does not read the dataset
+REQUIRED_COLUMNS = []
+
 def app(df):
     from utils import load_global_css
     load_global_css()
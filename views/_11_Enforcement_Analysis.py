@@ -0,0 +1,140 @@
+import streamlit as st
+import seaborn as sns
+import matplotlib.pyplot as plt
+
+from data_store import get_store
+from enforcement import HOURS, MEASURES, EnforcementEngine
+
+# The page reads the store's enforcement tallies (enforcement.py), not the frame
+REQUIRED_COLUMNS = []
+
+# Built once per dataset and extended as rows are appended
+ENFORCEMENT = EnforcementEngine(name="Enforcement")
+
+MEASURE_LABELS = {
+    "violations": "Violations issued",
+    "fines": "Fines issued (₹)",
+    "payment_rate": "Payment rate",
+    "collection_rate": "Collection rate (₹ paid / ₹ issued)",
+    "avg_fine": "Average fine (₹)",
+}
+SHOWN_COLUMNS = ["Violations", "Fines", "Paid", "Payment_Rate", "Collection_Rate", "Avg_Fine"]
+FORMATS = {"Fines": "₹{:,.0f}", "Payment_Rate": "{:.1%}", "Collection_Rate": "{:.1%}", "Avg_Fine": "₹{:,.0f}"}
+
+
+def hourly_profile_figure(hours, title):
+    fig, ax = plt.subplots(figsize=(8, 3))
+    sns.barplot(x=HOURS, y=hours, color="#6366f1", ax=ax)
+    ax.set_xlabel("Hour of Day")
+    ax.set_ylabel("Violations")
+    ax.set_title(title)
+    plt.tight_layout()
+    return fig
+
+
+def app(df):
+    from utils import load_global_css
+    load_global_css()
+
+    # ---------------- TITLE ----------------
+    st.markdown("""
+    <h2 style="display:flex; align-items:center; gap:12px;">
+        <i class="bi bi-shield-check" style="font-size:28px; color:#0ea5e9;"></i>
+        Enforcement Analysis
+    </h2>
+    """, unsafe_allow_html=True)
+    st.caption(
+        "Violations issued, fines and payment rates per issuing agency and per officer, "
+        "with each officer's hour-of-day profile."
+    )
+    st.divider()
+
+    state = get_store().aggregate(ENFORCEMENT)
+    if not len(state.officers):
+        st.error("No officer or agency data available in the dataset.")
+        st.stop()
+
+    agencies = state.agencies.frame()
+    totals = agencies[["Violations", "Fines", "Paid", "Paid_Amount"]].sum()
+
+    # ---------------- KPIs ----------------
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        with st.container(border=True):
+            st.metric("👮 Officers", f"{len(state.officers):,}")
+    with col2:
+        with st.container(border=True):
+            st.metric("🏛️ Agencies", f"{len(agencies):,}")
+    with col3:
+        with st.container(border=True):
+            st.metric("📄 Violations Issued", f"{int(totals['Violations']):,}")
+    with col4:
+        with st.container(border=True):
+            st.metric("💳 Payment Rate", f"{totals['Paid'] / max(totals['Violations'], 1):.1%}")
+    st.divider()
+
+    # ---------------- AGENCIES ----------------
+    st.subheader("1. Agency Comparison")
+    col_left, col_right = st.columns([2, 1])
+    with col_left:
+        fig, ax = plt.subplots(figsize=(8, 4))
+        ordered = agencies.sort_values("Violations", ascending=False)
+        sns.barplot(x=ordered.index, y=ordered["Violations"], hue=ordered.index, palette="crest", legend=False, ax=ax)
+        ax.set_xlabel("Issuing Agency")
+        ax.set_ylabel("Violations Issued")
+        ax.set_title("Violations Issued per Agency")
+        plt.xticks(rotation=20, ha="right")
+        plt.tight_layout()
+        st.pyplot(fig)
+        plt.close(fig)
+    with col_right:
+        st.dataframe(ordered[SHOWN_COLUMNS].style.format(FORMATS), use_container_width=True)
+
+    st.markdown("**Time-of-day profile per agency**")
+    fig, ax = plt.subplots(figsize=(12, 3.5))
+    sns.heatmap(agencies[HOURS], cmap="mako", ax=ax, cbar_kws={"label": "Violations"})
+    ax.set_xlabel("Hour of Day")
+    ax.set_ylabel("")
+    plt.tight_layout()
+    st.pyplot(fig)
+    plt.close(fig)
+    st.divider()
+
+    # ---------------- TOP OFFICERS ----------------
+    st.subheader("2. Top Officers")
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        measure = st.selectbox("Rank officers by", list(MEASURES), format_func=MEASURE_LABELS.get,
+                               key="enforcement_measure")
+    with c2:
+        top_n = st.slider("Officers shown", 5, 50, 10, key="enforcement_top_n")
+    top = state.top_officers(top_n, measure)
+    if top.empty:
+        st.info("No officer has enough violations for this ranking.")
+    else:
+        st.dataframe(top[["Agency"] + SHOWN_COLUMNS].style.format(FORMATS), use_container_width=True)
+    st.caption("Rates are ranked only for officers with at least a few violations, so that "
+               "single tickets do not top the list.")
+    st.divider()
+
+    # ---------------- DRILL-DOWN ----------------
+    st.subheader("3. Agency and Officer Drill-down")
+    agency = st.selectbox("Agency", list(agencies.index), key="enforcement_agency")
+    agency_top = state.agency_officers(agency, top_n, measure)
+    st.markdown(f"**Top officers of {agency}** (violations issued for this agency only)")
+    st.dataframe(agency_top[SHOWN_COLUMNS].style.format(FORMATS), use_container_width=True)
+
+    default_officer = agency_top.index[0] if len(agency_top) else ""
+    officer = st.text_input("Officer ID", value=default_officer, key="enforcement_officer").strip()
+    record = state.officers.get(officer) if officer else None
+    if officer and record is None:
+        st.warning(f"No violations issued by {officer}.")
+    elif record is not None:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Violations", f"{record['Violations']:,}")
+        col2.metric("Fines Issued", f"₹{record['Fines']:,.0f}")
+        col3.metric("Payment Rate", f"{record['Payment_Rate']:.1%}")
+        col4.metric("Main Agency", state.main_agency([officer]).iloc[0])
+        fig = hourly_profile_figure([record[h] for h in HOURS], f"{officer}: violations by hour")
+        st.pyplot(fig)
+        plt.close(fig)
@@ -1,5 +1,8 @@
 import streamlit as st
 
+# Home does not read the dataset
+REQUIRED_COLUMNS = []
+
 def app(df):
     from utils import load_global_css
     load_global_css()
@@ -62,3 +65,36 @@ def app(df):
     )
 
     st.info("ℹ️ Use the sidebar navigation to explore analysis pages.")
+
+    # ---------------- DATASET AT A GLANCE ----------------
+    # Home never reads the dataset: the profile already computed in this
+    # process (it includes streamed rows), else the small summary file saved
+    # with the profile, read without importing the data libraries
+    import sys
+    import profile_summary
+
+    summary = None
+    if "dataset_profile" in sys.modules:
+        import dataset_profile
+        from data_store import get_store
+
+        store = get_store()
+        engine = dataset_profile.engine_for(store)
+        if store.has_aggregate(engine):
+            summary = profile_summary.summarize(store.aggregate(engine))
+    if summary is None:
+        summary = profile_summary.read()
+    if summary is not None:
+        st.markdown(
+            """
+            <h3><i class="bi bi-database-fill"></i> Dataset at a Glance</h3>
+            """,
+            unsafe_allow_html=True
+        )
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Records", f"{summary['rows']:,}")
+        c2.metric("Columns", summary["columns"])
+        if summary["locations"] is not None:
+            c3.metric("Locations", summary["locations"])
+        if summary["years"] is not None:
+            c4.metric("Years", "–".join(str(year) for year in summary["years"]))
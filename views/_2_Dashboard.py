@@ -4,6 +4,47 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from datetime import datetime
+from kpi_engine import KPIEngine, rows, total, mean, top, top_count, distinct, count_of, share
+from data_store import date_parts, get_store
+from instrumentation import timed
+from time_series import TimeSeriesEngine
+import live
+
+# --------------------------------------------------
+# KPI DECLARATIONS (evaluated in one pass per rerun)
+# --------------------------------------------------
+DASHBOARD_KPIS = KPIEngine([
+    rows("total_violations"),
+    total("total_fines", "Fine_Amount"),
+    mean("average_fine", "Fine_Amount"),
+    top("top_violation", "Violation_Type"),
+    top_count("top_violation_count", "Violation_Type"),
+    top("top_location", "Location"),
+    distinct("locations_covered", "Location"),
+    top("top_agency", "Issuing_Agency"),
+    top("top_vehicle", "Vehicle_Type"),
+    count_of("license_actions", "Violation_Type", ["No License", "Drunk Driving", "Signal Jumping"]),
+    count_of("repeat_actions", "Is_Repeat_Offender", [True]),
+    share("high_risk_pct", "Risk_Category", ["High Risk"]),
+    share("repeat_pct", "Is_Repeat_Offender", [True]),
+    share("cash_pct", "Payment_Method", ["Cash"]),
+], name="Dashboard")
+
+# Columns this page reads from the shared dataset
+REQUIRED_COLUMNS = sorted(set(DASHBOARD_KPIS.columns) | {
+    "Date", "Vehicle_Type", "Weather_Condition", "Age_Group",
+})
+# Parsed Date with numeric Year/Month, shared read-only across sessions
+DERIVED_COLUMNS = [date_parts]
+
+SNAPSHOT_KPIS = KPIEngine([
+    rows("violations"),
+    count_of("high_risk", "Risk_Category", ["High Risk"]),
+    count_of("repeat_offenders", "Is_Repeat_Offender", [True]),
+], name="Snapshot")
+
+# Monthly counts for the trend, kept up to date as rows stream in
+MONTHLY = TimeSeriesEngine(["month"], name="Dashboard")
 
 
 def app(df):
@@ -19,11 +60,11 @@ def app(df):
         Traffic Violation Analytics Dashboard
     </h1>
     """, unsafe_allow_html=True)
+    # Live mode: the KPI matrix and the monthly trend follow streamed data
+    live.toggle("dashboard")
 
     # --------------------------------------------------
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df['Year'] = df['Date'].dt.year
-    df['Month'] = df['Date'].dt.month
+    # Date / Year / Month arrive pre-parsed (see DERIVED_COLUMNS)
     # len(df) == 4000
     # --------------------------------------------------
     # --------------------------------------------------
@@ -53,95 +94,104 @@ def app(df):
     </h2>
     """, unsafe_allow_html=True)
     # ---------------- KPI CALCULATIONS ----------------
+    # The matrix always covers the whole dataset, so its state is shared
+    kpis = DASHBOARD_KPIS.finalize(get_store().aggregate(DASHBOARD_KPIS))
 
-    total_violations = len(df)
+    @live.section("dashboard: Key Metrics", page="dashboard", inputs=(live.aggregates(DASHBOARD_KPIS),))
+    def kpi_matrix():
+        # Re-read on live ticks; the shared state already includes streamed rows
+        kpis = live.memo("kpis", lambda: DASHBOARD_KPIS.finalize(get_store().aggregate(DASHBOARD_KPIS)))
 
-    total_fines = df["Fine_Amount"].sum()
+        total_violations = kpis.total_violations
 
-    average_fine = int(df["Fine_Amount"].mean())
+        total_fines = kpis.total_fines
 
-    top_violation = df["Violation_Type"].value_counts().idxmax()
+        average_fine = int(kpis.average_fine)
 
-    top_location = df["Location"].value_counts().idxmax()
+        top_violation = kpis.top_violation
 
-    locations_covered = df["Location"].nunique()
+        top_location = kpis.top_location
 
-    total_fines_fmt = f"₹{total_fines:,.0f}"
-    average_fine_fmt = f"₹{average_fine:,.0f}"
+        locations_covered = kpis.locations_covered
 
-    r1c1, r1c2, r1c3, = st.columns(3)
-    r2c1, r2c2, r2c3 = st.columns(3)
+        total_fines_fmt = f"₹{total_fines:,.0f}"
+        average_fine_fmt = f"₹{average_fine:,.0f}"
 
-    r1c1, r1c2, r1c3 = st.columns(3)
-    r2c1, r2c2, r2c3 = st.columns(3)
+        r1c1, r1c2, r1c3, = st.columns(3)
+        r2c1, r2c2, r2c3 = st.columns(3)
 
-    with r1c1:
-        st.markdown(f"""
-        <div class="kpi-box">
-            <div class="kpi-icon">
-                <i class="bi bi-exclamation-triangle"></i>
+        r1c1, r1c2, r1c3 = st.columns(3)
+        r2c1, r2c2, r2c3 = st.columns(3)
+
+        with r1c1:
+            st.markdown(f"""
+            <div class="kpi-box">
+                <div class="kpi-icon">
+                    <i class="bi bi-exclamation-triangle"></i>
+                </div>
+                <div class="kpi-title">Total Violations</div>
+                <div class="kpi-value">{total_violations:,}</div>
             </div>
-            <div class="kpi-title">Total Violations</div>
-            <div class="kpi-value">{total_violations:,}</div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
 
-    with r1c2:
-        st.markdown(f"""
-        <div class="kpi-box">
-            <div class="kpi-icon">
-                <i class="bi bi-currency-rupee"></i>
+        with r1c2:
+            st.markdown(f"""
+            <div class="kpi-box">
+                <div class="kpi-icon">
+                    <i class="bi bi-currency-rupee"></i>
+                </div>
+                <div class="kpi-title">Total Fines</div>
+                <div class="kpi-value">{total_fines_fmt}</div>
             </div>
-            <div class="kpi-title">Total Fines</div>
-            <div class="kpi-value">{total_fines_fmt}</div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
 
-    with r1c3:
-        st.markdown(f"""
-        <div class="kpi-box">
-            <div class="kpi-icon">
-                <i class="bi bi-calculator"></i>
+        with r1c3:
+            st.markdown(f"""
+            <div class="kpi-box">
+                <div class="kpi-icon">
+                    <i class="bi bi-calculator"></i>
+                </div>
+                <div class="kpi-title">Average Fine</div>
+                <div class="kpi-value">{average_fine_fmt}</div>
             </div>
-            <div class="kpi-title">Average Fine</div>
-            <div class="kpi-value">{average_fine_fmt}</div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
 
-    st.markdown("<div style='height:30px'></div>", unsafe_allow_html=True)
+        st.markdown("<div style='height:30px'></div>", unsafe_allow_html=True)
 
-    with r2c1:
-        st.markdown(f"""
-        <div class="kpi-box">
-            <div class="kpi-icon">
-                <i class="bi bi-bar-chart"></i>
+        with r2c1:
+            st.markdown(f"""
+            <div class="kpi-box">
+                <div class="kpi-icon">
+                    <i class="bi bi-bar-chart"></i>
+                </div>
+                <div class="kpi-title">Top Violation</div>
+                <div class="kpi-value">{top_violation}</div>
             </div>
-            <div class="kpi-title">Top Violation</div>
-            <div class="kpi-value">{top_violation}</div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
 
-    with r2c2:
-        st.markdown(f"""
-        <div class="kpi-box">
-            <div class="kpi-icon">
-                <i class="bi bi-person-badge"></i>
+        with r2c2:
+            st.markdown(f"""
+            <div class="kpi-box">
+                <div class="kpi-icon">
+                    <i class="bi bi-person-badge"></i>
+                </div>
+                <div class="kpi-title">Top Location</div>
+                <div class="kpi-value">{top_location}</div>
             </div>
-            <div class="kpi-title">Top Location</div>
-            <div class="kpi-value">{top_location}</div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
 
-    with r2c3:
-        st.markdown(f"""
-        <div class="kpi-box">
-            <div class="kpi-icon">
-                <i class="bi bi-geo-alt"></i>
+        with r2c3:
+            st.markdown(f"""
+            <div class="kpi-box">
+                <div class="kpi-icon">
+                    <i class="bi bi-geo-alt"></i>
+                </div>
+                <div class="kpi-title">Locations Covered</div>
+                <div class="kpi-value">{locations_covered}</div>
             </div>
-            <div class="kpi-title">Locations Covered</div>
-            <div class="kpi-value">{locations_covered}</div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
+
+    kpi_matrix()
 
     # ==================================================
     # ROW 1 VISUALS
@@ -159,7 +209,7 @@ def app(df):
     # GRAPH 1
     # --------------------------------------------------
     with c1:
-        with st.expander(" Total Violations vs Violation Type", expanded=True):
+        with st.expander(" Total Violations vs Violation Type", expanded=True), timed("dashboard: Total Violations vs Violation Type"):
             st.caption("Horizontal Bar Graph displays the number of violations for each violation category.")
 
             vt_filter = st.multiselect(
@@ -195,7 +245,7 @@ def app(df):
     # GRAPH 2
     # --------------------------------------------------
     with c2:
-        with st.expander("Total Violations vs Vehicle Type", expanded=True):
+        with st.expander("Total Violations vs Vehicle Type", expanded=True), timed("dashboard: Total Violations vs Vehicle Type"):
             st.caption("Line graph displays the number of violations by vehicle type.")
 
             vehicle_filter = st.multiselect(
@@ -239,8 +289,7 @@ def app(df):
     # Issuing Authority
     # ==================================================
     st.markdown("---")
-    agency_counts = df["Issuing_Agency"].value_counts()
-    top_agency = agency_counts.idxmax()
+    top_agency = kpis.top_agency
 
     st.markdown("""
     <h3 style="display:flex; align-items:center; gap:10px;">
@@ -250,17 +299,11 @@ def app(df):
     """, unsafe_allow_html=True)
 
     # Derived metrics
-    license_actions = df[df['Violation_Type'].isin(
-        ['No License', 'Drunk Driving', 'Signal Jumping']
-    )].shape[0]
+    license_actions = kpis.license_actions
 
-    repeat_actions = df[df['Is_Repeat_Offender'] == 1].shape[0]
+    repeat_actions = kpis.repeat_actions
 
-    top_vehicle_agency = (
-        df.groupby("Vehicle_Type")
-        .size()
-        .idxmax()
-    )
+    top_vehicle_agency = kpis.top_vehicle
 
     a1, a2, a3, a4 = st.columns(4)
     with a1:
@@ -322,17 +365,11 @@ def app(df):
     # --------------------------------------------------
     # GRAPH 3
     # --------------------------------------------------
-    with c3:
-        with st.expander("Total Violations Over Time (Monthly)", expanded=True):
+    @live.section("dashboard: Total Violations Over Time (Monthly)", page="dashboard", inputs=(live.aggregates(MONTHLY),))
+    def monthly_trend():
+        with st.expander("Total Violations Over Time (Monthly)", expanded=True), timed("dashboard: Total Violations Over Time (Monthly)"):
             st.caption("Line Graph showing monthly trends in traffic violations over the selected year range.")
 
-            year_min = int(df['Date'].dt.year.min())
-            year_max = int(df['Date'].dt.year.max())
-
-            # Default to 2025 if it exists in dataset
-            default_year = 2025 if year_min <= 2025 <= year_max else year_max
-
-
             year_range = st.slider(
                 "Select Year Range ",
                 min_value=2023,
@@ -343,37 +380,44 @@ def app(df):
 
             st.markdown("</div>", unsafe_allow_html=True)
 
-            data_time = df[
-                (df['Date'].dt.year >= year_range[0]) &
-                (df['Date'].dt.year <= year_range[1])
-                ]
+            def monthly_counts():
+                months = get_store().aggregate(MONTHLY)["month"]
+                counts = months.series(start=f"{year_range[0]}-01-01", stop=f"{year_range[1] + 1}-01-01")["All"]
+                counts.index = counts.index.strftime("%Y-%m").rename("Year_Month")
+                return counts.rename("Violations")
 
-            monthly = data_time.groupby(data_time['Date'].dt.to_period("M")).size()
+            monthly = live.memo(("monthly", year_range), monthly_counts)
 
-            fig, ax = plt.subplots(figsize=(GRAPH_W, GRAPH_H+0.41))
-            ax.plot(monthly.index.astype(str), monthly.values, marker='o')
+            def monthly_figure():
+                fig, ax = plt.subplots(figsize=(GRAPH_W, GRAPH_H+0.41))
+                ax.plot(monthly.index.astype(str), monthly.values, marker='o')
 
-            step = max(1, len(monthly) // 10)
-            ax.set_xticks(range(0, len(monthly), step))
-            ax.set_xticklabels(
-                monthly.index.astype(str)[::step],
-                rotation=45,
-                ha='right'
-            )
+                step = max(1, len(monthly) // 10)
+                ax.set_xticks(range(0, len(monthly), step))
+                ax.set_xticklabels(
+                    monthly.index.astype(str)[::step],
+                    rotation=45,
+                    ha='right'
+                )
 
-            ax.set_xlabel("Month")
-            ax.set_ylabel("Total Violations")
-            plt.grid(True)
-            st.pyplot(fig)
+                ax.set_xlabel("Month")
+                ax.set_ylabel("Total Violations")
+                ax.grid(True)
+                return fig
+
+            live.show_figure(("monthly", year_range), monthly_figure)
 
             with st.expander("⬇ View Table"):
                 st.dataframe(monthly.reset_index(name="Violations"))
+
+    with c3:
+        monthly_trend()
     # --------------------------------------------------
     # GRAPH 4
     # --------------------------------------------------
     with c4:
         if 'Weather_Condition' in df.columns:
-            with st.expander("Weather Condition vs Total Violations", expanded=True):
+            with st.expander("Weather Condition vs Total Violations", expanded=True), timed("dashboard: Weather Condition vs Total Violations"):
                 st.caption(
                     "Bar Graph shows how different weather conditions influence the number of traffic violations.")
 
@@ -422,12 +466,14 @@ def app(df):
     today_df = df[df['Date'].dt.date == today]
     month_df = df[(df['Month'] == month) & (df['Year'] == year)]
 
+    month_kpis = SNAPSHOT_KPIS.evaluate(month_df)
+
     c1, c2, c3, c4 = st.columns(4)
     snapshots = [
         ("Today Violations", len(today_df)),
-        ("This Month Violations", len(month_df)),
-        ("High Risk Cases", (month_df['Risk_Category'] == "High Risk").sum()),
-        ("Repeat Offenders", month_df['Is_Repeat_Offender'].sum())
+        ("This Month Violations", month_kpis.violations),
+        ("High Risk Cases", month_kpis.high_risk),
+        ("Repeat Offenders", month_kpis.repeat_offenders)
     ]
 
     for col, (title, value) in zip([c1, c2, c3, c4], snapshots):
@@ -457,7 +503,7 @@ def app(df):
     # GRAPH 5: WEATHER CONDITION vs VIOLATIONS
     # --------------------------------------------------
     with c5:
-        with st.expander(" Payment Method Distribution", expanded=True):
+        with st.expander(" Payment Method Distribution", expanded=True), timed("dashboard: Payment Method Distribution"):
             st.caption("Represents the proportion of different payment methods used.")
 
             pay_filter = st.multiselect(
@@ -521,7 +567,7 @@ def app(df):
                 st.dataframe(pay_dist.reset_index(name="Count"))
 
     with c6:
-        with st.expander("Risk Category vs  Driver Age Group", expanded=True):
+        with st.expander("Risk Category vs  Driver Age Group", expanded=True), timed("dashboard: Risk Category vs Driver Age Group"):
             st.caption("Shows how risk levels are distributed across driver age groups.")
 
             age_filter = st.multiselect(
@@ -604,7 +650,7 @@ def app(df):
 
     left, center, right = st.columns([1, 6, 1])
 
-    with center:
+    with center, timed("dashboard: Violation Frequency Heatmap"):
         fig, ax = plt.subplots(figsize=(8.5, 4.8))
 
         sns.heatmap(
@@ -644,20 +690,15 @@ def app(df):
         return f"<span class='severity-label'>{level}</span>"
 
     # ---------------- METRICS ----------------
-    top_loc = filtered_df['Location'].value_counts().idxmax()
-    top_vio = filtered_df['Violation_Type'].value_counts().idxmax()
+    # Reuses the KPI pass from the top of the page; filtered_df is unchanged.
+    top_loc = kpis.top_location
+    top_vio = kpis.top_violation
 
-    high_risk_pct = (
-                            (filtered_df['Risk_Category'] == 'High Risk').sum() / len(filtered_df)
-                    ) * 100
+    high_risk_pct = kpis.high_risk_pct
 
-    repeat_pct = (
-                         filtered_df['Is_Repeat_Offender'].sum() / len(filtered_df)
-                 ) * 100
+    repeat_pct = kpis.repeat_pct
 
-    cash_pct = (
-                       (filtered_df['Payment_Method'] == 'Cash').sum() / len(filtered_df)
-               ) * 100
+    cash_pct = kpis.cash_pct
 
     # ---------------- RECOMMENDATIONS ----------------
     c1, c2 = st.columns(2)
@@ -678,8 +719,7 @@ def app(df):
 
     with c2:
         # 2. Violation awareness
-        vio_severity = "HIGH" if filtered_df['Violation_Type'].value_counts().max() > 0.3 * len(
-            filtered_df) else "MEDIUM"
+        vio_severity = "HIGH" if kpis.top_violation_count > 0.3 * kpis.total_violations else "MEDIUM"
         st.markdown(f"""
         <div class="reco-card severity-{vio_severity.lower()}">
             <div class="reco-title">
@@ -1,20 +1,29 @@
 import streamlit as st
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib import cm
 from matplotlib.patches import Rectangle
 import warnings
+from data_store import get_store
+from sketches import binned_kde_kws
+from time_series import WEEKDAYS, TimeSeriesEngine
 warnings.filterwarnings('ignore')
 
+# The page reads the store's pre-bucketed time series (time_series.py), not the frame
+REQUIRED_COLUMNS = []
+
+# Hourly and monthly counts and fines per violation type, built once per
+# dataset and extended as rows are appended
+TRENDS = TimeSeriesEngine(["hour", "month"], breakdown="Violation_Type", name="Time Trend")
+
+# Time of day of each hour 0-23
+TIME_OF_DAY = np.array(["Night"] * 5 + ["Morning"] * 7 + ["Afternoon"] * 5 + ["Evening"] * 4 + ["Night"] * 3)
+
 def app(df):
     from utils import load_global_css, bootstrap_icon
     load_global_css()
 
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df["Year"] = df["Date"].dt.year
-
     # ---------------- PAGE TITLE ----------------
     st.markdown(f"""
     {bootstrap_icon('graph-up', 28)}<span style='color:#E8DED9; font-size:28px; font-weight:700; vertical-align:middle;'> Time and Trend Analysis</span>
@@ -26,10 +35,20 @@ def app(df):
     st.divider()
 
     # ---------------- OVERVIEW ----------------
-    total_violations = len(df)
-    peak_hour = df["Hour"].mode()[0]
-    peak_day = df["Day_of_Week"].mode()[0]
-    most_common_violation = df['Violation_Type'].mode()[0]
+    trends = get_store().aggregate(TRENDS)
+    hourly_buckets, monthly_buckets = trends["hour"], trends["month"]
+    if not len(monthly_buckets):
+        st.error("No dated violations available in the dataset.")
+        st.stop()
+
+    total_violations = trends.rows
+    by_hour = hourly_buckets.by("hour", total=True)["All"].reindex(range(24), fill_value=0)
+    by_weekday = hourly_buckets.by("weekday", total=True)["All"]
+    by_year = monthly_buckets.by("year", total=True)["All"]
+    peak_hour = int(by_hour.idxmax())
+    peak_day = WEEKDAYS[by_weekday.idxmax()]
+    most_common_violation = monthly_buckets.categories[monthly_buckets.counts.sum(axis=0).argmax()]
+    years = [int(year) for year in by_year.index[by_year > 0]]
 
     # ---------------- KEY INSIGHTS ----------------
     st.subheader("Key Analytical Insights")
@@ -75,10 +94,10 @@ def app(df):
         with st.expander("Monthly Violation Trend", expanded=True):
             selected_year = st.selectbox(
                 "Select Year",
-                sorted(df["Year"].dropna().unique())
+                years
             )
-            year_df = df[df["Year"] == selected_year]
-            monthly = year_df.groupby(year_df["Date"].dt.month).size().reindex(range(1, 13), fill_value=0)
+            in_year = monthly_buckets.part("year") == selected_year
+            monthly = monthly_buckets.by("month", mask=in_year, total=True)["All"].reindex(range(1, 13), fill_value=0)
             months = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]
 
             fig, ax = plt.subplots(figsize=(8, 4))
@@ -100,7 +119,7 @@ def app(df):
     with col2:
         with st.expander("Yearly Violation Trend", expanded=True):
 
-            yearly = df.groupby("Year").size().reset_index(name="Violations")
+            yearly = by_year.loc[years].rename("Violations").reset_index()
 
             min_year = int(yearly["Year"].min())
             max_year = int(yearly["Year"].max())
@@ -161,23 +180,27 @@ def app(df):
             key="hour_hist_slider"
         )
 
-        # Filter data using slider
-        df_hour = df[
-            (df["Hour"] >= hour_range[0]) &
-            (df["Hour"] <= hour_range[1])
-        ]
+        # Counts per hour from the hourly buckets, then the slider's hours;
+        # the histogram and its KDE are drawn from these 24 bins, not the rows
+        hourly = by_hour.rename_axis("Hour").reset_index(name="Violations")
+        hourly = hourly[hourly["Hour"].between(hour_range[0], hour_range[1])]
+        # Hourly buckets within the slider's hours, for the sections below
+        bucket_hours = hourly_buckets.part("hour")
+        in_hours = (bucket_hours >= hour_range[0]) & (bucket_hours <= hour_range[1])
 
         # ----  hours Plot ----
         fig, ax = plt.subplots(figsize=(12, 5))
         color = sns.color_palette("magma", 1)[0]
 
         sns.histplot(
-            data=df_hour,
+            data=hourly,
             x="Hour",
+            weights="Violations",
             bins=24,
             color="#3b528b",
             edgecolor="#fde725",
             kde=True,
+            kde_kws=binned_kde_kws(hourly["Violations"]),
             line_kws={"linewidth": 2, "color": "#f0f921"},
             ax=ax
         )
@@ -209,7 +232,8 @@ def app(df):
     with col1:
         with st.expander("Day Distribution", expanded=True):
 
-            day_counts = df["Day_of_Week"].value_counts()
+            day_counts = by_weekday.rename(index=dict(enumerate(WEEKDAYS)))
+            day_counts = day_counts[day_counts > 0].sort_values(ascending=False)
 
             colors = [
                 "#440154", "#3b528b", "#55ae92",
@@ -234,13 +258,13 @@ def app(df):
     with col2:
         with st.expander("Weekday vs Weekend", expanded=True):
 
-            # Create DayType
-            df_hour["DayType"] = df_hour["Day_of_Week"].apply(
-                lambda x: "Weekend" if x in ["Saturday", "Sunday"] else "Weekday"
-            )
+            # Violations per DayType and type within the slider's hours
+            by_day = hourly_buckets.by("weekday", mask=in_hours)
+            by_day_type = by_day.groupby(np.where(by_day.index >= 5, "Weekend", "Weekday")).sum()
+            by_day_type = by_day_type.loc[:, by_day_type.sum() > 0]
 
             # Violation Type Filter
-            violation_options = sorted(df_hour["Violation_Type"].unique())
+            violation_options = sorted(by_day_type.columns)
 
             selected_violations = st.multiselect(
                 "Select Violation Types",
@@ -250,17 +274,7 @@ def app(df):
             )
 
             # ✅ SAFE FILTERING
-            filtered_df = df_hour.copy()
-
-            if selected_violations:
-                filtered_df = filtered_df[
-                    filtered_df["Violation_Type"].isin(selected_violations)
-                ]
-            # Crosstab
-            stacked_data = pd.crosstab(
-                filtered_df["DayType"],
-                filtered_df["Violation_Type"]
-            )
+            stacked_data = by_day_type[sorted(selected_violations or violation_options)]
 
             fig, ax = plt.subplots(figsize=(10, 6))
 
@@ -309,18 +323,9 @@ def app(df):
     st.markdown('---')
     st.markdown(f"{bootstrap_icon('clock',18)} <span style='color:#E8DED9; font-size:18px; font-weight:700;'>Violations by Time of Day</span>", unsafe_allow_html=True)
 
-    def time_of_day(hour):
-        if 5 <= hour < 12:
-            return "Morning"
-        elif 12 <= hour < 17:
-            return "Afternoon"
-        elif 17 <= hour < 21:
-            return "Evening"
-        else:
-            return "Night"
-
-    df_hour["TimeOfDay"] = df_hour["Hour"].apply(time_of_day)
-    time_data = pd.crosstab(df_hour["TimeOfDay"], df_hour["Violation_Type"])
+    by_hour_type = hourly_buckets.by("hour", mask=in_hours)
+    time_data = by_hour_type.groupby(TIME_OF_DAY[by_hour_type.index]).sum()
+    time_data = time_data.loc[time_data.sum(axis=1) > 0, time_data.sum() > 0].sort_index(axis=1)
     
     if not time_data.empty:
         with st.expander("Violations by Time of Day", expanded=True):
@@ -399,22 +404,20 @@ def app(df):
     # Year filter
     year_filter = st.multiselect(
         "Filter by Year",
-        options=sorted(df["Year"].dropna().unique())
+        options=years
     )
 
     # Show graph only when filter is applied
     # ✅ Default behavior — show all years if no filter selected
     if year_filter:
-        filtered_df = df[df["Year"].isin(year_filter)]
         title_suffix = " (Filtered Years)"
     else:
-        filtered_df = df.copy()
         title_suffix = " (All Years)"
 
     fine_trend = (
-        filtered_df
-        .groupby("Year")["Fine_Amount"]
-        .mean()
+        monthly_buckets.by("year", "avg_fine", total=True)["All"]
+        .loc[sorted(year_filter) or years]
+        .rename("Fine_Amount")
         .reset_index()
     )
 
@@ -2,11 +2,55 @@ import streamlit as st
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+from colorsys import rgb_to_hls
+import export
+from data_store import get_store
+from sketches import QuantileEngine
 
 # ---------------- CONFIG ----------------
 sns.set_style("whitegrid")
 FIG_W, FIG_H = 5, 3.6
 
+# Columns this page reads from the shared dataset
+REQUIRED_COLUMNS = [
+    "Weather_Condition", "Road_Condition", "Time_of_Day", "Year", "Quarter",
+    "Speed_Violation", "Speed_Excess", "Risk_Score",
+]
+
+# Box plot distributions as t-digests per filter combination, kept by the
+# store (merged on append); a filter merges the digests of the cells it keeps
+FILTER_COLUMNS = ["Weather_Condition", "Road_Condition", "Time_of_Day", "Year"]
+RISK_DIGESTS = QuantileEngine("Risk_Score", by=FILTER_COLUMNS, name="Environment risk")
+SPEED_DIGESTS = QuantileEngine("Speed_Excess", by=FILTER_COLUMNS, name="Environment speed")
+
+
+def sketch_boxplot(engine, group_column, keep, order, palette, ax):
+    """sns.boxplot(x=group_column, y=engine.column) drawn from the store's digests."""
+    state = get_store().aggregate(engine)
+    position = FILTER_COLUMNS.index(group_column)
+    stats, labels = [], []
+    for label in order:
+        digest = state.combined(lambda cell: keep(cell) and cell[position] == label)
+        if digest is not None and digest.count:
+            stats.append({**digest.box_stats(), "label": label})
+            labels.append(label)
+
+    if not stats:
+        return
+    # Seaborn's look: desaturated palette, grey lines from the lightest colour
+    colors = sns.color_palette(palette, len(stats), desat=0.75)
+    line = min(rgb_to_hls(*c)[1] for c in colors) * 0.6 if colors else 0.26
+    linecolor = (line, line, line)
+    boxes = ax.bxp(
+        stats, patch_artist=True, widths=0.8, positions=range(len(stats)),
+        medianprops={"color": linecolor}, whiskerprops={"color": linecolor},
+        capprops={"color": linecolor}, flierprops={"markeredgecolor": linecolor},
+        boxprops={"edgecolor": linecolor},
+    )
+    for patch, color in zip(boxes["boxes"], colors):
+        patch.set_facecolor(color)
+    ax.set_xticks(range(len(labels)), labels)
+
 # ---------------- MAIN FUNCTION ----------------
 def app(df):
     from utils import load_global_css
@@ -64,12 +108,13 @@ def app(df):
     time_filter = time_day if time_day else df["Time_of_Day"].unique()
     year_filter = year if year else df["Year"].unique()
 
-    filtered = df[
+    selection = (
         (df["Weather_Condition"].isin(weather_filter)) &
         (df["Road_Condition"].isin(road_filter)) &
         (df["Time_of_Day"].isin(time_filter)) &
         (df["Year"].isin(year_filter))
-    ]
+    )
+    filtered = df[selection]
 
     if filtered.empty:
         st.warning("No data available for the selected environmental conditions.")
@@ -94,6 +139,9 @@ def app(df):
     })
 
     st.table(kpi_table)
+    export.export_button(
+        "environment", df, selection, filters=(weather, road, time_day, year), name="environment_filtered"
+    )
     st.divider()
 
     # ---------------- ENVIRONMENTAL DISTRIBUTION ----------------
@@ -126,17 +174,21 @@ def app(df):
     # ---------------- SEVERITY ANALYSIS ----------------
     st.subheader("Violation Severity Analysis")
 
+    # Distributions come from the store's digests of the selected cells
+    selected = [set(weather_filter), set(road_filter), set(time_filter), set(year_filter)]
+
+    def in_selection(cell):
+        return all(value in allowed for value, allowed in zip(cell, selected))
+
+    # Same category order as sns.boxplot (first appearance)
+    weather_order = filtered["Weather_Condition"].unique()
+    road_order = filtered["Road_Condition"].unique()
+
     c1, c2 = st.columns(2)
 
     with c1:
         fig, ax = plt.subplots(figsize=(FIG_W, FIG_H))
-        sns.boxplot(
-            data=filtered,
-            x="Weather_Condition",
-            y="Risk_Score",
-            palette="Reds",
-            ax=ax
-        )
+        sketch_boxplot(RISK_DIGESTS, "Weather_Condition", in_selection, weather_order, "Reds", ax)
         ax.set_title("Risk Score Distribution by Weather Condition", fontsize=12, fontweight="bold")
         ax.set_xlabel("Weather Condition", fontsize=10, fontweight="bold")
         ax.set_ylabel("Risk Score", fontsize=10, fontweight="bold")
@@ -145,13 +197,7 @@ def app(df):
 
     with c2:
         fig, ax = plt.subplots(figsize=(FIG_W, FIG_H))
-        sns.boxplot(
-            data=filtered,
-            x="Road_Condition",
-            y="Speed_Excess",
-            palette="Oranges",
-            ax=ax
-        )
+        sketch_boxplot(SPEED_DIGESTS, "Road_Condition", in_selection, road_order, "Oranges", ax)
         ax.set_title("Speed Excess Distribution by Road Condition", fontsize=12, fontweight="bold")
         ax.set_xlabel("Road Condition", fontsize=10, fontweight="bold")
         ax.set_ylabel("Speed Excess", fontsize=10, fontweight="bold")
@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 
+# Columns this page reads from the shared dataset
+REQUIRED_COLUMNS = ["Vehicle_Type", "Speed_Violation", "Helmet_Compliance", "Seatbelt_Compliance"]
+
 
 def app(df):
     from utils import load_global_css
@@ -7,6 +7,47 @@ import matplotlib.ticker as ticker
 import warnings
 warnings.filterwarnings("ignore")
 from datetime import timedelta , datetime
+from data_store import derived_column, get_store
+from sketches import DistinctEngine
+import offender_index
+
+# Columns this page reads from the shared dataset
+REQUIRED_COLUMNS = [
+    "Violation_ID", "Vehicle_Type", "Helmet_Worn", "Seatbelt_Worn", "Previous_Violations",
+    "Alcohol_Level", "Speed_Excess", "Fine_Amount", "Risk_Score", "Risk_Category",
+    "Age_Group", "Penalty_Points",
+]
+
+
+# --------logic-----------
+@derived_column("Helmet_Worn", "Seatbelt_Worn", "Previous_Violations", "Alcohol_Level", "Speed_Excess")
+def driver_profiles(df):
+    """Safety_Violation flag and the four-way Driver_Profile for every record."""
+    safety_violation = (df['Helmet_Worn'] == 'No') | (df['Seatbelt_Worn'] == 'No')
+    # Same precedence as the original row-wise rules, first match wins
+    driver_profile = np.select(
+        [
+            df['Previous_Violations'] >= 3,
+            df['Alcohol_Level'] > 0,
+            (df['Speed_Excess'] > 0) & safety_violation,
+        ],
+        ['Repeat Offender', 'Alcohol Risk Driver', 'Risky Driver'],
+        default='Safe Driver'
+    )
+    return pd.DataFrame({
+        'Safety_Violation': safety_violation,
+        'Driver_Profile': pd.Series(driver_profile, index=df.index, dtype=object),
+    })
+
+
+# Computed once and shared read-only across sessions
+DERIVED_COLUMNS = [driver_profiles]
+
+# Distinct violation IDs, sketched per Previous_Violations value; kept by the
+# store and merged on append instead of a nunique() per rerun
+VIOLATION_IDS = DistinctEngine("Violation_ID", by="Previous_Violations", name="Driver IDs")
+# driver_profiles' first rule: these drivers are Repeat Offenders
+REPEAT_OFFENDER_MIN_PREVIOUS = 3
 
 #-------------------------------------------------------------------------------------------------------------------------------------------------
 #---------------------------------Driver Behaviour Analysis---------------------------------------------------------------------------------------
@@ -25,26 +66,15 @@ def app(df):
     st.write(
         'Divides the driver into one of four categoriesas Safe Driver, Risky Driver, Alcohol Risk Driver, Repeat Offender by using factors like: Previous violations, Alcohol consumption , Overspeeding , Helmet and seatbelt usage')
     st.divider()
-    # safety violation
-    df['Safety_Violation'] = ((df['Helmet_Worn'] == 'No') | (df['Seatbelt_Worn'] == 'No'))
-
-    # --------logic-----------
-    def driver_profile(row):
-        if row['Previous_Violations'] >= 3:
-            return "Repeat Offender"
-        elif row['Alcohol_Level'] > 0:
-            return 'Alcohol Risk Driver'
-        elif row['Speed_Excess'] > 0 and row['Safety_Violation']:
-            return 'Risky Driver'
-        else:
-            return 'Safe Driver'
-
-    df['Driver_Profile'] = df.apply(driver_profile, axis=1)
+    # Safety_Violation and Driver_Profile arrive pre-computed (see DERIVED_COLUMNS)
     # -------------metrics----------------
     # -----------------------------------------------------------------------------------------------------
-    total_drivers = df["Violation_ID"].nunique()
+    # Distinct counts, exact up to sketches.MAX_EXACT_DISTINCT IDs (HyperLogLog, ~1% error, past that)
+    ids = get_store().aggregate(VIOLATION_IDS)
+    total_drivers = ids.estimate()
 
-    repeat_offenders = df[df["Driver_Profile"] == "Repeat Offender"]["Violation_ID"].nunique()
+    repeat_offenders = ids.estimate(
+        lambda previous: previous is not None and previous >= REPEAT_OFFENDER_MIN_PREVIOUS)
     repeat_offender_percentage = (repeat_offenders / total_drivers) * 100
 
     speed_violation_rate = ((df["Speed_Excess"] > 0).sum() / len(df)) * 100
@@ -220,3 +250,61 @@ def app(df):
     st.dataframe(sum)
     st.divider()
 
+    # ---------------- LINKED REPEAT OFFENDERS ----------------
+    # Violations linked to the same driver across the history (offender_index.py);
+    # the index is built once per dataset and extended as rows are appended
+    st.subheader("6. Linked Repeat Offenders")
+    store = get_store()
+    if not offender_index.identifies_drivers(store.schema):
+        # Rows sharing the stand-in attributes are not the same driver
+        st.info(
+            "🔗 Linking violations to drivers needs registration or licence numbers "
+            f"({', '.join(offender_index.IDENTITY_COLUMNS)}), which this dataset does not have. "
+            "Data generated with synthetic_data.py includes them.")
+        st.divider()
+        return
+    index = offender_index.get_index(store)
+    linked_counts = index.violations(index.row_ids(len(df)))
+    st.info(
+        "🔗 Violations are linked to the same driver by their registration and licence numbers, so repeat offending "
+        "is counted from the violation history rather than the self-reported Previous Violations.")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        with st.container(border=True):
+            st.metric("🪪 Linked Drivers", f"{index.size:,}")
+    with col2:
+        with st.container(border=True):
+            st.metric("🔁 Drivers with 2+ Violations", f"{index.repeat_offenders():,}")
+    with col3:
+        with st.container(border=True):
+            st.metric("📎 Violations by Linked Repeaters", f"{(linked_counts >= 2).mean() * 100:.1f}%")
+    with col4:
+        with st.container(border=True):
+            # Any prior violation (a second violation, as in the linked 2+ count); the
+            # page's Repeat Offender profile needs REPEAT_OFFENDER_MIN_PREVIOUS
+            st.metric("📝 Any Prior Violation (self-reported)",
+                      f"{(df['Previous_Violations'] > 0).mean() * 100:.1f}%")
+
+    col_left, col_right = st.columns([2, 1])
+    with col_left:
+        fig, ax = plt.subplots(figsize=(8, 4))
+        distribution = index.distribution()
+        sns.barplot(x=distribution.index, y=distribution.values, palette="rocket", ax=ax)
+        ax.set_yscale("log")
+        ax.yaxis.set_major_formatter(ticker.ScalarFormatter())
+        ax.set_xlabel("Violations per Driver")
+        ax.set_ylabel("Number of Drivers")
+        ax.set_title("Drivers by Number of Linked Violations")
+        st.pyplot(fig)
+        plt.close(fig)
+    with col_right:
+        st.markdown("**Most Frequent Offenders**")
+        st.dataframe(index.top(10), hide_index=True)
+
+    driver_id = st.number_input("Look up a driver ID", min_value=0, max_value=max(index.size - 1, 0), value=0, step=1)
+    driver = index.driver(int(driver_id))
+    if driver is not None:
+        st.write(f"Driver **{int(driver_id)}**: {driver['violations']} violation(s), "
+                 f"first seen {driver['first_seen']}, last seen {driver['last_seen']}.")
+    st.divider()
+
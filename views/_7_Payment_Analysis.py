@@ -7,27 +7,47 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from kpi_engine import KPIEngine, rows, total, mean
+from data_store import derived_column
+import export
 
 sns.set_theme(style="whitegrid")
 
-def app(df):
-    from utils import load_global_css
-    load_global_css()
+PAYMENT_KPIS = KPIEngine([
+    total("total_revenue", "Fine_Amount"),
+    mean("avg_fine", "Fine_Amount"),
+    rows("total_cases"),
+], name="Payment")
+
+# Columns this page reads from the shared dataset
+REQUIRED_COLUMNS = ["Time", "Payment_Method", "Location", "Fine_Amount", "Violation_Type"]
+
+
+# ---------------- TIME OF DAY ----------------
+def categorize_time(hour):
+    if 5 <= hour < 12:
+        return "Morning"
+    elif 12 <= hour < 17:
+        return "Afternoon"
+    elif 17 <= hour < 21:
+        return "Evening"
+    else:
+        return "Night"
+
+
+@derived_column("Time")
+def payment_time_of_day(df):
+    """Parsed Time and this page's four-bucket Time_of_Day."""
+    time = pd.to_datetime(df["Time"], errors="coerce")
+    return pd.DataFrame({"Time": time, "Time_of_Day": time.dt.hour.apply(categorize_time)})
 
-    # ---------------- TIME OF DAY ----------------
-    df["Time"] = pd.to_datetime(df["Time"], errors="coerce")
 
-    def categorize_time(hour):
-        if 5 <= hour < 12:
-            return "Morning"
-        elif 12 <= hour < 17:
-            return "Afternoon"
-        elif 17 <= hour < 21:
-            return "Evening"
-        else:
-            return "Night"
+# Overrides the dataset's Time_of_Day for this page only
+DERIVED_COLUMNS = [payment_time_of_day]
 
-    df["Time_of_Day"] = df["Time"].dt.hour.apply(categorize_time)
+def app(df):
+    from utils import load_global_css
+    load_global_css()
 
     # ---------------- TITLE ----------------
     st.markdown("""
@@ -94,9 +114,10 @@ def app(df):
     # =====================================================
     # KPI SECTION
     # =====================================================
-    total_revenue = global_df["Fine_Amount"].sum()
-    avg_fine = global_df["Fine_Amount"].mean()
-    total_cases = len(global_df)
+    kpis = PAYMENT_KPIS.evaluate(global_df)
+    total_revenue = kpis.total_revenue
+    avg_fine = kpis.avg_fine
+    total_cases = kpis.total_cases
 
     k1, k2, k3 = st.columns(3)
 
@@ -172,6 +193,13 @@ def app(df):
 
         with st.expander("View Filtered Data"):
             st.dataframe(g1_df[["Payment_Method", "Fine_Amount"]], use_container_width=True)
+            export.export_button(
+                "payment",
+                global_df,
+                global_df["Payment_Method"].isin(pay_filter) if pay_filter else None,
+                filters=(pay_global, loc_global, time_global, pay_filter),
+                name="payment_filtered",
+            )
 
     # =====================================================
     # GRAPH 2 — FINE AMOUNT SEVERITY
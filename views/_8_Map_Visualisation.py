@@ -1,12 +1,13 @@
 import streamlit as st
+from instrumentation import timed
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import json
-import requests
-import folium
-from folium.plugins import MarkerCluster
+from geo_data import load_geojsons, combined_geojson, state_centroids
+import query_engine
+import live
+import export
 from datetime import datetime, time
 import warnings
 warnings.filterwarnings("ignore")
@@ -16,10 +17,11 @@ warnings.filterwarnings("ignore")
 # alias time for some snippets that expect dtime
 dtime = time
 
-from streamlit_folium import folium_static
-
 from datetime import datetime
 
+# The map works on its own demo frame kept in session state
+REQUIRED_COLUMNS = []
+
 
 def app(df):
     COLORS = ["#2927F7", "#50B8F6", "#7EDEFA", "#94FEFE", "#80FAD6"]
@@ -37,20 +39,6 @@ def app(df):
             'lon': np.random.choice([75.7, 77.6, 75.7], 4000)
         })
 
-    # GEOJSON LOADER - Add this once
-    @st.cache_data(ttl=3600)
-    def load_geojsons():
-        world_url = "https://raw.githubusercontent.com/holtzy/D3-graph-gallery/master/DATA/world.geojson"
-        world_geo = requests.get(world_url).json()
-
-        india_geo = None
-        try:
-            with open('india_states.geojson', 'r') as f:
-                india_geo = json.load(f)
-        except:
-            pass
-        return world_geo, india_geo
-
     # STATE COORDINATES FOR CSV
     STATE_COORDS = {
         'Karnataka': (12.97, 77.59), 'Punjab': (30.90, 75.85),
@@ -70,6 +58,9 @@ def app(df):
         </h2>
         """, unsafe_allow_html=True)
 
+    # Live mode adds a feed of the streamed violations (the sections below use demo data)
+    live.toggle("map")
+
     # =====================================================
     # Ensure all required columns exist BEFORE filtering
     # =====================================================
@@ -153,6 +144,41 @@ def app(df):
     else:
         filtered_df = st.session_state.df
 
+    # ==================== LIVE FEED ====================
+    @live.section("map: Live Violation Feed", page="map")
+    def live_feed():
+        def state_totals():
+            totals = query_engine.aggregate(
+                ["Location"], {"Violations": query_engine.count(), "Fines": query_engine.total("Fine_Amount")}
+            )
+            centroids = state_centroids()
+            totals["lat"] = totals["Location"].map(lambda s: centroids.get(s, (np.nan, np.nan))[0])
+            totals["lon"] = totals["Location"].map(lambda s: centroids.get(s, (np.nan, np.nan))[1])
+            return totals.dropna(subset=["lat", "lon"])
+
+        totals = live.memo("state_totals", state_totals)
+        total = int(totals["Violations"].sum())
+        baseline = st.session_state.setdefault("live_map_baseline", total)
+
+        with timed("map: Live Violation Feed"):
+            st.markdown("###  **Live Violation Feed**")
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Violations recorded", f"{total:,}", delta=f"+{total - baseline:,} since live mode started")
+            m2.metric("Fines issued", f"₹{totals['Fines'].sum():,.0f}")
+            m3.metric("States reporting", len(totals))
+
+            fig = live.memo("figure", lambda: px.scatter_mapbox(
+                totals, lat="lat", lon="lon", size="Violations", color="Violations",
+                hover_name="Location", hover_data={"Fines": ":,.0f", "lat": False, "lon": False},
+                color_continuous_scale=COLORS[::-1], size_max=40,
+                mapbox_style="carto-darkmatter", center={"lat": 22.5, "lon": 80.0}, zoom=3.6, height=460,
+            ))
+            st.plotly_chart(fig, width="stretch")
+
+    if st.session_state.get("live_map"):
+        live_feed()
+        st.markdown("---")
+
     # ==================== NAVIGATION CARDS ====================
     st.markdown("###  **Filter by Section**")
 
@@ -212,7 +238,7 @@ def app(df):
         st.markdown(scroll_js, unsafe_allow_html=True)
 
     # ==================== EXPANDER 1: VIOLATION TYPE DISTRIBUTION ====================
-    with st.expander("Violation Type Intelligence", expanded=False):
+    with st.expander("Violation Type Intelligence", expanded=False), timed("map: Violation Type Intelligence"):
         st.markdown('<div id="exp1"></div>', unsafe_allow_html=True)
 
         violation_options = sorted(st.session_state.df[
@@ -233,8 +259,7 @@ def app(df):
         state_totals = viol_data.groupby('Location').size().reset_index(name='Violations')
 
         try:
-            with open('india_states.geojson', 'r') as f:
-                    india_geo = json.load(f)
+            world_geo, india_geo = load_geojsons()
 
                 # 🎨 YOUR FAVORITE COLORS + HD FIX
             fig = px.choropleth_mapbox(
@@ -331,9 +356,17 @@ def app(df):
         except:
                 st.error("❌ GeoJSON issue - check file")
 
+        export.export_button(
+            "map_violations",
+            filtered_df,
+            filtered_df['Violation_Type'].isin(selected_violations) if selected_violations else None,
+            filters=(selected_violations, date_range),
+            name="map_violations",
+        )
+
 
     # ==================== EXPANDER 2: VEHICLE CLASSIFICATION ====================
-    with st.expander("Vehicle Class Hotspots", expanded=False):
+    with st.expander("Vehicle Class Hotspots", expanded=False), timed("map: Vehicle Class Hotspots"):
         st.markdown('<div id="exp2"></div>', unsafe_allow_html=True)
 
         vehicle_types = st.multiselect(
@@ -364,23 +397,8 @@ def app(df):
             with col2:
                 map_height = st.slider("📏 Map Height", 600, 1400, 1000, step=100)
 
-            # 🌍 LOAD GEOJSON
-            @st.cache_data(ttl=3600)
-            def load_geojsons():
-                world_geo = requests.get(
-                    "https://raw.githubusercontent.com/holtzy/D3-graph-gallery/master/DATA/world.geojson").json()
-                try:
-                    with open('india_states.geojson', 'r') as f:
-                        india_geo = json.load(f)
-                except:
-                    india_geo = None
-                return world_geo, india_geo
-
-            world_geo, india_geo = load_geojsons()
-            combined_geo = world_geo.copy()
-            if india_geo:
-                for feature in india_geo.get('features', []):
-                    combined_geo['features'].append(feature)
+            # 🌍 GEOJSON (parsed once per process, shared)
+            combined_geo = combined_geojson()
 
             # 🗺️ AESTHETIC CHOROPLETH
             fig = px.choropleth(
@@ -514,7 +532,7 @@ def app(df):
 
 
     # ==================== EXPANDER 3: DEMOGRAPHIC RISK ASSESSMENT ====================
-    with st.expander("Driver Demographics Map", expanded=False):
+    with st.expander("Driver Demographics Map", expanded=False), timed("map: Driver Demographics Map"):
         st.markdown('<div id="exp3"></div>', unsafe_allow_html=True)
 
         age_range = st.slider(" **Age Range**", 18, 65, (25, 45), key="age_range_exp3")
@@ -533,8 +551,7 @@ def app(df):
 
             try:
                 # Load GeoJSON
-                with open('india_states.geojson', 'r') as f:
-                    india_geo = json.load(f)
+                world_geo, india_geo = load_geojsons()
 
                 #  TRUE CHOROPLETH - STATES HIGHLIGHTED (Mapbox + GeoJSON)
                 fig = px.choropleth_mapbox(
@@ -627,7 +644,7 @@ def app(df):
             st.warning("No data in age range!")
 
     # ==================== EXPANDER 4: ENVIRONMENTAL IMPACT ====================
-    with st.expander("Weather-Violation Nexus", expanded=False):
+    with st.expander("Weather-Violation Nexus", expanded=False), timed("map: Weather-Violation Nexus"):
         st.markdown('<div id="exp4"></div>', unsafe_allow_html=True)
 
         weather_types = st.multiselect(
@@ -672,23 +689,8 @@ def app(df):
             with col2:
                 map_height = st.slider(" **Map Height**", 600, 1400, 1000, step=100, key="weather_height")
 
-            # 🌍 LOAD GEOJSON (SAME AS VEHICLES)
-            @st.cache_data(ttl=3600)
-            def load_geojsons():
-                world_geo = requests.get(
-                    "https://raw.githubusercontent.com/holtzy/D3-graph-gallery/master/DATA/world.geojson").json()
-                try:
-                    with open('india_states.geojson', 'r') as f:
-                        india_geo = json.load(f)
-                except:
-                    india_geo = None
-                return world_geo, india_geo
-
-            world_geo, india_geo = load_geojsons()
-            combined_geo = world_geo.copy()
-            if india_geo:
-                for feature in india_geo.get('features', []):
-                    combined_geo['features'].append(feature)
+            # 🌍 GEOJSON (parsed once per process, shared)
+            combined_geo = combined_geojson()
 
             # 🗺️ CHOROPLETH (IDENTICAL TO VEHICLES)
             fig = px.choropleth(
@@ -818,7 +820,7 @@ def app(df):
         else:
             st.warning(" **Select weather conditions first!**")
     # ==================== EXPANDER 5: GEOGRAPHIC HOTSPOT ANALYSIS ====================
-    with st.expander("State-Level Risk Matrix", expanded=False):
+    with st.expander("State-Level Risk Matrix", expanded=False), timed("map: State-Level Risk Matrix"):
         st.markdown('<div id="exp5"></div>', unsafe_allow_html=True)
 
         # STATE FILTER: Dropdown + Multiselect
@@ -866,23 +868,8 @@ def app(df):
         with col3:
             selected_palette = st.selectbox(" **Color Palette**", list(palettes.keys()), index=0, key="state_palette")
 
-        # 🌍 GeoJSON
-        @st.cache_data(ttl=3600)
-        def load_geojsons():
-            world_geo = requests.get(
-                "https://raw.githubusercontent.com/holtzy/D3-graph-gallery/master/DATA/world.geojson").json()
-            try:
-                with open('india_states.geojson', 'r') as f:
-                    india_geo = json.load(f)
-            except:
-                india_geo = None
-            return world_geo, india_geo
-
-        world_geo, india_geo = load_geojsons()
-        combined_geo = world_geo.copy()
-        if india_geo:
-            for feature in india_geo.get('features', []):
-                combined_geo['features'].append(feature)
+        # 🌍 GEOJSON (parsed once per process, shared)
+        combined_geo = combined_geojson()
 
         # 🗺️ CHOROPLETH
         fig = px.choropleth(
@@ -963,7 +950,7 @@ def app(df):
         st.success(f" **{view_type}** | {len(state_stats)} States | Height: 800px")
 
     # ==================== EXPANDER 6: INFRASTRUCTURE CORRELATION ====================
-    with st.expander("Infrastructure Danger Zones", expanded=False):
+    with st.expander("Infrastructure Danger Zones", expanded=False), timed("map: Infrastructure Danger Zones"):
         st.markdown('<div id="exp6div"></div>', unsafe_allow_html=True)
 
         df = st.session_state.df.copy()  # Work on copy to avoid session_state issues
@@ -1006,11 +993,7 @@ def app(df):
                 map_height = st.slider("Map Height", 600, 1400, 1000, step=100, key="road_height")
 
             # Load GeoJSON (shared function exists)
-            world_geo, india_geo = load_geojsons()
-            combined_geo = world_geo.copy()
-            if india_geo:
-                for feature in india_geo.get('features', []):
-                    combined_geo['features'].append(feature)
+            combined_geo = combined_geojson()
 
             # Create choropleth
             fig = px.choropleth(
@@ -1149,7 +1132,7 @@ def app(df):
             st.success(f"ROAD CHOROPLETH READY! Palette: {selected_palette} | Height: {map_height}px | Zoom: ENABLED")
 
     # ==================== EXPANDER 7: TEMPORAL VIOLATION PATTERNS ====================
-    with st.expander("Temporal Violation Patterns & Peak Hour Analysis", expanded=False):
+    with st.expander("Temporal Violation Patterns & Peak Hour Analysis", expanded=False), timed("map: Temporal Violation Patterns & Peak Hour Analysis"):
         df0 = filtered_df.copy()
 
         # ---------- Ensure Time column ----------
@@ -3,17 +3,155 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
+from sketches import binned_kde_kws
 
 # ---------------- CONFIGURATION ----------------
-st.set_page_config(layout="wide")
 sns.set_style("whitegrid")
 
 FIG_W, FIG_H = 5, 3.4
 
+# The report reads the dataset profile (dataset_profile.py), not the frame;
+# the download streams from the store
+REQUIRED_COLUMNS = []
+
+TIME_OF_DAY_NOTES = """
+<div style="font-size:16px; line-height:1.7">
+    <b>Interpretation</b>
+    <ul>
+        <li>Traffic violations are not evenly distributed throughout the day.</li>
+        <li>Higher violation counts are observed during peak activity periods such as 
+            <b>evening and night</b>.</li>
+        <li>Reduced visibility, fatigue, and lower enforcement presence may contribute 
+            to increased violations during late hours.</li>
+        <li>This analysis supports time-specific enforcement and awareness strategies.</li>
+    </ul>
+</div>
+"""
+
+OBSERVATIONS = [
+    "Traffic violations are concentrated in specific locations and time periods",
+    "Certain vehicle categories contribute more frequently to violations",
+    "Fine amount distribution indicates varying severity levels",
+    "Monthly trends suggest seasonal influence on traffic behavior",
+]
+
+CONCLUSION = (
+    "This analytical report highlights key traffic violation patterns "
+    "and supports data-driven traffic management and enforcement planning."
+)
+
+
+# ==================================================
+# REPORT CONTENT (shared with batch_report.py)
+# ==================================================
+# Builders take a dataset_profile.DatasetProfile
+def summary_table(profile):
+    return pd.DataFrame({
+        "Metric": ["Total Records", "Total Columns", "Missing Values"],
+        "Value": [profile.rows, len(profile.columns), profile.nulls]
+    })
+
+
+def column_info(profile):
+    return pd.DataFrame({
+        "Column Name": profile.column_names,
+        "Data Type": profile.dtypes.values
+    })
+
+
+def _location_column(data):
+    return next((c for c in ["State", "City", "Location"] if c in data.columns), None)
+
+
+def _fine_column(profile):
+    return next((c for c in profile.columns if "fine" in c.lower()), None)
+
+
+def _top_bar(counts, title, xlabel, ylabel, palette):
+    fig, ax = plt.subplots(figsize=(FIG_W, FIG_H))
+    sns.barplot(x=counts.values, y=counts.index, palette=palette, ax=ax)
+    ax.set_title(title, fontsize=12, fontweight="bold")
+    ax.set_xlabel(xlabel, fontsize=10, fontweight="bold")
+    ax.set_ylabel(ylabel, fontsize=10, fontweight="bold")
+    plt.tight_layout()
+    return fig
+
+
+def violation_types_figure(profile):
+    vc = profile.top("Violation_Type", 8)
+    return _top_bar(vc, "Top Violation Types", "Number of Violations", "Violation Type", "Spectral")
+
+
+def vehicle_types_figure(profile):
+    vt = profile.top("Vehicle_Type", 8)
+    return _top_bar(vt, "Violations by Vehicle Type", "Number of Violations", "Vehicle Type", "Blues_r")
+
+
+def locations_figure(profile):
+    """None when the data has no location column."""
+    location_column = _location_column(profile)
+    lc = profile.top(location_column, 8) if location_column else None
+    if lc is None:
+        return None
+    return _top_bar(lc, "Top Locations by Violations", "Number of Violations", "Location", "Greens_r")
+
+
+def fine_histogram_figure(profile):
+    """None when the data has no numeric fine column."""
+    fine_col = _fine_column(profile)
+    histogram = profile.histogram(fine_col) if fine_col else None
+    if histogram is None:
+        return None
+    counts, edges = histogram
+    fig, ax = plt.subplots(figsize=(FIG_W, FIG_H))
+    # The profile's bins, weighted by their counts
+    bins = pd.DataFrame({fine_col: (edges[:-1] + edges[1:]) / 2, "count": counts})
+    sns.histplot(bins, x=fine_col, weights="count", bins=list(edges), kde=True,
+                 kde_kws=binned_kde_kws(counts), color="purple", ax=ax)
+    ax.set_title("Fine Amount Distribution", fontsize=12, fontweight="bold")
+    ax.set_xlabel("Fine Amount", fontsize=10, fontweight="bold")
+    ax.set_ylabel("Frequency", fontsize=10, fontweight="bold")
+    plt.tight_layout()
+    return fig
+
+
+def time_of_day_figure(profile):
+    """None when the data has no Time_of_Day column."""
+    time_counts = profile.counts("Time_of_Day")
+    if time_counts is None:
+        return None
+    fig, ax = plt.subplots(figsize=(5.5, 3.4))
+    sns.barplot(
+        x=time_counts.index,
+        y=time_counts.values,
+        palette="coolwarm",
+        ax=ax
+    )
+    ax.set_title("Traffic Violations by Time of Day", fontsize=12, fontweight="bold")
+    ax.set_xlabel("Time of Day", fontsize=10, fontweight="bold")
+    ax.set_ylabel("Number of Violations", fontsize=10, fontweight="bold")
+    ax.tick_params(labelsize=9)
+    plt.tight_layout()
+    return fig
+
+
+# Report charts in page order: name -> (section, builder)
+FIGURES = {
+    "violation_types": ("Violation and Vehicle Analysis", violation_types_figure),
+    "vehicle_types": ("Violation and Vehicle Analysis", vehicle_types_figure),
+    "locations": ("Location and Fine Analysis", locations_figure),
+    "fine_histogram": ("Location and Fine Analysis", fine_histogram_figure),
+    "time_of_day": ("Time of Day Violation Analysis", time_of_day_figure),
+}
+
+
 def app(df):
+    import dataset_profile
     from utils import load_global_css
     load_global_css()
 
+    profile = dataset_profile.get_profile()
+
     # ---------------- TITLE ----------------
     st.markdown("""
     <h2 style="display:flex; align-items:center; gap:12px;">
@@ -32,29 +170,19 @@ def app(df):
     # ---------------- DATASET SUMMARY (TABLE) ----------------
     st.subheader("Dataset Summary")
 
-    summary_table = pd.DataFrame({
-        "Metric": ["Total Records", "Total Columns", "Missing Values"],
-        "Value": [df.shape[0], df.shape[1], df.isnull().sum().sum()]
-    })
-
-    st.dataframe(summary_table, use_container_width=True)
+    st.dataframe(summary_table(profile), use_container_width=True)
 
     st.divider()
 
     # ---------------- COLUMN INFO ----------------
     st.subheader("Column Information")
-    st.dataframe(
-        pd.DataFrame({
-            "Column Name": df.columns,
-            "Data Type": df.dtypes.astype(str)
-        })
-    )
+    st.dataframe(column_info(profile))
 
     st.divider()
 
     # ---------------- SAMPLE DATA ----------------
     st.subheader("Sample Records")
-    st.dataframe(df.head(8))
+    st.dataframe(profile.sample)
 
     st.divider()
 
@@ -68,24 +196,10 @@ def app(df):
     c1, c2 = st.columns(2)
 
     with c1:
-        fig, ax = plt.subplots(figsize=(FIG_W, FIG_H))
-        vc = df["Violation_Type"].value_counts().head(8)
-        sns.barplot(x=vc.values, y=vc.index, palette="Spectral", ax=ax)
-        ax.set_title("Top Violation Types", fontsize=12, fontweight="bold")
-        ax.set_xlabel("Number of Violations", fontsize=10, fontweight="bold")
-        ax.set_ylabel("Violation Type", fontsize=10, fontweight="bold")
-        plt.tight_layout()
-        st.pyplot(fig)
+        st.pyplot(violation_types_figure(profile))
 
     with c2:
-        fig, ax = plt.subplots(figsize=(FIG_W, FIG_H))
-        vt = df["Vehicle_Type"].value_counts().head(8)
-        sns.barplot(x=vt.values, y=vt.index, palette="Blues_r", ax=ax)
-        ax.set_title("Violations by Vehicle Type", fontsize=12, fontweight="bold")
-        ax.set_xlabel("Number of Violations", fontsize=10, fontweight="bold")
-        ax.set_ylabel("Vehicle Type", fontsize=10, fontweight="bold")
-        plt.tight_layout()
-        st.pyplot(fig)
+        st.pyplot(vehicle_types_figure(profile))
 
     st.divider()
 
@@ -95,33 +209,15 @@ def app(df):
     c1, c2 = st.columns(2)
 
     with c1:
-        location_column = next(
-            (c for c in ["State", "City", "Location"] if c in df.columns),
-            None
-        )
-
-        if location_column:
-            fig, ax = plt.subplots(figsize=(FIG_W, FIG_H))
-            lc = df[location_column].value_counts().head(8)
-            sns.barplot(x=lc.values, y=lc.index, palette="Greens_r", ax=ax)
-            ax.set_title("Top Locations by Violations", fontsize=12, fontweight="bold")
-            ax.set_xlabel("Number of Violations", fontsize=10, fontweight="bold")
-            ax.set_ylabel("Location", fontsize=10, fontweight="bold")
-            plt.tight_layout()
+        fig = locations_figure(profile)
+        if fig is not None:
             st.pyplot(fig)
         else:
             st.info("Location data not available.")
 
     with c2:
-        fine_cols = [c for c in df.columns if "fine" in c.lower()]
-        if fine_cols:
-            fine_col = fine_cols[0]
-            fig, ax = plt.subplots(figsize=(FIG_W, FIG_H))
-            sns.histplot(df[fine_col], bins=30, kde=True, color="purple", ax=ax)
-            ax.set_title("Fine Amount Distribution", fontsize=12, fontweight="bold")
-            ax.set_xlabel("Fine Amount", fontsize=10, fontweight="bold")
-            ax.set_ylabel("Frequency", fontsize=10, fontweight="bold")
-            plt.tight_layout()
+        fig = fine_histogram_figure(profile)
+        if fig is not None:
             st.pyplot(fig)
         else:
             st.info("Fine data not available.")
@@ -131,59 +227,16 @@ def app(df):
     # -------- Row 3: Time of Day Analysis (Compact with Explanation) --------
     st.subheader("Time of Day Violation Analysis")
 
-    if "Time_of_Day" in df.columns:
+    fig = time_of_day_figure(profile)
+    if fig is not None:
 
         c1, c2 = st.columns([2, 3])
 
         with c1:
-            fig, ax = plt.subplots(figsize=(5.5, 3.4))
-
-            time_counts = df["Time_of_Day"].value_counts()
-
-            sns.barplot(
-                x=time_counts.index,
-                y=time_counts.values,
-                palette="coolwarm",
-                ax=ax
-            )
-
-            ax.set_title(
-                "Traffic Violations by Time of Day",
-                fontsize=12,
-                fontweight="bold"
-            )
-            ax.set_xlabel(
-                "Time of Day",
-                fontsize=10,
-                fontweight="bold"
-            )
-            ax.set_ylabel(
-                "Number of Violations",
-                fontsize=10,
-                fontweight="bold"
-            )
-            ax.tick_params(labelsize=9)
-
-            plt.tight_layout()
             st.pyplot(fig)
 
         with c2:
-            st.markdown(
-                """
-                <div style="font-size:16px; line-height:1.7">
-                    <b>Interpretation</b>
-                    <ul>
-                        <li>Traffic violations are not evenly distributed throughout the day.</li>
-                        <li>Higher violation counts are observed during peak activity periods such as 
-                            <b>evening and night</b>.</li>
-                        <li>Reduced visibility, fatigue, and lower enforcement presence may contribute 
-                            to increased violations during late hours.</li>
-                        <li>This analysis supports time-specific enforcement and awareness strategies.</li>
-                    </ul>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+            st.markdown(TIME_OF_DAY_NOTES, unsafe_allow_html=True)
 
     else:
         st.info("Time of day data not available.")
@@ -193,24 +246,12 @@ def app(df):
     # ---------------- KEY OBSERVATIONS ----------------
     st.subheader("Key Observations")
 
-    st.markdown(
-        """
-        - Traffic violations are concentrated in specific locations and time periods  
-        - Certain vehicle categories contribute more frequently to violations  
-        - Fine amount distribution indicates varying severity levels  
-        - Monthly trends suggest seasonal influence on traffic behavior  
-        """
-    )
+    st.markdown("\n".join(f"- {line}" for line in OBSERVATIONS))
 
     # ---------------- CONCLUSION ----------------
     st.subheader("Conclusion")
 
-    st.markdown(
-        """
-        This analytical report highlights key traffic violation patterns
-        and supports data-driven traffic management and enforcement planning.
-        """
-    )
+    st.markdown(CONCLUSION)
 
 # download the dataset used
     st.markdown('---')
@@ -221,13 +262,22 @@ def app(df):
     </h4>
     """, unsafe_allow_html=True)
 
-    csv = df.to_csv(index=False).encode("utf-8")
+    import export
 
+    # The file is written (and cached per dataset version) only when clicked
+    formats = export.available_formats()
+    fmt = st.selectbox(
+        "Format",
+        formats,
+        format_func=lambda f: export.FORMATS[f][0],
+        key="report_download_format",
+    )
     st.download_button(
-        label="Download CSV",
-        data=csv,
-        file_name="Indian_Traffic_Violations_Dataset.csv",
-        mime="text/csv"
+        label=f"Download {export.FORMATS[fmt][0]}",
+        data=lambda: export.export_bytes(fmt),
+        file_name=export.file_name(fmt),
+        mime=export.mime_type(fmt),
+        on_click="ignore",
     )
 
 
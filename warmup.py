@@ -0,0 +1,290 @@
+"""Warm the process-wide caches so the first visitor of each page does not pay for them.
+
+main.py starts the warm-up in a background thread on the first script run of
+a server process (set STV_WARMUP=0 to disable). That thread does not render
+pages: pyplot keeps global state, so drawing pages beside live sessions can
+corrupt their figures. It warms the figure libraries through their object
+APIs instead.
+
+Run by hand or as a deploy step, the warm-up also renders every page in its
+default state and builds the Parquet copy of the dataset that later processes
+reuse:
+
+    python warmup.py                 # all stages, timings printed per stage
+    python warmup.py --no-render     # skip the default-state page renders
+    python warmup.py --json warmup.json
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from startup import PAGES, page_data
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENV = "STV_WARMUP"
+THREAD_NAME = "cache-warmup"
+
+# Stage reports of the last completed warm-up in this process
+last_report = []
+
+
+# ==================================================
+# STAGES
+# ==================================================
+def import_pages(pages):
+    return {label: importlib.import_module(module) for label, module in pages.items()}
+
+
+def _engines(views):
+    """The store aggregates the pages declare at module level."""
+    from kpi_engine import KPIEngine
+    from enforcement import EnforcementEngine
+    from sketches import DistinctEngine, QuantileEngine
+    from time_series import TimeSeriesEngine
+
+    return {
+        value
+        for view in views.values()
+        for value in vars(view).values()
+        if isinstance(value, (KPIEngine, DistinctEngine, QuantileEngine,
+                              EnforcementEngine, TimeSeriesEngine))
+    }
+
+
+def load_dataset(views):
+    """Make the columns the pages and their aggregates read resident, and no others.
+
+    A partitioned dataset is read by partition on demand and not loaded.
+    """
+    from data_store import get_store
+
+    store = get_store()
+    if store.partitioned is not None:
+        return "partitioned, read on demand"
+    needed = {col for view in views.values() for col in getattr(view, "REQUIRED_COLUMNS", ())}
+    needed.update(col for engine in _engines(views) for col in engine.columns)
+    store.load([col for col in store.schema if col in needed])
+    return f"{len(store.loaded_columns())} columns, {store.memory_usage() / 1e6:.1f} MB"
+
+
+def build_derived(views):
+    from data_store import get_store
+
+    store = get_store()
+    funcs = {f for view in views.values() for f in getattr(view, "DERIVED_COLUMNS", ())}
+    for func in funcs:
+        store.derived(func)
+    return f"{len(funcs)} overlays"
+
+
+def build_aggregates(views):
+    from data_store import get_store
+
+    store = get_store()
+    engines = _engines(views)
+    for engine in engines:
+        store.aggregate(engine)
+    return f"{len(engines)} store aggregates"
+
+
+def build_profile():
+    import dataset_profile
+
+    profile = dataset_profile.get_profile()
+    return f"{profile.rows:,} rows, {len(profile.columns)} columns"
+
+
+def build_offender_index():
+    import offender_index
+    from data_store import get_store
+
+    # Only the Driver page reads the index, and only when rows name their driver
+    if not offender_index.identifies_drivers(get_store().schema):
+        return "skipped, no driver identifiers"
+    index = offender_index.get_index()
+    return f"{index.size:,} drivers"
+
+
+def parse_geometries():
+    from geo_data import combined_geojson, load_geojsons
+
+    world, india = load_geojsons()
+    combined_geojson()
+    return f"{len(world['features'])} world + {len((india or {}).get('features', []))} India features"
+
+
+def warm_figures():
+    """Draw one matplotlib and one plotly figure without touching pyplot state.
+
+    Pays the font-cache, renderer and trace-validator setup that the first
+    chart of every page would otherwise pay.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import plotly.express as px
+    from geo_data import combined_geojson
+
+    fig = Figure(figsize=(4, 3))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.bar(["a", "b"], [1, 2])
+    ax.set_title("warm-up")
+    fig.canvas.draw()
+
+    px.choropleth(
+        {"Location": ["Karnataka"], "Violations": [1]},
+        geojson=combined_geojson(),
+        locations="Location",
+        color="Violations",
+        featureidkey="properties.st_nm",
+    ).to_json()
+    return "matplotlib + plotly"
+
+
+def render_page(view):
+    """Run a page once with its default widget state, outside any session.
+
+    Nothing is sent to a browser; the point is to fill st.cache_data entries
+    and pay one-off costs (font cache, figure/trace setup) ahead of users.
+    """
+    import matplotlib.pyplot as plt
+
+    before = set(plt.get_fignums())
+    try:
+        view.app(page_data(view))
+    finally:
+        for num in set(plt.get_fignums()) - before:
+            plt.close(num)
+
+
+# ==================================================
+# RUNNER
+# ==================================================
+_running = threading.local()
+
+
+class _WarmupFilter(logging.Filter):
+    """Drop Streamlit's bare-mode warnings (no session context) raised by the warm-up."""
+
+    def filter(self, record):
+        return not getattr(_running, "active", False)
+
+
+_filter = _WarmupFilter()
+
+
+def _quiet_streamlit_loggers():
+    for name in list(logging.Logger.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).addFilter(_filter)
+
+
+@contextmanager
+def bare_mode():
+    """Run pages outside a Streamlit server without its no-session warnings."""
+    previous = getattr(_running, "active", False)
+    _running.active = True
+    try:
+        import streamlit  # noqa: F401 (creates the loggers being filtered)
+        _quiet_streamlit_loggers()
+        yield
+    finally:
+        _running.active = previous
+
+
+def _stage(report, name, func, *args):
+    start = time.perf_counter()
+    result, detail, status = None, None, "ok"
+    try:
+        result = func(*args)
+        if isinstance(result, str):
+            detail = result
+    except Exception as exc:
+        # A failing stage must not stop the others (or the server)
+        detail, status = repr(exc), "failed"
+        logger.warning("warm-up stage %r failed", name, exc_info=True)
+    seconds = time.perf_counter() - start
+    report.append({"stage": name, "seconds": round(seconds, 4), "status": status, "detail": detail})
+    logger.info("warm-up %-30s %7.3fs %s", name, seconds, status)
+    return result
+
+
+def run_warmup(pages=None, render=True):
+    """Run every warm-up stage in order and return the per-stage timings."""
+    global last_report
+    pages = pages or PAGES
+    report = []
+
+    with bare_mode():
+        views = _stage(report, "import pages", import_pages, pages)
+        if isinstance(views, dict):
+            # Page modules may create more Streamlit loggers on import
+            _quiet_streamlit_loggers()
+            _stage(report, "load dataset", load_dataset, views)
+            _stage(report, "derived columns", build_derived, views)
+            _stage(report, "aggregates", build_aggregates, views)
+            _stage(report, "dataset profile", build_profile)
+            _stage(report, "offender index", build_offender_index)
+            _stage(report, "geometries", parse_geometries)
+            _stage(report, "figure libraries", warm_figures)
+            if render:
+                for label, view in views.items():
+                    _stage(report, f"render: {label}", render_page, view)
+
+    last_report = report
+    return report
+
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def warmup_on_start():
+    return os.environ.get(WARMUP_ENV, "1") != "0"
+
+
+def start_background_warmup(pages=None, render=False):
+    """Start run_warmup in a daemon thread, once per process.
+
+    Page renders are off by default here (see the module docstring).
+    """
+    global _thread
+    if _thread is not None:
+        return _thread
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(
+                target=run_warmup,
+                args=(pages, render),
+                name=THREAD_NAME,
+                daemon=True,
+            )
+            _thread.start()
+    return _thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm the dataset, aggregate and geometry caches")
+    parser.add_argument("--no-render", action="store_true", help="skip the default-state page renders")
+    parser.add_argument("--json", help="write the stage timings to this file")
+    args = parser.parse_args(argv)
+
+    report = run_warmup(render=not args.no_render)
+    for row in report:
+        print(f"{row['stage']:<36} {row['seconds']:8.3f}s  {row['status']:<6} {row['detail'] or ''}")
+    print(f"{'total':<36} {sum(r['seconds'] for r in report):8.3f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(r["status"] != "ok" for r in report) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())